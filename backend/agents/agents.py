@@ -1,6 +1,9 @@
 import google.generativeai as genai
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional
 from config import settings
+from concurrency import run_blocking, iterate_blocking
+from .llm_cache import generate_text
 
 genai.configure(api_key=settings.gemini_api_key)
 
@@ -11,7 +14,12 @@ class PlannerAgent:
     def __init__(self):
         self.model = genai.GenerativeModel('gemini-pro')
     
-    async def create_lesson_plan(self, topics: List[str], context_chunks: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    async def create_lesson_plan(
+        self,
+        topics: List[str],
+        context_chunks: Dict[str, List[str]],
+        use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
         """Create a sequential lesson plan"""
         
         prompt = f"""You are a curriculum planner.
@@ -35,8 +43,8 @@ Example format:
 2. Understanding OSI Model (OSI Model) - 45 minutes
 """
         
-        response = self.model.generate_content(prompt)
-        lessons = self._parse_lesson_plan(response.text, topics)
+        text = await generate_text(self.model, prompt, use_cache=use_cache)
+        lessons = self._parse_lesson_plan(text, topics)
         
         return lessons
     
@@ -77,15 +85,8 @@ class TeachingAgent:
     def __init__(self):
         self.model = genai.GenerativeModel('gemini-pro')
     
-    async def teach_topic(
-        self,
-        topic: str,
-        chunks: List[str],
-        user_message: str = None,
-        conversation_history: List[Dict[str, str]] = None
-    ) -> Dict[str, str]:
-        """Teach a topic using provided content chunks"""
-        
+    def _build_prompt(self, topic: str, chunks: List[str], user_message: str = None) -> str:
+        """Build the teaching prompt for a first lesson or a follow-up"""
         context = "\n\n".join(chunks)
         
         if not user_message:
@@ -120,10 +121,10 @@ Respond to the student's question or comment:
 4. Ask a follow-up question to deepen understanding
 """
         
-        response = self.model.generate_content(prompt)
-        
-        # Extract follow-up question (simple heuristic)
-        text = response.text
+        return prompt
+    
+    def extract_follow_up(self, text: str) -> Optional[str]:
+        """Extract follow-up question (simple heuristic)"""
         follow_up = None
         
         if '?' in text:
@@ -133,10 +134,51 @@ Respond to the student's question or comment:
                     follow_up = sentence.strip()
                     break
         
+        return follow_up
+    
+    async def teach_topic(
+        self,
+        topic: str,
+        chunks: List[str],
+        user_message: str = None,
+        conversation_history: List[Dict[str, str]] = None
+    ) -> Dict[str, str]:
+        """Teach a topic using provided content chunks"""
+        prompt = self._build_prompt(topic, chunks, user_message)
+        
+        response = await run_blocking(self.model.generate_content, prompt)
+        
+        text = response.text
+        follow_up = self.extract_follow_up(text)
+        
         return {
             "message": text,
             "follow_up_question": follow_up
         }
+    
+    def _stream_text(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True):
+            # .text raises ValueError on chunks without text parts
+            candidate = chunk.candidates[0] if chunk.candidates else None
+            if candidate is None or candidate.finish_reason.name == "SAFETY":
+                reason = chunk.prompt_feedback.block_reason.name if candidate is None \
+                    else candidate.finish_reason.name
+                # Surfaced to the client as the stream's `error` event
+                raise RuntimeError(f"Response was blocked ({reason})")
+            if candidate.content.parts and chunk.text:
+                yield chunk.text
+    
+    async def stream_topic(
+        self,
+        topic: str,
+        chunks: List[str],
+        user_message: str = None
+    ) -> AsyncIterator[str]:
+        """Teach a topic, yielding text as the model generates it"""
+        prompt = self._build_prompt(topic, chunks, user_message)
+        
+        async for text in iterate_blocking(self._stream_text, prompt):
+            yield text
 
 
 class QuizAgent:
@@ -150,7 +192,8 @@ class QuizAgent:
         topic: str,
         chunks: List[str],
         num_questions: int = 5,
-        difficulty: str = "medium"
+        difficulty: str = "medium",
+        use_cache: bool = True
     ) -> List[Dict[str, Any]]:
         """Generate quiz questions from content"""
         
@@ -181,8 +224,8 @@ Explanation: [explanation]
 ---
 """
         
-        response = self.model.generate_content(prompt)
-        questions = self._parse_questions(response.text, topic)
+        text = await generate_text(self.model, prompt, use_cache=use_cache)
+        questions = self._parse_questions(text, topic)
         
         return questions
     
@@ -230,7 +273,8 @@ Explanation: [explanation]
         self,
         question: str,
         correct_answer: str,
-        student_answer: str
+        student_answer: str,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """Evaluate a student's answer"""
         
@@ -245,8 +289,7 @@ Student's Answer: {student_answer}
 Briefly explain why the student's answer is incorrect and what the right concept is.
 Keep it to 2-3 sentences."""
             
-            response = self.model.generate_content(prompt)
-            feedback = response.text
+            feedback = await generate_text(self.model, prompt, use_cache=use_cache)
         else:
             feedback = "Correct! Well done."
         
@@ -255,6 +298,80 @@ Keep it to 2-3 sentences."""
             "score": score,
             "feedback": feedback
         }
+    
+    def grade_answers(self, questions: List[Dict[str, Any]], answers: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Grade answers against stored questions without calling the model.
+        
+        An answer may be the option text or its letter (A-D); unanswered
+        questions count as incorrect.
+        """
+        results = []
+        
+        for question in questions:
+            student_answer = (answers.get(question['question_id']) or '').strip()
+            options = question.get('options', [])
+            
+            # Accept the option letter as well as the option text
+            letter_idx = {'A': 0, 'B': 1, 'C': 2, 'D': 3}
+            if len(student_answer) == 1 and letter_idx.get(student_answer.upper(), 99) < len(options):
+                student_answer = options[letter_idx[student_answer.upper()]]
+            
+            is_correct = bool(student_answer) and \
+                student_answer.lower() == question['correct_answer'].strip().lower()
+            
+            results.append({
+                "question_id": question['question_id'],
+                "question": question['question'],
+                "correct_answer": question['correct_answer'],
+                "student_answer": student_answer,
+                "explanation": question.get('explanation', ''),
+                "is_correct": is_correct,
+                "score": 1.0 if is_correct else 0.0
+            })
+        
+        return results
+    
+    async def explain_mistakes(
+        self,
+        mistakes: List[Dict[str, Any]],
+        use_cache: bool = True
+    ) -> Dict[str, str]:
+        """Feedback for all wrong answers of a submission in one model call"""
+        if not mistakes:
+            return {}
+        
+        items = "\n\n".join(
+            f"""[{i}]
+Question: {m['question']}
+Correct Answer: {m['correct_answer']}
+Student's Answer: {m['student_answer'] or '(no answer)'}"""
+            for i, m in enumerate(mistakes, 1)
+        )
+        
+        prompt = f"""A student answered the following quiz questions incorrectly.
+
+{items}
+
+For each numbered item, briefly explain why the student's answer is incorrect and what the right concept is.
+Keep each explanation to 2-3 sentences.
+Start each explanation with its number in brackets, e.g. [1].
+"""
+        
+        text = await generate_text(self.model, prompt, use_cache=use_cache)
+        return self._parse_explanations(text, mistakes)
+    
+    def _parse_explanations(self, text: str, mistakes: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Map numbered explanations back to question IDs"""
+        feedback = {}
+        parts = re.split(r'^\s*\[(\d+)\]\s*', text, flags=re.MULTILINE)
+        
+        # parts = [preamble, number, explanation, number, explanation, ...]
+        for number, explanation in zip(parts[1::2], parts[2::2]):
+            index = int(number) - 1
+            if 0 <= index < len(mistakes) and explanation.strip():
+                feedback[mistakes[index]['question_id']] = explanation.strip()
+        
+        return feedback
 
 
 class EvaluationAgent:
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+from concurrency import run_blocking
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share a key"""
+    return ' '.join(prompt.split())
+
+
+def response_key(model_name: str, prompt: str, params: Dict[str, Any]) -> str:
+    """Cache key from (model, normalized prompt hash, generation params)"""
+    digest = hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+    params_json = json.dumps(params, sort_keys=True, default=str)
+    return f"{model_name}:{digest}:{params_json}"
+
+
+class LLMResponseCache:
+    """In-memory LRU cache of LLM response texts with a TTL.
+
+    Bounded by the total size of cached texts. Concurrent misses on the
+    same key share a single model call, so a class requesting the same
+    quiz at once costs one generation.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 86400):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            text, expires_at = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                return None
+
+            self._entries.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str):
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (text, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key: str):
+        text, _ = self._entries.pop(key)
+        self._bytes -= len(text.encode('utf-8'))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    async def generate(self, model, prompt: str, use_cache: bool = True, **params) -> str:
+        """Text of model.generate_content(prompt, **params), cached.
+
+        Pass use_cache=False for prompts whose answer must be fresh.
+        """
+        if not use_cache:
+            response = await run_blocking(model.generate_content, prompt, **params)
+            return response.text
+
+        model_name = getattr(model, 'model_name', type(model).__name__)
+        key = response_key(model_name, prompt, params)
+
+        text = self.get(key)
+        if text is not None:
+            self.hits += 1
+            return text
+
+        # Concurrent misses wait on the same generation task
+        task = self._in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._generate(model, prompt, key, params))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shielded so one cancelled request doesn't cancel the others
+        return await asyncio.shield(task)
+
+    async def _generate(self, model, prompt: str, key: str, params: Dict[str, Any]) -> str:
+        response = await run_blocking(model.generate_content, prompt, **params)
+        text = response.text
+        self.put(key, text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "bytes": self._bytes
+        }
+
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the shared LLM response cache, creating it on first use"""
+    global _cache
+
+    if _cache is None:
+        _cache = LLMResponseCache(
+            max_bytes=settings.llm_cache_max_bytes,
+            ttl_seconds=settings.llm_cache_ttl_seconds
+        )
+    return _cache
+
+
+async def generate_text(model, prompt: str, use_cache: bool = True, **params) -> str:
+    """Generate text through the shared cache (bypassed when disabled)"""
+    return await get_llm_cache().generate(
+        model, prompt, use_cache=use_cache and settings.llm_cache_enabled, **params
+    )
@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import random
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from config import settings
+from concurrency import run_blocking
+from database.db import SessionLocal
+from database.models import QuestionBankItem
+from vectorstore.store import ChunkFilter
+from vectorstore.topic_chunks import get_topic_chunks, topic_key
+from .agents import quiz_agent
+
+# Chunks a quiz is generated from (same as /quiz/generate)
+QUIZ_CHUNKS = 5
+
+
+def content_version(chunks: List[Dict[str, Any]]) -> str:
+    """Fingerprint of the chunks questions were generated from"""
+    ids = "\n".join(chunk['chunk_id'] for chunk in chunks)
+    return hashlib.sha1(ids.encode('utf-8')).hexdigest()
+
+
+def take_questions(
+    db: Session,
+    topic: str,
+    difficulty: str,
+    version: str,
+    count: int,
+    chunk_filter: Optional[ChunkFilter] = None
+) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+    """Remove `count` random questions from the pool.
+
+    Pools are kept per topic, difficulty and `chunk_filter` (the chunks
+    questions are generated from). Questions generated from other
+    content are dropped first. Each question is claimed by deleting its
+    row and checking the rowcount, so concurrent requests never serve
+    the same question; rows taken by another request are replaced from
+    the rest of the pool. Returns (questions or None if the pool is too
+    small, questions left).
+    """
+    key = topic_key(topic, chunk_filter)
+    pool = (QuestionBankItem.topic_key == key) & (QuestionBankItem.difficulty == difficulty)
+
+    db.execute(delete(QuestionBankItem).where(
+        pool & (QuestionBankItem.content_version != version)
+    ))
+
+    available = db.query(QuestionBankItem.id, QuestionBankItem.question).filter(pool).all()
+    if len(available) < count:
+        db.commit()
+        return None, len(available)
+
+    questions = []
+    for item_id, question in random.sample(available, len(available)):
+        claimed = db.execute(delete(QuestionBankItem).where(QuestionBankItem.id == item_id))
+        if claimed.rowcount == 1:
+            questions.append(question)
+            if len(questions) == count:
+                break
+
+    if len(questions) < count:
+        # Other requests claimed the rest; return ours to the pool
+        db.rollback()
+        return None, len(questions)
+    db.commit()
+
+    # IDs only need to be unique within one quiz
+    for number, question in enumerate(questions, 1):
+        question['question_id'] = f"{topic}_q{number}"
+
+    return questions, pool_size(db, topic, difficulty, version, chunk_filter)
+
+
+def pool_size(
+    db: Session,
+    topic: str,
+    difficulty: str,
+    version: str,
+    chunk_filter: Optional[ChunkFilter] = None
+) -> int:
+    return db.query(func.count(QuestionBankItem.id)).filter(
+        QuestionBankItem.topic_key == topic_key(topic, chunk_filter),
+        QuestionBankItem.difficulty == difficulty,
+        QuestionBankItem.content_version == version
+    ).scalar()
+
+
+def add_questions(
+    db: Session,
+    topic: str,
+    difficulty: str,
+    version: str,
+    questions: List[Dict[str, Any]],
+    chunk_filter: Optional[ChunkFilter] = None
+) -> int:
+    """Store gradable questions; returns how many were added"""
+    items = [
+        QuestionBankItem(
+            topic_key=topic_key(topic, chunk_filter),
+            topic=topic,
+            difficulty=difficulty,
+            content_version=version,
+            question=question
+        )
+        for question in questions
+        if question.get('options') and question.get('correct_answer')
+    ]
+    db.add_all(items)
+    db.commit()
+    return len(items)
+
+
+class QuestionBankWorker:
+    """Background workers that keep per-topic question pools filled.
+
+    Refills are requested when a quiz leaves a pool below
+    `question_pool_low` and after topics are mapped. Questions carry the
+    fingerprint of the chunks they were generated from, so a pool whose
+    topic mapping changed is discarded and regenerated.
+    """
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = concurrency or settings.question_pool_workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Set[Tuple[str, str]] = set()
+        self._stopping = False
+
+    async def start(self):
+        """Spawn refill workers"""
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        """Cancel workers; pending refills are dropped"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+
+    def request_refill(
+        self,
+        topic: str,
+        difficulty: str = "medium",
+        chunk_filter: Optional[ChunkFilter] = None
+    ):
+        """Queue a refill unless one is already pending for this pool"""
+        if self._queue is None or not settings.question_pool_enabled:
+            return
+
+        pool = (topic_key(topic, chunk_filter), difficulty)
+        if pool in self._pending:
+            return
+        self._pending.add(pool)
+        self._queue.put_nowait((topic, difficulty, chunk_filter))
+
+    async def _work(self):
+        # Cleanup errors can mask the cancellation, so stop() also sets a flag
+        while not self._stopping:
+            topic, difficulty, chunk_filter = await self._queue.get()
+            try:
+                await self.refill(topic, difficulty, chunk_filter)
+            except Exception as e:
+                print(f"❌ Question pool refill for {topic} ({difficulty}) failed: {e}")
+            finally:
+                self._pending.discard((topic_key(topic, chunk_filter), difficulty))
+                self._queue.task_done()
+
+    async def refill(self, topic: str, difficulty: str, chunk_filter: Optional[ChunkFilter] = None):
+        """Generate questions until the pool reaches its target size"""
+        db = SessionLocal()
+        try:
+            result = await get_topic_chunks(db, topic, limit=QUIZ_CHUNKS, chunk_filter=chunk_filter)
+            if not result['chunks_data']:
+                return
+
+            version = content_version(result['chunks_data'])
+            chunks_text = [c['text'] for c in result['chunks_data']]
+            size = await run_blocking(pool_size, db, topic, difficulty, version, chunk_filter)
+
+            while size < settings.question_pool_target:
+                # Fresh generations only; a cached response would repeat questions
+                questions = await quiz_agent.generate_quiz(
+                    topic=topic,
+                    chunks=chunks_text,
+                    num_questions=settings.question_pool_batch,
+                    difficulty=difficulty,
+                    use_cache=False
+                )
+                added = await run_blocking(
+                    add_questions, db, topic, difficulty, version, questions, chunk_filter
+                )
+                if not added:
+                    break
+                size += added
+        finally:
+            db.close()
+
+
+# Singleton instance
+question_bank_worker = QuestionBankWorker()
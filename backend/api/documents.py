@@ -1,81 +1,364 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Dict, Optional, Tuple
 import os
 import uuid
+import zipfile
 
-from models.schemas import DocumentUploadResponse
+from models.schemas import (
+    DocumentUploadResponse, IngestionJobStatus,
+    BatchUploadResponse, BatchIngestionStatus
+)
 from database.db import get_db
-from database.models import Document
-from ingestion.document_processor import document_processor
-from vectorstore.qdrant_client import add_chunks_to_vectorstore
+from database.models import Document, IngestionJob, Syllabus
+from ingestion.jobs import (
+    create_ingestion_job, describe_job, describe_batch, ingestion_worker
+)
+from ingestion.uploads import save_upload, extract_zip_member, UploadTooLarge
+from vectorstore.qdrant_client import delete_document_chunks
+from vectorstore.topic_chunks import invalidate_topic_chunks
+from concurrency import run_blocking
 from config import settings
 
 router = APIRouter()
 
+ALLOWED_EXTENSIONS = ['.pdf', '.docx', '.txt']
 
-@router.post("/upload", response_model=DocumentUploadResponse)
+# (document_id, filename, file_path, content_hash) of a file saved for a batch
+StagedFile = Tuple[str, str, str, str]
+
+
+def _find_duplicate(db: Session, user_id: int, content_hash: str, syllabus_id: Optional[str] = None):
+    """Existing document (and its latest job) with the same file contents.
+
+    Only documents whose chunks are searched for `syllabus_id` count: one
+    uploaded for all syllabi, or for this syllabus. A copy tied to another
+    syllabus is uploaded again, since its chunks are filtered out here.
+    """
+    scope = Document.syllabus_id.is_(None)
+    if syllabus_id is not None:
+        scope = or_(scope, Document.syllabus_id == syllabus_id)
+    
+    document = db.query(Document).filter(
+        Document.user_id == user_id,
+        Document.content_hash == content_hash,
+        scope
+    ).first()
+    
+    if not document:
+        return None
+    
+    job = db.query(IngestionJob).filter(
+        IngestionJob.document_id == document.id
+    ).order_by(IngestionJob.created_at.desc()).first()
+    
+    return document, job
+
+
+def _check_syllabus(db: Session, syllabus_id: Optional[str], user_id: int):
+    """404 unless the syllabus documents are uploaded for belongs to the user"""
+    if syllabus_id is None:
+        return
+    
+    exists = db.query(Syllabus.id).filter(
+        Syllabus.id == syllabus_id,
+        Syllabus.user_id == user_id
+    ).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Syllabus not found")
+
+
+@router.post("/upload", response_model=DocumentUploadResponse, status_code=202)
 async def upload_document(
+    response: Response,
     file: UploadFile = File(...),
     user_id: int = 1,  # TODO: Get from auth
+    syllabus_id: Optional[str] = None,  # restricts the document to one syllabus
     db: Session = Depends(get_db)
 ):
-    """Upload and process a document"""
+    """Upload a document and queue it for background processing"""
     
     # Validate file type
-    allowed_extensions = ['.pdf', '.docx', '.txt']
     file_ext = os.path.splitext(file.filename)[1].lower()
     
-    if file_ext not in allowed_extensions:
+    if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"File type {file_ext} not supported. Allowed: {allowed_extensions}"
+            detail=f"File type {file_ext} not supported. Allowed: {ALLOWED_EXTENSIONS}"
         )
     
+    await run_blocking(_check_syllabus, db, syllabus_id, user_id)
+    
     # Generate unique document ID
     doc_id = str(uuid.uuid4())
     
     # Save file
     file_path = os.path.join(settings.upload_dir, f"{doc_id}_{file.filename}")
     
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    try:
+        size, content_hash = await save_upload(file, file_path, settings.max_upload_size)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    # Identical file already uploaded: reuse its chunks
+    existing = await run_blocking(_find_duplicate, db, user_id, content_hash, syllabus_id)
+    if existing:
+        document, job = existing
+        os.remove(file_path)
+        response.status_code = 200
+        return DocumentUploadResponse(
+            document_id=document.id,
+            filename=document.filename,
+            chunks_created=document.chunks_count,
+            message="Identical document already uploaded. Reusing its chunks.",
+            job_id=job.id if job else None,
+            status="duplicate"
+        )
     
     try:
-        # Process document
-        chunks = document_processor.process_document(file_path, file.filename)
-        
-        # Add to vector store
-        chunks_added = await add_chunks_to_vectorstore(chunks)
-        
-        # Save to database
+        # Save document and its ingestion job
         document = Document(
             id=doc_id,
             filename=file.filename,
             file_path=file_path,
             user_id=user_id,
-            chunks_count=chunks_added
+            syllabus_id=syllabus_id,
+            chunks_count=0,
+            content_hash=content_hash
         )
         db.add(document)
-        db.commit()
-        
-        return DocumentUploadResponse(
-            document_id=doc_id,
-            filename=file.filename,
-            chunks_created=chunks_added,
-            message=f"Document processed successfully. {chunks_added} chunks created."
-        )
+        job = create_ingestion_job(db, document)
+        await run_blocking(db.commit)
     
     except Exception as e:
         # Clean up on error
         if os.path.exists(file_path):
             os.remove(file_path)
         raise HTTPException(status_code=500, detail=str(e))
+    
+    ingestion_worker.submit(job.id)
+    
+    return DocumentUploadResponse(
+        document_id=doc_id,
+        filename=file.filename,
+        chunks_created=0,
+        message="Document uploaded. Processing in the background.",
+        job_id=job.id,
+        status=job.status
+    )
+
+
+def _batch_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Batch exceeds {settings.max_batch_files} files")
+
+
+def _extract_zip(zip_path: str, max_files: int) -> Tuple[List[StagedFile], List[Dict[str, str]]]:
+    """Extract supported files from an uploaded archive into upload_dir.
+
+    The member count (against `max_files`, what the batch has room for)
+    and the declared total size are checked before anything is written;
+    the bytes actually extracted are bounded by the same total.
+    """
+    staged, rejected = [], []
+    budget = settings.max_batch_upload_size
+    
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if len(members) > max_files:
+                raise _batch_too_large()
+            if sum(info.file_size for info in members) > settings.max_batch_upload_size:
+                rejected.append({
+                    "filename": os.path.basename(zip_path),
+                    "reason": f"Archive contents exceed {settings.max_batch_upload_size} bytes"
+                })
+                return staged, rejected
+            
+            for info in members:
+                filename = os.path.basename(info.filename)
+                if os.path.splitext(filename)[1].lower() not in ALLOWED_EXTENSIONS:
+                    rejected.append({"filename": info.filename, "reason": "Unsupported file type"})
+                    continue
+                
+                doc_id = str(uuid.uuid4())
+                file_path = os.path.join(settings.upload_dir, f"{doc_id}_{filename}")
+                try:
+                    size, content_hash = extract_zip_member(
+                        archive, info, file_path, min(settings.max_upload_size, budget)
+                    )
+                except UploadTooLarge as e:
+                    rejected.append({"filename": info.filename, "reason": str(e)})
+                    continue
+                
+                budget -= size
+                staged.append((doc_id, filename, file_path, content_hash))
+    except zipfile.BadZipFile:
+        rejected.append({"filename": os.path.basename(zip_path), "reason": "Invalid zip archive"})
+    finally:
+        os.remove(zip_path)
+    
+    return staged, rejected
+
+
+def _register_batch(
+    db: Session,
+    staged: List[StagedFile],
+    user_id: int,
+    batch_id: str,
+    syllabus_id: Optional[str] = None
+) -> Tuple[List[DocumentUploadResponse], List[str], int]:
+    """Create documents and jobs for staged files, skipping duplicates"""
+    responses, job_ids = [], []
+    duplicates = 0
+    seen_hashes = {}
+    
+    for doc_id, filename, file_path, content_hash in staged:
+        existing = _find_duplicate(db, user_id, content_hash, syllabus_id)
+        if existing or content_hash in seen_hashes:
+            document = existing[0] if existing else seen_hashes[content_hash]
+            os.remove(file_path)
+            duplicates += 1
+            responses.append(DocumentUploadResponse(
+                document_id=document.id,
+                filename=filename,
+                chunks_created=document.chunks_count or 0,
+                message="Identical document already uploaded. Reusing its chunks.",
+                status="duplicate"
+            ))
+            continue
+        
+        document = Document(
+            id=doc_id,
+            filename=filename,
+            file_path=file_path,
+            user_id=user_id,
+            syllabus_id=syllabus_id,
+            chunks_count=0,
+            content_hash=content_hash
+        )
+        db.add(document)
+        job = create_ingestion_job(db, document, batch_id=batch_id)
+        seen_hashes[content_hash] = document
+        job_ids.append(job.id)
+        responses.append(DocumentUploadResponse(
+            document_id=doc_id,
+            filename=filename,
+            chunks_created=0,
+            message="Document uploaded. Processing in the background.",
+            job_id=job.id,
+            status="queued"
+        ))
+    
+    db.commit()
+    return responses, job_ids, duplicates
+
+
+@router.post("/upload/batch", response_model=BatchUploadResponse, status_code=202)
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    user_id: int = 1,  # TODO: Get from auth
+    syllabus_id: Optional[str] = None,  # restricts the documents to one syllabus
+    db: Session = Depends(get_db)
+):
+    """Upload many documents (or zip archives of them) as one ingestion batch"""
+    await run_blocking(_check_syllabus, db, syllabus_id, user_id)
+    batch_id = str(uuid.uuid4())
+    staged: List[StagedFile] = []
+    rejected: List[Dict[str, str]] = []
+    
+    try:
+        for file in files:
+            file_ext = os.path.splitext(file.filename)[1].lower()
+            
+            if file_ext == '.zip':
+                zip_path = os.path.join(settings.upload_dir, f"{batch_id}_{os.path.basename(file.filename)}")
+                try:
+                    await save_upload(file, zip_path, settings.max_batch_upload_size)
+                except UploadTooLarge as e:
+                    rejected.append({"filename": file.filename, "reason": str(e)})
+                    continue
+                
+                extracted, skipped = await run_blocking(
+                    _extract_zip, zip_path, settings.max_batch_files - len(staged)
+                )
+                staged.extend(extracted)
+                rejected.extend(skipped)
+            
+            elif file_ext in ALLOWED_EXTENSIONS:
+                doc_id = str(uuid.uuid4())
+                file_path = os.path.join(settings.upload_dir, f"{doc_id}_{file.filename}")
+                try:
+                    _, content_hash = await save_upload(file, file_path, settings.max_upload_size)
+                except UploadTooLarge as e:
+                    rejected.append({"filename": file.filename, "reason": str(e)})
+                    continue
+                
+                staged.append((doc_id, file.filename, file_path, content_hash))
+            
+            else:
+                rejected.append({"filename": file.filename, "reason": "Unsupported file type"})
+            
+            if len(staged) > settings.max_batch_files:
+                raise _batch_too_large()
+        
+        responses, job_ids, duplicates = await run_blocking(
+            _register_batch, db, staged, user_id, batch_id, syllabus_id
+        )
+    
+    except Exception as e:
+        # Clean up everything staged so far
+        for _, _, file_path, _ in staged:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if job_ids:
+        ingestion_worker.submit_batch(job_ids)
+    
+    return BatchUploadResponse(
+        batch_id=batch_id,
+        jobs=responses,
+        files_queued=len(job_ids),
+        duplicates=duplicates,
+        rejected=rejected
+    )
+
+
+@router.get("/batches/{batch_id}", response_model=BatchIngestionStatus)
+def get_ingestion_batch(
+    batch_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get aggregate progress and throughput (pages/s, chunks/s) of a batch"""
+    jobs = db.query(IngestionJob).filter(
+        IngestionJob.batch_id == batch_id
+    ).order_by(IngestionJob.created_at).all()
+    
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return BatchIngestionStatus(**describe_batch(batch_id, jobs))
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobStatus)
+def get_ingestion_job(
+    job_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get status and per-stage progress of an ingestion job"""
+    job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return IngestionJobStatus(**describe_job(job))
 
 
 @router.get("/list")
-async def list_documents(
+def list_documents(
     user_id: int = 1,  # TODO: Get from auth
     db: Session = Depends(get_db)
 ):
@@ -88,7 +371,8 @@ async def list_documents(
                 "id": doc.id,
                 "filename": doc.filename,
                 "upload_date": doc.upload_date,
-                "chunks_count": doc.chunks_count
+                "chunks_count": doc.chunks_count,
+                "syllabus_id": doc.syllabus_id
             }
             for doc in documents
         ]
@@ -100,18 +384,44 @@ async def delete_document(
     document_id: str,
     db: Session = Depends(get_db)
 ):
-    """Delete a document"""
-    document = db.query(Document).filter(Document.id == document_id).first()
+    """Delete a document and its stored chunks"""
+    document = await run_blocking(
+        lambda: db.query(Document).filter(Document.id == document_id).first()
+    )
     
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
+    # A running job would keep storing chunks for the deleted document
+    ingesting = await run_blocking(
+        lambda: db.query(IngestionJob.id).filter(
+            IngestionJob.document_id == document_id,
+            IngestionJob.status.in_(["queued", "running"])
+        ).first()
+    )
+    if ingesting:
+        raise HTTPException(
+            status_code=409,
+            detail="Document is still being ingested. Delete it once its job has finished."
+        )
+    
+    # Delete vectors first, so a failure leaves the document to retry with
+    await delete_document_chunks(document_id)
+    
     # Delete file
     if os.path.exists(document.file_path):
         os.remove(document.file_path)
     
     # Delete from database
-    db.delete(document)
-    db.commit()
+    def delete_record():
+        # Finished jobs stay as history, without the reference
+        db.query(IngestionJob).filter(IngestionJob.document_id == document_id).update(
+            {IngestionJob.document_id: None}, synchronize_session=False
+        )
+        db.delete(document)
+        invalidate_topic_chunks(db, document.user_id)
+        db.commit()
+    
+    await run_blocking(delete_record)
     
     return {"message": "Document deleted successfully"}
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from typing import List, Dict, Any
+import json
 import uuid
 
 from models.schemas import (
     LessonPlan, LessonPlanItem,
     TeachingRequest, TeachingResponse
 )
-from database.db import get_db
-from database.models import Topic, SessionHistory
-from vectorstore.qdrant_client import get_chunks_for_topic
+from database.db import get_db, SessionLocal
+from database.models import Syllabus, Topic, SessionHistory
+from vectorstore.store import ChunkFilter
+from vectorstore.topic_chunks import get_topic_chunks, get_topics_chunks
 from agents.agents import planner_agent, teaching_agent
+from concurrency import run_blocking
 
 router = APIRouter()
 
@@ -22,18 +27,27 @@ async def create_lesson_plan(
     """Create a lesson plan for a syllabus"""
     
     # Get all topics
-    topics = db.query(Topic).filter(Topic.syllabus_id == syllabus_id).all()
+    topics = await run_blocking(
+        lambda: db.query(Topic).filter(Topic.syllabus_id == syllabus_id).all()
+    )
     
     if not topics:
         raise HTTPException(status_code=404, detail="No topics found for this syllabus")
     
-    # Get context for each topic
+    owner_id = await run_blocking(
+        lambda: db.query(Syllabus.user_id).filter(Syllabus.id == syllabus_id).scalar()
+    )
+    
+    # Get context for each topic from the stored mappings (same scope as /syllabus/map)
     topic_names = [t.name for t in topics]
     context_chunks = {}
     
-    for topic in topics:
-        result = await get_chunks_for_topic(topic.name, limit=3)
-        context_chunks[topic.name] = [c['chunk_id'] for c in result['chunks_data']]
+    results = await get_topics_chunks(
+        db, topic_names, limit=3,
+        chunk_filter=ChunkFilter(user_id=owner_id, syllabus_id=syllabus_id)
+    )
+    for name, result in zip(topic_names, results):
+        context_chunks[name] = [c['chunk_id'] for c in result['chunks_data']]
     
     # Generate lesson plan
     lessons = await planner_agent.create_lesson_plan(topic_names, context_chunks)
@@ -52,6 +66,40 @@ async def create_lesson_plan(
     )
 
 
+async def _teaching_chunks(db: Session, request: TeachingRequest, user_id: int) -> List[str]:
+    """Texts of the chunks a teaching response is grounded in"""
+    # Get relevant chunks of the user's documents, in the scope /syllabus/map
+    # stores when a syllabus is given (stored mapping, searched on a miss)
+    chunk_filter = ChunkFilter(user_id=user_id, syllabus_id=request.syllabus_id)
+    result = await get_topic_chunks(db, request.topic, limit=5, chunk_filter=chunk_filter)
+    
+    if not result['chunks_data']:
+        raise HTTPException(
+            status_code=404,
+            detail="No content found for this topic. Please upload relevant documents."
+        )
+    
+    return [c['text'] for c in result['chunks_data']]
+
+
+def _save_history(db: Session, session_id: str, user_id: int, request: TeachingRequest):
+    """Record the student's message of a teaching turn"""
+    history = SessionHistory(
+        session_id=session_id,
+        user_id=user_id,
+        topic=request.topic,
+        question=request.user_message,
+        student_answer=""  # Updated when student responds
+    )
+    db.add(history)
+    db.commit()
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/teach", response_model=TeachingResponse)
 async def teach_topic(
     request: TeachingRequest,
@@ -60,16 +108,7 @@ async def teach_topic(
 ):
     """Interactive teaching session"""
     
-    # Get relevant chunks for topic
-    result = await get_chunks_for_topic(request.topic, limit=5)
-    
-    if not result['chunks_data']:
-        raise HTTPException(
-            status_code=404,
-            detail="No content found for this topic. Please upload relevant documents."
-        )
-    
-    chunks_text = [c['text'] for c in result['chunks_data']]
+    chunks_text = await _teaching_chunks(db, request, user_id)
     
     # Generate session ID if new session
     session_id = request.session_id or str(uuid.uuid4())
@@ -83,15 +122,7 @@ async def teach_topic(
     
     # Save to history
     if request.user_message:
-        history = SessionHistory(
-            session_id=session_id,
-            user_id=user_id,
-            topic=request.topic,
-            question=request.user_message,
-            student_answer=""  # Updated when student responds
-        )
-        db.add(history)
-        db.commit()
+        await run_blocking(_save_history, db, session_id, user_id, request)
     
     return TeachingResponse(
         session_id=session_id,
@@ -100,8 +131,62 @@ async def teach_topic(
     )
 
 
+@router.post("/teach/stream")
+async def teach_topic_stream(
+    request: TeachingRequest,
+    user_id: int = 1,  # TODO: Get from auth
+    db: Session = Depends(get_db)
+):
+    """Interactive teaching session streamed as Server-Sent Events.
+    
+    Sends a `token` event per generated text fragment, then one `done`
+    event carrying the session ID and follow-up question (or `error`).
+    History is saved once the stream has finished.
+    """
+    
+    chunks_text = await _teaching_chunks(db, request, user_id)
+    
+    # Generate session ID if new session
+    session_id = request.session_id or str(uuid.uuid4())
+    
+    async def events():
+        parts = []
+        try:
+            async for text in teaching_agent.stream_topic(
+                topic=request.topic,
+                chunks=chunks_text,
+                user_message=request.user_message
+            ):
+                parts.append(text)
+                yield _sse("token", {"text": text})
+            
+            message = "".join(parts)
+            
+            # The request's session may already be closed while streaming
+            if request.user_message:
+                history_db = SessionLocal()
+                try:
+                    await run_blocking(_save_history, history_db, session_id, user_id, request)
+                finally:
+                    history_db.close()
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        
+        yield _sse("done", {
+            "session_id": session_id,
+            "follow_up_question": teaching_agent.extract_follow_up(message)
+        })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/session/{session_id}")
-async def get_session_history(
+def get_session_history(
     session_id: str,
     db: Session = Depends(get_db)
 ):
@@ -1,28 +1,61 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import IntegrityError
 
-from models.schemas import ProgressStats, TopicMastery, StudyPlan
+from models.schemas import ProgressStats, TopicMastery, StudyPlan, StudyPlanSchedule
 from database.db import get_db
-from database.models import UserTopicMastery, Topic
+from database.models import UserTopicMastery, UserProgressSummary, Topic, Syllabus
+from database.progress_summary import rebuild_progress_summary, bucket_count, COMPLETED_SCORE
+from study_planner import build_study_plan
 from datetime import datetime
+from typing import Optional
 
 router = APIRouter()
 
 
+def _mastery_with_topics(db: Session, user_id: int):
+    """(mastery, topic name) rows of a user, joined in one query"""
+    return db.query(UserTopicMastery, Topic.name).join(
+        Topic, Topic.id == UserTopicMastery.topic_id
+    ).filter(UserTopicMastery.user_id == user_id)
+
+
 @router.get("/stats", response_model=ProgressStats)
-async def get_progress_stats(
+def get_progress_stats(
     user_id: int = 1,  # TODO: Get from auth
     db: Session = Depends(get_db)
 ):
     """Get user's overall progress statistics"""
     
-    # Get all mastery records
-    mastery_records = db.query(UserTopicMastery).filter(
-        UserTopicMastery.user_id == user_id
-    ).all()
-    
-    if not mastery_records:
+    # Topics of the user's syllabi plus any other topic they practiced
+    practiced_ids = select(UserTopicMastery.topic_id).where(UserTopicMastery.user_id == user_id)
+    total_topics = select(func.count(Topic.id)).outerjoin(
+        Syllabus, Syllabus.id == Topic.syllabus_id
+    ).where(
+        or_(Syllabus.user_id == user_id, Topic.id.in_(practiced_ids))
+    ).scalar_subquery()
+    
+    # The summary is maintained by quiz submissions, so this is one row
+    row = db.query(UserProgressSummary, total_topics).filter(
+        UserProgressSummary.user_id == user_id
+    ).first()
+    
+    if row is None:
+        # Users who practiced before summaries existed get one built now
+        summary = rebuild_progress_summary(db, user_id)
+        if summary is not None:
+            try:
+                db.commit()
+            except IntegrityError:
+                # A concurrent request built it first
+                db.rollback()
+                summary = db.query(UserProgressSummary).filter(
+                    UserProgressSummary.user_id == user_id
+                ).first()
+            row = (summary, db.scalar(select(total_topics)))
+    
+    if row is None:
         return ProgressStats(
             user_id=str(user_id),
             topics_completed=0,
@@ -33,134 +66,86 @@ async def get_progress_stats(
             last_activity=None
         )
     
-    # Calculate statistics
-    total_topics = db.query(Topic).count()
-    topics_completed = len([m for m in mastery_records if m.score >= 70])
-    average_score = sum(m.score for m in mastery_records) / len(mastery_records)
-    
-    # Identify weak and strong areas
-    weak_areas = []
-    strong_areas = []
-    
-    for mastery in mastery_records:
-        topic = db.query(Topic).filter(Topic.id == mastery.topic_id).first()
-        if topic:
-            if mastery.score < 60:
-                weak_areas.append(topic.name)
-            elif mastery.score >= 80:
-                strong_areas.append(topic.name)
-    
-    # Get last activity
-    last_activity = max(m.last_practiced for m in mastery_records) if mastery_records else None
+    summary, topic_count = row
     
     return ProgressStats(
         user_id=str(user_id),
-        topics_completed=topics_completed,
-        total_topics=total_topics,
-        average_score=round(average_score, 2),
-        weak_areas=weak_areas[:5],  # Top 5
-        strong_areas=strong_areas[:5],  # Top 5
-        last_activity=last_activity
+        topics_completed=bucket_count(summary, COMPLETED_SCORE),
+        total_topics=topic_count,
+        average_score=round(summary.score_sum / summary.topics_practiced, 2),
+        weak_areas=[entry['name'] for entry in summary.weak_topics or []],
+        strong_areas=[entry['name'] for entry in summary.strong_topics or []],
+        last_activity=summary.last_activity
     )
 
 
 @router.get("/topics", response_model=list[TopicMastery])
-async def get_topic_mastery(
+def get_topic_mastery(
     user_id: int = 1,  # TODO: Get from auth
     db: Session = Depends(get_db)
 ):
     """Get mastery level for all topics"""
     
-    mastery_records = db.query(UserTopicMastery).filter(
-        UserTopicMastery.user_id == user_id
-    ).all()
-    
-    result = []
-    for mastery in mastery_records:
-        topic = db.query(Topic).filter(Topic.id == mastery.topic_id).first()
-        if topic:
-            result.append(TopicMastery(
-                topic=topic.name,
-                score=mastery.score,
-                attempts=mastery.attempts,
-                last_practiced=mastery.last_practiced,
-                next_revision=mastery.next_revision
-            ))
-    
-    return result
+    return [
+        TopicMastery(
+            topic=name,
+            score=mastery.score,
+            attempts=mastery.attempts,
+            last_practiced=mastery.last_practiced,
+            next_revision=mastery.next_revision
+        )
+        for mastery, name in _mastery_with_topics(db, user_id).order_by(UserTopicMastery.id)
+    ]
 
 
 @router.get("/study-plan", response_model=StudyPlan)
-async def get_study_plan(
+def get_study_plan(
     user_id: int = 1,  # TODO: Get from auth
     db: Session = Depends(get_db)
 ):
     """Generate a weekly study plan"""
     
-    # Get all topics with mastery
-    mastery_records = db.query(UserTopicMastery).filter(
-        UserTopicMastery.user_id == user_id
-    ).all()
-    
-    # Get all topics
-    all_topics = db.query(Topic).all()
-    
-    # Topics not yet studied
-    studied_topic_ids = [m.topic_id for m in mastery_records]
-    topics_to_study = [
-        t.name for t in all_topics 
-        if t.id not in studied_topic_ids
-    ][:5]  # Top 5 new topics
-    
-    # Topics needing revision (low score or due for revision)
-    topics_to_revise = []
-    now = datetime.now()
-    
-    for mastery in mastery_records:
-        topic = db.query(Topic).filter(Topic.id == mastery.topic_id).first()
-        if topic:
-            needs_revision = (
-                mastery.score < 70 or
-                (mastery.next_revision and mastery.next_revision <= now)
-            )
-            if needs_revision:
-                topics_to_revise.append(topic.name)
-    
-    # Estimate hours (rough calculation)
-    estimated_hours = len(topics_to_study) * 2 + len(topics_to_revise) * 1
+    plan = build_study_plan(db, user_id, weeks=1)
+    return StudyPlan(**plan["weeks"][0])
+
+
+@router.get("/study-plan/schedule", response_model=StudyPlanSchedule)
+def get_study_plan_schedule(
+    user_id: int = 1,  # TODO: Get from auth
+    weeks: int = Query(4, ge=1, le=52),
+    hours_per_week: Optional[float] = Query(None, gt=0),
+    db: Session = Depends(get_db)
+):
+    """Generate a multi-week study plan within a weekly time budget"""
     
-    return StudyPlan(
-        week_number=1,  # Could be calculated based on start date
-        topics_to_study=topics_to_study,
-        topics_to_revise=topics_to_revise[:5],  # Top 5
-        estimated_hours=float(estimated_hours)
-    )
+    return StudyPlanSchedule(**build_study_plan(db, user_id, weeks, hours_per_week))
 
 
 @router.get("/revision-due")
-async def get_revision_due(
+def get_revision_due(
     user_id: int = 1,  # TODO: Get from auth
+    limit: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Get topics due for revision"""
+    """Get topics due for revision, most overdue first"""
     
     now = datetime.now()
     
-    mastery_records = db.query(UserTopicMastery).filter(
-        UserTopicMastery.user_id == user_id,
+    # Served by the (user_id, next_revision) index in order
+    rows = _mastery_with_topics(db, user_id).filter(
         UserTopicMastery.next_revision <= now
-    ).all()
-    
-    topics_due = []
-    for mastery in mastery_records:
-        topic = db.query(Topic).filter(Topic.id == mastery.topic_id).first()
-        if topic:
-            topics_due.append({
-                "topic": topic.name,
-                "last_practiced": mastery.last_practiced,
-                "score": mastery.score,
-                "next_revision": mastery.next_revision
-            })
+    ).order_by(UserTopicMastery.next_revision).limit(limit)
+    
+    topics_due = [
+        {
+            "topic": name,
+            "last_practiced": mastery.last_practiced,
+            "score": mastery.score,
+            "next_revision": mastery.next_revision,
+            "interval_days": mastery.interval_days
+        }
+        for mastery, name in rows
+    ]
     
     return {
         "topics_due": topics_due,
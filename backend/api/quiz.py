@@ -8,9 +8,17 @@ from models.schemas import (
 )
 from database.db import get_db
 from database.models import Quiz, QuizAttempt, UserTopicMastery, Topic
-from vectorstore.qdrant_client import get_chunks_for_topic
+from database.progress_summary import update_progress_summary
+from spaced_repetition import schedule_review
+from vectorstore.store import ChunkFilter
+from vectorstore.topic_chunks import get_topic_chunks
 from agents.agents import quiz_agent, evaluation_agent
-from datetime import datetime, timedelta
+from agents.question_bank import (
+    question_bank_worker, take_questions, content_version, QUIZ_CHUNKS
+)
+from config import settings
+from concurrency import run_blocking
+from datetime import datetime
 
 router = APIRouter()
 
@@ -18,12 +26,15 @@ router = APIRouter()
 @router.post("/generate", response_model=QuizGenerateResponse)
 async def generate_quiz(
     request: QuizGenerateRequest,
+    user_id: int = 1,  # TODO: Get from auth
     db: Session = Depends(get_db)
 ):
     """Generate a quiz for a topic"""
     
-    # Get relevant chunks
-    result = await get_chunks_for_topic(request.topic, limit=5)
+    # Get relevant chunks of the user's documents, in the scope /syllabus/map
+    # stores when a syllabus is given (stored mapping, searched on a miss)
+    chunk_filter = ChunkFilter(user_id=user_id, syllabus_id=request.syllabus_id)
+    result = await get_topic_chunks(db, request.topic, limit=QUIZ_CHUNKS, chunk_filter=chunk_filter)
     
     if not result['chunks_data']:
         raise HTTPException(
@@ -33,13 +44,24 @@ async def generate_quiz(
     
     chunks_text = [c['text'] for c in result['chunks_data']]
     
-    # Generate questions
-    questions = await quiz_agent.generate_quiz(
-        topic=request.topic,
-        chunks=chunks_text,
-        num_questions=request.num_questions,
-        difficulty=request.difficulty
-    )
+    # Serve from the pre-generated pool when it has enough questions
+    questions = None
+    if settings.question_pool_enabled:
+        questions, remaining = await run_blocking(
+            take_questions, db, request.topic, request.difficulty,
+            content_version(result['chunks_data']), request.num_questions, chunk_filter
+        )
+        if remaining < settings.question_pool_low:
+            question_bank_worker.request_refill(request.topic, request.difficulty, chunk_filter)
+    
+    if questions is None:
+        # Generate questions
+        questions = await quiz_agent.generate_quiz(
+            topic=request.topic,
+            chunks=chunks_text,
+            num_questions=request.num_questions,
+            difficulty=request.difficulty
+        )
     
     # Create quiz ID
     quiz_id = str(uuid.uuid4())
@@ -48,10 +70,11 @@ async def generate_quiz(
     quiz = Quiz(
         id=quiz_id,
         topic=request.topic,
-        questions_count=len(questions)
+        questions_count=len(questions),
+        questions=questions
     )
     db.add(quiz)
-    db.commit()
+    await run_blocking(db.commit)
     
     return QuizGenerateResponse(
         quiz_id=quiz_id,
@@ -60,65 +83,41 @@ async def generate_quiz(
     )
 
 
-@router.post("/submit", response_model=QuizResult)
-async def submit_quiz(
-    submission: QuizSubmission,
-    user_id: int = 1,  # TODO: Get from auth
-    db: Session = Depends(get_db)
+def _record_attempt(
+    db: Session,
+    quiz: Quiz,
+    user_id: int,
+    score: float,
+    total_questions: int,
+    correct_count: int
 ):
-    """Submit and evaluate quiz answers"""
-    
-    # Get quiz
-    quiz = db.query(Quiz).filter(Quiz.id == submission.quiz_id).first()
-    
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
-    
-    # In a real app, we'd store questions and retrieve them here
-    # For now, we'll evaluate based on submission
-    
-    results = []
-    correct_count = 0
-    
-    for question_id, answer in submission.answers.items():
-        # Placeholder evaluation - in production, retrieve and compare
-        is_correct = True  # This should be actual evaluation
-        if is_correct:
-            correct_count += 1
-        
-        results.append({
-            "question_id": question_id,
-            "is_correct": is_correct,
-            "score": 1.0 if is_correct else 0.0
-        })
-    
-    total_questions = len(submission.answers)
-    score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
-    
-    # Save attempt
+    """Save the attempt and update topic mastery and the progress summary"""
+    now = datetime.now()
     attempt = QuizAttempt(
-        quiz_id=submission.quiz_id,
+        quiz_id=quiz.id,
         user_id=user_id,
         score=score,
         total_questions=total_questions,
-        correct_answers=correct_count
+        correct_answers=correct_count,
+        attempted_at=now
     )
     db.add(attempt)
     
     # Update topic mastery
     topic = db.query(Topic).filter(Topic.name == quiz.topic).first()
     if topic:
+        # Locked, so concurrent submissions see each other's scores
         mastery = db.query(UserTopicMastery).filter(
             UserTopicMastery.user_id == user_id,
             UserTopicMastery.topic_id == topic.id
-        ).first()
+        ).with_for_update().first()
         
+        old_score = mastery.score if mastery else None
         if mastery:
             # Update existing mastery
             mastery.score = (mastery.score + score) / 2  # Average
             mastery.attempts += 1
-            mastery.last_practiced = datetime.now()
-            mastery.next_revision = datetime.now() + timedelta(days=7)
+            mastery.last_practiced = now
         else:
             # Create new mastery record
             mastery = UserTopicMastery(
@@ -126,20 +125,72 @@ async def submit_quiz(
                 topic_id=topic.id,
                 score=score,
                 attempts=1,
-                last_practiced=datetime.now(),
-                next_revision=datetime.now() + timedelta(days=7)
+                last_practiced=now
             )
             db.add(mastery)
+        
+        # Next revision from this quiz's score (SM-2)
+        schedule_review(mastery, score, now)
+        
+        update_progress_summary(db, user_id, topic, old_score, mastery.score, now)
     
     db.commit()
+
+
+@router.post("/submit", response_model=QuizResult)
+async def submit_quiz(
+    submission: QuizSubmission,
+    user_id: int = 1,  # TODO: Get from auth
+    db: Session = Depends(get_db)
+):
+    """Submit and evaluate quiz answers"""
+    
+    # Get quiz
+    quiz = await run_blocking(
+        lambda: db.query(Quiz).filter(Quiz.id == submission.quiz_id).first()
+    )
+    
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    
+    if quiz.questions is None:
+        raise HTTPException(
+            status_code=409,
+            detail="This quiz was created without stored questions. Please generate a new quiz."
+        )
+    
+    # Grade locally against the stored answers
+    results = quiz_agent.grade_answers(quiz.questions, submission.answers)
+    
+    total_questions = len(results)
+    correct_count = sum(1 for r in results if r['is_correct'])
+    score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
+    
+    await run_blocking(_record_attempt, db, quiz, user_id, score, total_questions, correct_count)
+    
+    # One model call explains every wrong answer; the stored explanation
+    # is used if it fails or skips a question
+    mistakes = [r for r in results if not r['is_correct']]
+    try:
+        explanations = await quiz_agent.explain_mistakes(mistakes)
+    except Exception as e:
+        print(f"⚠️ Quiz feedback generation failed: {e}")
+        explanations = {}
     
     # Get feedback
     feedback = []
     for result in results:
+        if result['is_correct']:
+            message = "Correct!"
+        else:
+            message = explanations.get(result['question_id']) or \
+                result['explanation'] or "Incorrect. Review this topic."
+        
         feedback.append({
             "question_id": result['question_id'],
             "is_correct": result['is_correct'],
-            "feedback": "Correct!" if result['is_correct'] else "Incorrect. Review this topic."
+            "correct_answer": result['correct_answer'],
+            "feedback": message
         })
     
     return QuizResult(
@@ -152,7 +203,7 @@ async def submit_quiz(
 
 
 @router.get("/history")
-async def get_quiz_history(
+def get_quiz_history(
     user_id: int = 1,  # TODO: Get from auth
     db: Session = Depends(get_db)
 ):
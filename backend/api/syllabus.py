@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import update, case
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
@@ -10,13 +11,18 @@ from models.schemas import (
 from database.db import get_db
 from database.models import Syllabus, Topic
 from ingestion.syllabus_parser import syllabus_parser
-from vectorstore.qdrant_client import get_chunks_for_topic
+from vectorstore.qdrant_client import get_chunks_for_topics
+from vectorstore.store import ChunkFilter
+from vectorstore.topic_chunks import save_topic_chunks
+from agents.question_bank import question_bank_worker
+from config import settings
+from concurrency import run_blocking
 
 router = APIRouter()
 
 
 @router.post("/parse", response_model=SyllabusParseResponse)
-async def parse_syllabus(
+def parse_syllabus(
     syllabus_input: SyllabusInput,
     user_id: int = 1,  # TODO: Get from auth
     db: Session = Depends(get_db)
@@ -69,19 +75,30 @@ async def map_topics_to_content(
     """Map syllabus topics to document content"""
     
     # Get syllabus and topics
-    syllabus = db.query(Syllabus).filter(Syllabus.id == syllabus_id).first()
+    syllabus = await run_blocking(
+        lambda: db.query(Syllabus).filter(Syllabus.id == syllabus_id).first()
+    )
     if not syllabus:
         raise HTTPException(status_code=404, detail="Syllabus not found")
     
-    topics = db.query(Topic).filter(Topic.syllabus_id == syllabus_id).all()
+    topics = await run_blocking(
+        lambda: db.query(Topic.topic_id, Topic.name).filter(
+            Topic.syllabus_id == syllabus_id
+        ).order_by(Topic.id).all()
+    )
+    
+    # Embed all topic names in batches and search them in one request,
+    # among the owner's documents for this syllabus or for no syllabus
+    chunk_filter = ChunkFilter(user_id=syllabus.user_id, syllabus_id=syllabus_id)
+    results = await get_chunks_for_topics(
+        [topic.name for topic in topics], limit=settings.topic_chunks_limit, chunk_filter=chunk_filter
+    )
     
     mappings = []
     topics_needing_content = []
+    sufficient_ids = []
     
-    for topic in topics:
-        # Get relevant chunks from vector store
-        result = await get_chunks_for_topic(topic.name)
-        
+    for topic, result in zip(topics, results):
         mapping = TopicMapping(
             topic=topic.name,
             relevant_chunks=result['relevant_chunks'],
@@ -90,13 +107,33 @@ async def map_topics_to_content(
         )
         mappings.append(mapping)
         
-        # Update topic in database
-        topic.has_sufficient_content = result['has_sufficient_content']
-        
-        if not result['has_sufficient_content']:
+        if result['has_sufficient_content']:
+            sufficient_ids.append(topic.topic_id)
+        else:
             topics_needing_content.append(topic.name)
     
-    db.commit()
+    # Update every topic of the syllabus in one statement and keep the
+    # ranked chunks for lessons and quizzes
+    def save_mapping():
+        db.execute(
+            update(Topic)
+            .where(Topic.syllabus_id == syllabus_id)
+            .values(has_sufficient_content=case(
+                (Topic.topic_id.in_(sufficient_ids), True),
+                else_=False
+            ))
+        )
+        save_topic_chunks(db, results, chunk_filter)
+        db.commit()
+    
+    await run_blocking(save_mapping)
+    
+    # Pre-generate quiz questions for topics with enough material, in the
+    # scope /quiz/generate draws from for this syllabus; the refills read
+    # the mappings just stored
+    for mapping in mappings:
+        if mapping.has_sufficient_content:
+            question_bank_worker.request_refill(mapping.topic, chunk_filter=chunk_filter)
     
     return MappingResponse(
         mappings=mappings,
@@ -106,7 +143,7 @@ async def map_topics_to_content(
 
 
 @router.get("/list")
-async def list_syllabi(
+def list_syllabi(
     user_id: int = 1,  # TODO: Get from auth
     db: Session = Depends(get_db)
 ):
@@ -127,7 +164,7 @@ async def list_syllabi(
 
 
 @router.get("/{syllabus_id}/topics")
-async def get_syllabus_topics(
+def get_syllabus_topics(
     syllabus_id: str,
     db: Session = Depends(get_db)
 ):
@@ -0,0 +1,123 @@
+"""
+Chunk ownership backfill script
+Writes user_id and syllabus_id into the vector store payloads of every
+document's chunks. Chunks stored before retrieval was filtered by owner
+lack them and are not found by searches until this has run. Chunks
+stored before they carried a document_id are matched to their document
+by filename (their `source`). Stored topic mappings are dropped so they
+are searched again with the filters.
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from database.db import SessionLocal, init_db
+from database.models import Document
+from vectorstore import qdrant_client as store
+from vectorstore.lexical import LexicalIndex
+from vectorstore.store import ChunkFilter, VectorStore
+from vectorstore.topic_chunks import invalidate_topic_chunks
+
+# (document id, filename, user id, syllabus id)
+DocumentRow = Tuple[str, str, Optional[int], Optional[str]]
+
+
+async def backfill_legacy_chunks(
+    documents: List[DocumentRow],
+    vector_store: VectorStore,
+    lexical_index: Optional[LexicalIndex] = None,
+    batch_size: int = 1000,
+    dry_run: bool = False
+) -> Tuple[int, int]:
+    """Attach chunks without a document_id to their document by filename.
+
+    Such chunks only name their file in `source`. Those whose filename
+    belongs to exactly one document are re-upserted under the same IDs
+    with its document_id and owner; the others (filename uploaded more
+    than once, or document gone) are left for re-upload. Returns the
+    number of chunks attached and left over.
+    """
+    by_filename = defaultdict(list)
+    for document in documents:
+        by_filename[document[1]].append(document)
+
+    attached = unmatched = 0
+    offset = None
+    while True:
+        page, offset = await vector_store.scroll(batch_size, offset)
+
+        updates = []
+        for point_id, payload in page:
+            if payload.get('document_id'):
+                continue
+            matches = by_filename.get(payload.get('source'), [])
+            if len(matches) != 1:
+                unmatched += 1
+                continue
+            document_id, _, user_id, syllabus_id = matches[0]
+            updates.append((point_id, {
+                **payload, "document_id": document_id, "user_id": user_id, "syllabus_id": syllabus_id
+            }))
+
+        attached += len(updates)
+        if updates and not dry_run:
+            vectors = await vector_store.vectors_by_id([point_id for point_id, _ in updates])
+            await vector_store.upsert([
+                (point_id, vectors[point_id], payload) for point_id, payload in updates if point_id in vectors
+            ])
+            if lexical_index is not None:
+                await lexical_index.add(updates)
+
+        if offset is None:
+            return attached, unmatched
+
+
+async def backfill(dry_run: bool, batch_size: int):
+    init_db()
+    await store.init_vector_db()
+    db = SessionLocal()
+    try:
+        documents = db.query(Document.id, Document.filename, Document.user_id, Document.syllabus_id).all()
+
+        for document_id, _, user_id, syllabus_id in documents:
+            if not dry_run:
+                chunk_filter = ChunkFilter(document_ids=(document_id,))
+                owner = {"user_id": user_id, "syllabus_id": syllabus_id}
+                await store.vector_store.set_payload(chunk_filter, owner)
+                if store.lexical_index is not None:
+                    await store.lexical_index.set_payload(chunk_filter, owner)
+
+        attached, unmatched = await backfill_legacy_chunks(
+            [tuple(document) for document in documents], store.vector_store, store.lexical_index,
+            batch_size=batch_size, dry_run=dry_run
+        )
+
+        if dry_run:
+            print(f"✅ Would backfill the chunks of {len(documents)} documents "
+                  f"and attach {attached} chunks without a document ID by filename")
+        else:
+            invalidate_topic_chunks(db)
+            db.commit()
+            print(f"✅ Backfilled the chunks of {len(documents)} documents "
+                  f"and attached {attached} chunks without a document ID by filename")
+        if unmatched:
+            print(f"⚠️ {unmatched} chunks without a document ID match no single document's filename; "
+                  f"re-upload those files")
+    finally:
+        db.close()
+        await store.close_vector_db()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="count documents without writing")
+    parser.add_argument("--batch-size", type=int, default=1000, help="chunks read per request")
+    args = parser.parse_args()
+
+    asyncio.run(backfill(args.dry_run, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark: mixed read/write traffic against /progress/* and /quiz/submit.
+
+Seeds topics, mastery records and stored quizzes for a set of users,
+then runs concurrent clients that mostly read progress endpoints and
+submit quizzes the rest of the time. Reports throughput, latency and
+failed requests (e.g. "database is locked"). --legacy swaps in a plain
+engine without the WAL/pragma tuning, which is how database/db.py used
+to connect.
+
+Usage (from backend/):
+    python benchmarks/db_concurrency.py --requests 2000 --concurrency 64 --write-ratio 0.3
+    python benchmarks/db_concurrency.py --legacy
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hash")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+
+import agents.agents as agents_module  # noqa: E402
+from config import settings  # noqa: E402
+from database.db import SessionLocal, init_db  # noqa: E402
+from database.models import Quiz, Syllabus, Topic, UserTopicMastery  # noqa: E402
+from main import app  # noqa: E402
+
+READ_PATHS = ["/api/progress/stats", "/api/progress/topics", "/api/progress/revision-due"]
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    model_name = "stub-model"
+
+    def generate_content(self, prompt, **kwargs):
+        return StubResponse("[1] Review the definition in your notes.")
+
+
+def seed(users: int, topics: int, quizzes: int):
+    db = SessionLocal()
+    try:
+        syllabus_id = str(uuid.uuid4())
+        db.add(Syllabus(id=syllabus_id, course_name="Networks", raw_text="bench", user_id=1))
+        topic_rows = [
+            Topic(topic_id=f"{syllabus_id}_{i}", name=f"Topic {i}", unit="Unit 1", syllabus_id=syllabus_id)
+            for i in range(topics)
+        ]
+        db.add_all(topic_rows)
+        db.flush()
+
+        for user_id in range(1, users + 1):
+            for topic in random.sample(topic_rows, min(10, topics)):
+                db.add(UserTopicMastery(user_id=user_id, topic_id=topic.id, score=random.uniform(20, 100), attempts=1))
+
+        quiz_ids = []
+        for i in range(quizzes):
+            quiz_id = str(uuid.uuid4())
+            topic = topic_rows[i % topics]
+            questions = [
+                {
+                    "question_id": f"{topic.name}_q{n}",
+                    "question": f"Question {n}?",
+                    "options": ["a", "b", "c", "d"],
+                    "correct_answer": "a",
+                    "explanation": "a is right"
+                }
+                for n in range(1, 6)
+            ]
+            db.add(Quiz(id=quiz_id, topic=topic.name, questions_count=5, questions=questions))
+            quiz_ids.append((quiz_id, questions))
+
+        db.commit()
+        return quiz_ids
+    finally:
+        db.close()
+
+
+async def run_traffic(total: int, concurrency: int, write_ratio: float, users: int, quizzes):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {"read": [], "write": []}
+    statuses = Counter()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one():
+            async with semaphore:
+                user_id = random.randint(1, users)
+                start = time.perf_counter()
+                if random.random() < write_ratio:
+                    kind = "write"
+                    quiz_id, questions = random.choice(quizzes)
+                    answers = {q["question_id"]: random.choice(q["options"]) for q in questions}
+                    response = await client.post(
+                        f"/api/quiz/submit?user_id={user_id}",
+                        json={"quiz_id": quiz_id, "answers": answers}
+                    )
+                else:
+                    kind = "read"
+                    response = await client.get(f"{random.choice(READ_PATHS)}?user_id={user_id}")
+                latencies[kind].append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, statuses, elapsed
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    if args.legacy:
+        legacy_engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+        SessionLocal.configure(bind=legacy_engine)
+
+    init_db()
+    quizzes = seed(args.users, args.topics, quizzes=50)
+    agents_module.quiz_agent.model = StubModel()
+
+    latencies, statuses, elapsed = asyncio.run(run_traffic(
+        args.requests, args.concurrency, args.write_ratio, args.users, quizzes
+    ))
+
+    failed = sum(count for status, count in statuses.items() if status >= 400)
+    print(f"engine:      {'legacy (no pragmas)' if args.legacy else 'tuned (WAL + pragmas)'}")
+    print(f"requests:    {args.requests} @ concurrency {args.concurrency}, {args.write_ratio:.0%} writes")
+    print(f"throughput:  {args.requests / elapsed:.1f} req/s")
+    for kind, values in latencies.items():
+        if values:
+            print(f"{kind + ':':<12} p50 {statistics.median(values) * 1000:.0f} ms, "
+                  f"p99 {percentile(values, 99) * 1000:.0f} ms")
+    print(f"failed:      {failed} ({dict(statuses)})")
+
+
+if __name__ == "__main__":
+    main()
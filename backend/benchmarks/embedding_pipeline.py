@@ -0,0 +1,81 @@
+"""
+Benchmark: serial per-chunk embedding vs the batched embedding pipeline.
+
+Uses the offline hash embedder with a simulated per-request latency and a
+no-op upsert, so only the embedding round trips are measured.
+
+Usage (from backend/):
+    python benchmarks/embedding_pipeline.py --chunks 600 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from vectorstore.embeddings import HashEmbeddingProvider  # noqa: E402
+from vectorstore.pipeline import EmbeddingPipeline  # noqa: E402
+
+
+def make_chunks(count: int):
+    return [
+        {
+            "chunk_id": f"bench_chunk_{i}",
+            "text": f"Chunk {i} about routing tables, congestion control and packet switching.",
+            "source": "bench.pdf",
+        }
+        for i in range(count)
+    ]
+
+
+async def serial(provider, chunks):
+    for chunk in chunks:
+        provider.embed_documents([chunk['text']])
+    return len(chunks)
+
+
+async def batched(provider, chunks, batch_size, concurrency, upsert_batch_size):
+    slices = []
+
+    async def upsert(embedded):
+        slices.append(len(embedded))
+
+    pipeline = EmbeddingPipeline(batch_size, concurrency, upsert_batch_size)
+    stored = await pipeline.run(chunks, upsert, provider=provider)
+    return stored, len(slices)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--upsert-batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    provider = HashEmbeddingProvider(latency=args.latency)
+    chunks = make_chunks(args.chunks)
+
+    start = time.perf_counter()
+    asyncio.run(serial(provider, chunks))
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stored, upserts = asyncio.run(batched(
+        provider, chunks, args.batch_size, args.concurrency, args.upsert_batch_size
+    ))
+    batched_time = time.perf_counter() - start
+
+    print(f"chunks:   {args.chunks} (simulated latency {args.latency * 1000:.0f} ms/request)")
+    print(f"serial:   {serial_time:.2f}s")
+    print(f"batched:  {batched_time:.2f}s ({stored} stored in {upserts} upserts)")
+    print(f"speedup:  {serial_time / batched_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: local sentence-transformers embedding throughput.
+
+Encodes --chunks chunk-sized texts with the local provider, in full
+precision and with dynamic int8 quantization, and reports chunks/s and
+how closely the quantized vectors match (mean cosine similarity).
+Needs sentence-transformers and the model (downloaded on first use, or
+a local model directory).
+
+Usage (from backend/):
+    python benchmarks/local_embeddings.py --model sentence-transformers/all-mpnet-base-v2 --threads 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from config import settings  # noqa: E402
+from vectorstore.embeddings import SentenceTransformerEmbeddingProvider  # noqa: E402
+
+SENTENCES = [
+    "Routers forward packets by matching the destination IP address against the routing table.",
+    "TCP establishes a connection with a three-way handshake of SYN, SYN-ACK and ACK segments.",
+    "Subnetting splits an address block into smaller networks using a longer prefix length.",
+    "The data link layer frames packets and uses MAC addresses for delivery on the local link.",
+]
+
+
+def synthetic_chunks(count: int):
+    # Roughly chunk_size tokens each, varied so batches aren't identical
+    return [
+        " ".join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(8)) + f" ({i})"
+        for i in range(count)
+    ]
+
+
+def run(provider, chunks):
+    provider.embed_documents(chunks[:provider.batch_size])  # warm up
+    start = time.perf_counter()
+    vectors = np.array(provider.embed_documents(chunks))
+    return vectors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=settings.local_embedding_model)
+    parser.add_argument("--chunks", type=int, default=1024)
+    parser.add_argument("--threads", type=int, default=settings.local_embedding_threads)
+    parser.add_argument("--batch-size", type=int, default=settings.local_embedding_batch_size)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    results = {}
+    for quantize in (False, True):
+        provider = SentenceTransformerEmbeddingProvider(
+            model_name=args.model, batch_size=args.batch_size, threads=args.threads, quantize=quantize
+        )
+        vectors, elapsed = run(provider, chunks)
+        results[quantize] = vectors
+        label = "int8:" if quantize else "fp32:"
+        print(f"{label:<8}{args.chunks / elapsed:>8.1f} chunks/s ({provider.dimensions} dims)")
+
+    # Vectors are normalized, so the row-wise dot product is the cosine
+    agreement = (results[False] * results[True]).sum(axis=1)
+    print(f"cosine:  mean {agreement.mean():.4f}, min {agreement.min():.4f} (fp32 vs int8)")
+
+
+if __name__ == "__main__":
+    main()
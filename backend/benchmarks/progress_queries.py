@@ -0,0 +1,146 @@
+"""
+Regression check: SQL statements issued per /api/progress/* request.
+
+Seeds one student with --topics mastered topics (plus other students
+and unstudied topics), counts the statements each endpoint executes and
+times them. The counts must not grow with the number of topics; the
+script exits non-zero if any endpoint exceeds its budget, so it can run
+in CI.
+
+Usage (from backend/):
+    python benchmarks/progress_queries.py --topics 500
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hash")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+from database.db import SessionLocal, engine, init_db  # noqa: E402
+from database.models import Syllabus, Topic, UserTopicMastery  # noqa: E402
+from database.progress_summary import rebuild_progress_summary  # noqa: E402
+from main import app  # noqa: E402
+
+# Maximum statements per request, independent of the number of topics
+QUERY_BUDGET = {
+    "/api/progress/stats": 1,
+    "/api/progress/topics": 1,
+    "/api/progress/study-plan": 2,
+    "/api/progress/revision-due": 1,
+}
+
+STUDENT_ID = 1
+
+
+def seed(topics: int, other_students: int):
+    db = SessionLocal()
+    try:
+        syllabus_id = str(uuid.uuid4())
+        db.add(Syllabus(id=syllabus_id, course_name="Networks", raw_text="bench", user_id=STUDENT_ID))
+        # Twice as many topics as the student has practiced
+        topic_rows = [
+            Topic(topic_id=f"{syllabus_id}_{i}", name=f"Topic {i}", unit="Unit 1", syllabus_id=syllabus_id)
+            for i in range(topics * 2)
+        ]
+        db.add_all(topic_rows)
+        db.flush()
+
+        now = datetime.now()
+        user_ids = [STUDENT_ID] + list(range(2, other_students + 2))
+        for user_id in user_ids:
+            for topic in random.sample(topic_rows, topics):
+                db.add(UserTopicMastery(
+                    user_id=user_id,
+                    topic_id=topic.id,
+                    score=random.uniform(0, 100),
+                    attempts=random.randint(1, 5),
+                    last_practiced=now - timedelta(days=random.randint(0, 30)),
+                    next_revision=now + timedelta(days=random.randint(-10, 10))
+                ))
+        db.flush()
+
+        # Summaries are normally maintained by /quiz/submit
+        for user_id in user_ids:
+            rebuild_progress_summary(db, user_id)
+        db.commit()
+    finally:
+        db.close()
+
+
+def show_plans():
+    """Print SQLite's plan for the user-scoped mastery lookups"""
+    statements = [
+        "SELECT * FROM user_topic_mastery WHERE user_id = 1 AND topic_id = 1",
+        "SELECT * FROM user_topic_mastery WHERE user_id = 1 AND next_revision <= '2030-01-01'",
+    ]
+    with engine.connect() as conn:
+        for statement in statements:
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {statement}")).fetchall()
+            print(f"plan:       {plan[-1][-1]}")
+
+
+async def measure():
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path in QUERY_BUDGET:
+                statements.clear()
+                start = time.perf_counter()
+                response = await client.get(f"{path}?user_id={STUDENT_ID}")
+                elapsed = time.perf_counter() - start
+                response.raise_for_status()
+                results[path] = (len(statements), elapsed)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--other-students", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    seed(args.topics, args.other_students)
+
+    results = asyncio.run(measure())
+
+    failed = False
+    print(f"student:    {args.topics} practiced topics, {args.other_students} other students")
+    for path, (queries, elapsed) in results.items():
+        over = queries > QUERY_BUDGET[path]
+        failed = failed or over
+        status = "FAIL" if over else "ok"
+        print(f"{path:<28} {queries:>4} queries (budget {QUERY_BUDGET[path]}) "
+              f"{elapsed * 1000:>7.1f} ms  {status}")
+    show_plans()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
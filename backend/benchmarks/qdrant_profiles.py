@@ -0,0 +1,153 @@
+"""
+Benchmark: memory footprint, recall and latency of the Qdrant profiles.
+
+Indexes --points synthetic clustered vectors into a collection per
+profile (default, int8, binary; see COLLECTION_PROFILES) and reports:
+  - memory: estimated RAM and disk for the vectors and HNSW graph
+  - recall@k against exact NumPy search
+  - p50/p95 latency of single searches
+With --migrate one collection is created with the first profile and
+migrated in place to each following one, as init_vector_db does when
+QDRANT_PROFILE changes.
+
+Quantization, on-disk storage and HNSW parameters only take effect on a
+Qdrant server; the client's in-memory mode searches exactly and ignores
+them, so pass --qdrant-url for meaningful recall and latency.
+
+Usage (from backend/):
+    python benchmarks/qdrant_profiles.py --qdrant-url http://localhost:6333 --points 200000 --dims 768
+    python benchmarks/qdrant_profiles.py --qdrant-url http://localhost:6333 --migrate
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from config import settings  # noqa: E402
+from vectorstore import store as stores  # noqa: E402
+from vector_backends import clustered, exact_top_k  # noqa: E402
+
+BATCH = 1000
+
+
+def footprint(profile: stores.CollectionProfile, points: int, dims: int):
+    """Estimated (RAM, disk) bytes of the vectors and the HNSW graph"""
+    full = points * dims * 4
+    quantized = {"int8": points * dims, "binary": points * dims // 8}.get(profile.quantization, 0)
+    # Layer 0 links dominate: 2 * m neighbour ids of 4 bytes per point
+    graph = points * profile.hnsw_m * 2 * 4
+
+    ram = quantized + graph + (0 if profile.on_disk else full)
+    disk = full if profile.on_disk else 0
+    return ram, disk
+
+
+async def wait_until_indexed(store):
+    # The server optimizes segments (quantizes, rebuilds the graph) in the background
+    while True:
+        info = await store.client.get_collection(store.collection_name)
+        if info.status == "green":
+            return
+        await asyncio.sleep(1)
+
+
+async def fill(store, points: np.ndarray):
+    for i in range(0, len(points), BATCH):
+        await store.upsert([
+            (str(uuid.UUID(int=j)), points[j].tolist(), {"n": j})
+            for j in range(i, min(i + BATCH, len(points)))
+        ])
+
+
+async def measure(name: str, store, queries: np.ndarray, truth: np.ndarray, args):
+    await wait_until_indexed(store)
+    await store.search(queries[0].tolist(), args.k)  # warm up
+
+    latencies = []
+    found = []
+    for vector in queries.tolist():
+        start = time.perf_counter()
+        hits = await store.search(vector, args.k)
+        latencies.append(time.perf_counter() - start)
+        found.append({hit.payload["n"] for hit in hits})
+
+    recall = np.mean([len(hits & set(expected.tolist())) / args.k for hits, expected in zip(found, truth)])
+    ram, disk = footprint(store.profile, args.points, args.dims)
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    print(f"{name:<8} RAM {ram / 2**20:8.1f}MB  disk {disk / 2**20:8.1f}MB  "
+          f"recall@{args.k} {recall:6.1%}  p50 {p50:6.2f}ms  p95 {p95:6.2f}ms")
+
+
+def profile_for(name: str, args) -> stores.CollectionProfile:
+    profile = stores.collection_profile(name)
+    if args.ef_search:
+        profile = profile._replace(hnsw_ef_search=args.ef_search)
+    return profile
+
+
+async def run(args):
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(args.clusters, args.dims)).astype(np.float32)
+    points = clustered(rng, args.points, args.dims, centers)
+    queries = clustered(rng, args.queries, args.dims, centers)
+    truth = exact_top_k(points, queries, args.k)
+    print(f"points:  {args.points} x {args.dims} dims, {args.queries} queries, k={args.k}")
+    if args.qdrant_url == ":memory:":
+        print("⚠️ In-memory mode ignores the profiles; pass --qdrant-url for a real comparison")
+
+    settings.vector_size = args.dims
+    collections = set()
+    try:
+        for i, name in enumerate(args.profiles):
+            collection = f"bench_{os.getpid()}" if args.migrate else f"bench_{os.getpid()}_{name}"
+            store = stores.QdrantVectorStore(
+                location=args.qdrant_url, collection_name=collection, profile=profile_for(name, args)
+            )
+            await store.init()
+            collections.add(collection)
+            try:
+                if not args.migrate or i == 0:
+                    await fill(store, points)
+                await measure(name, store, queries, truth, args)
+            finally:
+                await store.close()
+    finally:
+        if args.qdrant_url != ":memory:":
+            client = AsyncQdrantClient(location=args.qdrant_url, api_key=settings.qdrant_api_key)
+            for collection in collections:
+                await client.delete_collection(collection)
+            await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", nargs="+", default=list(stores.COLLECTION_PROFILES),
+                        choices=list(stores.COLLECTION_PROFILES))
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=settings.vector_size)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, default=None, help="overrides every profile's search ef")
+    parser.add_argument("--migrate", action="store_true",
+                        help="migrate one collection between profiles instead of one per profile")
+    parser.add_argument("--qdrant-url", default=":memory:")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    if args.migrate and args.qdrant_url == ":memory:":
+        parser.error("--migrate needs --qdrant-url (in-memory collections don't outlive the client)")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
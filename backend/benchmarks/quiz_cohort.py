@@ -0,0 +1,110 @@
+"""
+Benchmark: a cohort generating the same quiz with and without the LLM cache.
+
+Sends N concurrent /api/quiz/generate requests for one topic. The model
+is a stub that blocks for --latency and counts its calls; retrieval
+returns canned chunks, so every request builds a byte-identical prompt.
+
+Usage (from backend/):
+    python benchmarks/quiz_cohort.py --students 200 --latency 1.0
+    python benchmarks/quiz_cohort.py --students 200 --no-cache
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hash")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx  # noqa: E402
+
+import agents.agents as agents_module  # noqa: E402
+from agents.llm_cache import get_llm_cache  # noqa: E402
+from api import quiz  # noqa: E402
+from config import settings  # noqa: E402
+from database.db import init_db  # noqa: E402
+from main import app  # noqa: E402
+
+QUIZ_TEXT = """Q: What does a router forward packets on?
+A) MAC address
+B) Destination IP address
+C) Port number
+D) TTL
+Answer: B
+Explanation: Routers match the destination IP against their routing table.
+"""
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class CountingModel:
+    """Blocking stand-in for genai.GenerativeModel that counts calls"""
+
+    model_name = "stub-model"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return StubResponse(QUIZ_TEXT)
+
+
+async def stub_chunks(db, topic, **kwargs):
+    text = f"{topic}: routers forward on destination IP using longest prefix match."
+    return {"chunks_data": [{"chunk_id": f"c{i}", "text": text, "score": 0.9} for i in range(3)]}
+
+
+async def run_cohort(students: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one():
+            response = await client.post("/api/quiz/generate", json={"topic": "Routing"})
+            response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(students)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    init_db()
+    settings.llm_cache_enabled = not args.no_cache
+    model = CountingModel(args.latency)
+    agents_module.quiz_agent.model = model
+    quiz.get_topic_chunks = stub_chunks
+
+    elapsed = asyncio.run(run_cohort(args.students))
+
+    print(f"cache:      {'disabled' if args.no_cache else 'enabled'}")
+    print(f"students:   {args.students} (stub LLM latency {args.latency * 1000:.0f} ms)")
+    print(f"llm calls:  {model.calls}")
+    print(f"wall time:  {elapsed:.2f}s")
+    print(f"stats:      {get_llm_cache().stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Evaluation: topic retrieval quality of vector, hybrid, keyword-first and reranked search.
+
+Indexes the labeled chunks of --dataset (a small computer networks
+course) into an in-memory Qdrant collection and a temporary keyword
+index, maps every topic with get_chunks_for_topics and compares:
+  - dense:    vector search only (HYBRID_SEARCH_ENABLED=false)
+  - hybrid:   BM25 fused with vector search for every topic
+  - shortcut: hybrid, answering confident keyword matches without
+              embedding the topic
+  - rerank:   shortcut plus MMR reranking (the default)
+and reports recall@k and MRR of the labeled chunks in the ranking,
+coverage (topics with a labeled chunk above the relevance threshold),
+precision of the chunks above the threshold, topics embedded,
+milliseconds per topic, and for the top k chunks above the threshold
+(what the agents are given) their count and redundancy (mean pairwise
+cosine similarity).
+
+Usage (from backend/):
+    python benchmarks/retrieval_eval.py --provider local
+    RERANK_CROSS_ENCODER_MODEL=cross-encoder/ms-marco-MiniLM-L-6-v2 python benchmarks/retrieval_eval.py --provider local
+    python benchmarks/retrieval_eval.py --provider hash   # offline; vector search is meaningless
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["QDRANT_URL"] = ":memory:"
+os.environ["VECTOR_STORE"] = "qdrant"
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+
+from config import settings  # noqa: E402
+from vectorstore import qdrant_client as store  # noqa: E402
+
+DOCUMENT_ID = "eval"
+DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "retrieval_eval.json")
+
+
+async def evaluate(label: str, topics, args):
+    lexical_index = store.lexical_index
+    skipped = lexical_index.keyword_only if lexical_index else 0
+    names = [entry['topic'] for entry in topics]
+
+    start = time.perf_counter()
+    results = await store.get_chunks_for_topics(names, limit=args.k)
+    elapsed = time.perf_counter() - start
+
+    given = [result['relevant_chunks'][:args.k] for result in results]
+    found = await store.vector_store.vectors_by_id(list({
+        store.chunk_point_id({"document_id": DOCUMENT_ID, "chunk_id": chunk_id})
+        for chunk_ids in given for chunk_id in chunk_ids
+    }))
+    redundancy = []
+    for chunk_ids in given:
+        if len(chunk_ids) > 1:
+            vectors = np.array([
+                found[store.chunk_point_id({"document_id": DOCUMENT_ID, "chunk_id": chunk_id})]
+                for chunk_id in chunk_ids
+            ])
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            similarity = vectors @ vectors.T
+            redundancy.append(similarity[np.triu_indices(len(chunk_ids), 1)].mean())
+
+    recall, reciprocal_ranks, covered, precision = [], [], 0, []
+    for entry, result in zip(topics, results):
+        relevant = set(entry['relevant'])
+        ranked = [chunk['chunk_id'] for chunk in result['chunks_data']]
+        accepted = set(result['relevant_chunks'])
+
+        recall.append(len(relevant & set(ranked)) / len(relevant))
+        first = next((rank for rank, chunk_id in enumerate(ranked, 1) if chunk_id in relevant), None)
+        reciprocal_ranks.append(1 / first if first else 0.0)
+        covered += bool(relevant & accepted)
+        if accepted:
+            precision.append(len(relevant & accepted) / len(accepted))
+
+    embedded = len(names) - ((lexical_index.keyword_only - skipped) if lexical_index else 0)
+    mean = lambda values: sum(values) / len(values) if values else 0.0  # noqa: E731
+    print(f"{label:<9} recall@{args.k} {mean(recall):6.1%}  MRR {mean(reciprocal_ranks):.3f}  "
+          f"covered {covered:>2}/{len(topics)}  precision {mean(precision):6.1%}  "
+          f"embedded {embedded:>2}/{len(names)}  {elapsed / len(names) * 1000:7.1f} ms/topic  "
+          f"given {mean([len(chunk_ids) for chunk_ids in given]):.1f}  redundancy {mean(redundancy):.3f}")
+
+
+async def run(args):
+    with open(args.dataset) as f:
+        dataset = json.load(f)
+
+    directory = tempfile.mkdtemp()
+    settings.lexical_index_dir = directory
+    settings.hybrid_search_enabled = True
+    settings.embedding_provider = args.provider
+    try:
+        await store.init_vector_db()
+        await store.add_chunks_to_vectorstore([
+            {"chunk_id": chunk['id'], "document_id": DOCUMENT_ID, "text": chunk['text'], "source": "eval.pdf"}
+            for chunk in dataset['chunks']
+        ])
+        print(f"chunks:  {len(dataset['chunks'])}, topics: {len(dataset['topics'])}, provider: {args.provider}")
+
+        settings.rerank_enabled = False
+        lexical_index = store.lexical_index
+        store.lexical_index = None
+        await evaluate("dense", dataset['topics'], args)
+        store.lexical_index = lexical_index
+
+        min_hits = settings.hybrid_lexical_min_hits
+        settings.hybrid_lexical_min_hits = 0
+        await evaluate("hybrid", dataset['topics'], args)
+        settings.hybrid_lexical_min_hits = min_hits
+
+        await evaluate("shortcut", dataset['topics'], args)
+
+        settings.rerank_enabled = True
+        await evaluate("rerank", dataset['topics'], args)
+    finally:
+        await store.close_vector_db()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--provider", default=settings.embedding_provider, help="gemini | local | hash")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: SM-2 scheduling on synthetic review histories.
+
+1. Replay: builds --pairs (user, topic) histories of up to --max-reviews
+   quiz scores and times spaced_repetition.replay_reviews (what
+   recompute_schedules.py runs) against applying sm2_step row by row.
+   Checks both produce the same states.
+2. Scheduling: simulates learners with an exponential forgetting curve
+   for --days and compares the old fixed 7-day revision rule to SM-2
+   (reviews needed and recall when reviewing).
+
+Usage (from backend/):
+    python benchmarks/srs_simulation.py --pairs 1000000 --max-reviews 12
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from config import settings  # noqa: E402
+from spaced_repetition import (  # noqa: E402
+    replay_reviews, review_quality, sm2_step, sm2_step_batch
+)
+
+SCALAR_SAMPLE = 50000  # reviews replayed with the per-row loop
+
+
+def synthetic_histories(rng, pairs: int, max_reviews: int):
+    lengths = rng.integers(1, max_reviews + 1, size=pairs)
+    groups = np.repeat(np.arange(pairs), lengths)
+    scores = rng.choice([0, 20, 40, 60, 80, 100], size=len(groups), p=[.05, .05, .1, .2, .3, .3])
+    return groups, scores.astype(np.float64)
+
+
+def replay_scalar(groups, scores):
+    states = {}
+    for group, score in zip(groups.tolist(), scores.tolist()):
+        ease, interval, repetitions = states.get(group, (settings.srs_initial_ease, 0.0, 0))
+        states[group] = sm2_step(ease, interval, repetitions, score)
+    return states
+
+
+def bench_replay(rng, pairs: int, max_reviews: int):
+    groups, scores = synthetic_histories(rng, pairs, max_reviews)
+
+    start = time.perf_counter()
+    ease, interval, repetitions = replay_reviews(groups, scores, pairs)
+    vectorized = time.perf_counter() - start
+
+    sample = min(SCALAR_SAMPLE, len(groups))
+    # Cut at a history boundary so the sample holds whole histories
+    while 0 < sample < len(groups) and groups[sample] == groups[sample - 1]:
+        sample -= 1
+    start = time.perf_counter()
+    states = replay_scalar(groups[:sample], scores[:sample])
+    scalar = time.perf_counter() - start
+
+    for group, (e, i, r) in states.items():
+        assert np.isclose(ease[group], e) and np.isclose(interval[group], i) and repetitions[group] == r
+
+    print(f"replay:     {len(groups)} reviews over {pairs} pairs")
+    print(f"vectorized: {vectorized:.2f}s ({len(groups) / vectorized:,.0f} reviews/s)")
+    print(f"per-row:    {scalar:.2f}s for {sample} reviews ({sample / scalar:,.0f} reviews/s), "
+          f"states match")
+
+
+def simulate(rng, learners: int, days: int, policy: str):
+    """Reviews per learner and mean recall when reviewing under a policy"""
+    stability = rng.uniform(1.0, 3.0, size=learners)  # days until recall falls to 1/e
+    last_review = np.zeros(learners)
+    next_review = np.ones(learners)
+    ease = np.full(learners, settings.srs_initial_ease)
+    interval = np.zeros(learners)
+    repetitions = np.zeros(learners, dtype=np.int64)
+
+    reviews = 0
+    recall_sum = 0.0
+    for day in range(1, days + 1):
+        due = np.flatnonzero(next_review <= day)
+        if len(due) == 0:
+            continue
+
+        recall = np.exp(-(day - last_review[due]) / stability[due])
+        scores = rng.binomial(5, recall) * 20.0
+        reviews += len(due)
+        recall_sum += recall.sum()
+
+        # Reviewing strengthens memory, more so after a successful recall
+        passed = scores >= 60
+        stability[due] = np.where(passed, stability[due] * 2.2, np.maximum(stability[due] * 0.6, 1.0))
+        last_review[due] = day
+
+        if policy == "fixed":
+            next_review[due] = day + 7
+        else:
+            ease[due], interval[due], repetitions[due] = sm2_step_batch(
+                ease[due], interval[due], repetitions[due], review_quality(scores)
+            )
+            next_review[due] = day + interval[due]
+
+    retention = np.exp(-(days - last_review) / stability).mean()
+    return reviews / learners, recall_sum / max(reviews, 1), retention
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=1000000)
+    parser.add_argument("--max-reviews", type=int, default=12)
+    parser.add_argument("--learners", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    bench_replay(np.random.default_rng(args.seed), args.pairs, args.max_reviews)
+
+    print(f"schedule:   {args.learners} learner/topic pairs over {args.days} days")
+    for policy in ("fixed", "sm2"):
+        per_learner, recall, retention = simulate(
+            np.random.default_rng(args.seed), args.learners, args.days, policy
+        )
+        label = "fixed 7-day" if policy == "fixed" else "SM-2"
+        print(f"{label + ':':<13}{per_learner:.1f} reviews each, recall at review {recall:.1%}, "
+              f"recall on day {args.days} {retention:.1%}")
+
+
+if __name__ == "__main__":
+    main()
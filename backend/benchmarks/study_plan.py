@@ -0,0 +1,136 @@
+"""
+Benchmark: study plan generation for a student enrolled in large syllabi.
+
+Seeds --syllabi syllabi of --topics topics for the student (plus the
+same amount for other students), has the student practice a share of
+them, then times study_planner.build_study_plan against the original
+/progress/study-plan algorithm (all mastery rows and every topic in the
+database loaded, list membership checks, one topic query per row).
+
+Usage (from backend/):
+    python benchmarks/study_plan.py --syllabi 20 --topics 500 --practiced 0.3
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+from sqlalchemy import event  # noqa: E402
+
+from database.db import SessionLocal, engine, init_db  # noqa: E402
+from database.models import Syllabus, Topic, UserTopicMastery  # noqa: E402
+from study_planner import build_study_plan  # noqa: E402
+
+STUDENT_ID = 1
+
+
+def seed(syllabi: int, topics: int, practiced: float):
+    db = SessionLocal()
+    try:
+        now = datetime.now()
+        for user_id in (STUDENT_ID, 2):
+            for s in range(syllabi):
+                syllabus_id = str(uuid.uuid4())
+                db.add(Syllabus(id=syllabus_id, course_name=f"Course {s}", raw_text="bench", user_id=user_id))
+                db.add_all(
+                    Topic(
+                        topic_id=f"{syllabus_id}_{i}",
+                        name=f"U{user_id} C{s} Topic {i}",
+                        syllabus_id=syllabus_id,
+                        has_sufficient_content=random.random() < 0.7
+                    )
+                    for i in range(topics)
+                )
+        db.flush()
+
+        own = db.query(Topic.id).join(Syllabus).filter(Syllabus.user_id == STUDENT_ID).all()
+        for (topic_id,) in random.sample(own, int(len(own) * practiced)):
+            interval = random.choice([1.0, 6.0, 15.0, 40.0])
+            db.add(UserTopicMastery(
+                user_id=STUDENT_ID,
+                topic_id=topic_id,
+                score=random.uniform(20, 100),
+                attempts=1,
+                last_practiced=now - timedelta(days=interval),
+                next_revision=now + timedelta(days=random.uniform(-10, 40)),
+                interval_days=interval
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def legacy_study_plan(db, user_id: int):
+    """The original /progress/study-plan implementation"""
+    mastery_records = db.query(UserTopicMastery).filter(UserTopicMastery.user_id == user_id).all()
+    all_topics = db.query(Topic).all()
+
+    studied_topic_ids = [m.topic_id for m in mastery_records]
+    topics_to_study = [t.name for t in all_topics if t.id not in studied_topic_ids][:5]
+
+    topics_to_revise = []
+    now = datetime.now()
+    for mastery in mastery_records:
+        topic = db.query(Topic).filter(Topic.id == mastery.topic_id).first()
+        if topic and (mastery.score < 70 or (mastery.next_revision and mastery.next_revision <= now)):
+            topics_to_revise.append(topic.name)
+
+    return topics_to_study, topics_to_revise[:5]
+
+
+def measure(label: str, fn):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        start = time.perf_counter()
+        result = fn(db)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+        db.close()
+
+    print(f"{label:<22} {elapsed * 1000:>9.1f} ms  {len(statements):>6} queries")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--syllabi", type=int, default=20)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--practiced", type=float, default=0.3)
+    parser.add_argument("--weeks", type=int, default=4)
+    args = parser.parse_args()
+
+    init_db()
+    seed(args.syllabi, args.topics, args.practiced)
+
+    print(f"student:   {args.syllabi} syllabi x {args.topics} topics, "
+          f"{args.practiced:.0%} practiced (same again for another student)")
+    measure("original (1 week)", lambda db: legacy_study_plan(db, STUDENT_ID))
+    measure("planner (1 week)", lambda db: build_study_plan(db, STUDENT_ID, weeks=1))
+    plan = measure(f"planner ({args.weeks} weeks)", lambda db: build_study_plan(db, STUDENT_ID, weeks=args.weeks))
+
+    for week in plan["weeks"]:
+        print(f"week {week['week_number']}:    {len(week['topics_to_study'])} new, "
+              f"{len(week['topics_to_revise'])} revisions, {week['estimated_hours']:.0f}h")
+    print(f"unscheduled: {plan['unscheduled_topics']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark: /api/lessons/teach latency under concurrent load.
+
+The LLM is replaced by a stub whose generate_content blocks for a fixed
+time (like a real Gemini call), and retrieval returns canned chunks. Run
+with --mode inline to call the stub directly on the event loop, which is
+how the endpoints behaved before blocking calls were offloaded.
+
+--stream posts to /api/lessons/teach/stream instead; the stub then
+spreads its latency over the streamed fragments and time to first token
+is reported next to full response time. Streaming runs against a local
+uvicorn server because the in-process ASGI transport buffers bodies.
+
+Usage (from backend/):
+    python benchmarks/teach_load.py --requests 200 --concurrency 50 --latency 0.2
+    python benchmarks/teach_load.py --stream
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hash")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+import agents.agents as agents_module  # noqa: E402
+from api import lessons  # noqa: E402
+from database.db import init_db  # noqa: E402
+from main import app  # noqa: E402
+
+
+STUB_TEXT = "Packets are routed hop by hop. What does a router forward on?"
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Blocking stand-in for genai.GenerativeModel.
+
+    With stream=True the latency is spread evenly over `fragments` chunks.
+    """
+
+    def __init__(self, latency: float, fragments: int = 10):
+        self.latency = latency
+        self.fragments = fragments
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream:
+            return self._stream()
+        time.sleep(self.latency)
+        return StubResponse(STUB_TEXT)
+
+    def _stream(self):
+        words = STUB_TEXT.split(" ")
+        size = max(1, len(words) // self.fragments)
+        for start in range(0, len(words), size):
+            time.sleep(self.latency / self.fragments)
+            yield StubResponse(" ".join(words[start:start + size]) + " ")
+
+
+async def stub_chunks(db, topic, **kwargs):
+    text = f"{topic} is explained in the course notes with worked examples."
+    chunks = [{"chunk_id": f"c{i}", "text": text, "score": 0.9} for i in range(3)]
+    return {"chunks_data": chunks, "relevant_chunks": [c["chunk_id"] for c in chunks]}
+
+
+def start_server(port: int) -> uvicorn.Server:
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def make_client(stream: bool, port: int) -> httpx.AsyncClient:
+    if stream:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        return httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None)
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+
+async def run_load(total: int, concurrency: int, stream: bool, port: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    first_tokens = []
+
+    async with make_client(stream, port) as client:
+        async def one(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                payload = {"topic": f"Routing {i % 10}"}
+                if not stream:
+                    response = await client.post("/api/lessons/teach", json=payload)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                    return
+
+                first_token = None
+                async with client.stream("POST", "/api/lessons/teach/stream", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line == "event: token" and first_token is None:
+                            first_token = time.perf_counter() - start
+                        elif line == "event: error":
+                            raise RuntimeError("stream reported an error")
+                latencies.append(time.perf_counter() - start)
+                first_tokens.append(first_token)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, first_tokens, elapsed
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--mode", choices=["offload", "inline"], default="offload")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    init_db()
+    agents_module.teaching_agent.model = StubModel(args.latency)
+    lessons.get_topic_chunks = stub_chunks
+
+    if args.mode == "inline":
+        async def inline(func, *a, **kw):
+            return func(*a, **kw)
+        agents_module.run_blocking = inline
+
+    server = start_server(args.port) if args.stream else None
+    latencies, first_tokens, elapsed = asyncio.run(
+        run_load(args.requests, args.concurrency, args.stream, args.port)
+    )
+    if server:
+        server.should_exit = True
+
+    print(f"mode:        {args.mode}{' (streaming)' if args.stream else ''}")
+    print(f"requests:    {args.requests} @ concurrency {args.concurrency}, "
+          f"stub LLM latency {args.latency * 1000:.0f} ms")
+    print(f"throughput:  {args.requests / elapsed:.1f} req/s")
+    print(f"p50:         {statistics.median(latencies) * 1000:.0f} ms")
+    print(f"p99:         {percentile(latencies, 99) * 1000:.0f} ms")
+    if first_tokens:
+        print(f"ttft p50:    {statistics.median(first_tokens) * 1000:.0f} ms")
+        print(f"ttft p99:    {percentile(first_tokens, 99) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
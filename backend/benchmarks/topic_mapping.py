@@ -0,0 +1,117 @@
+"""
+Benchmark: per-topic mapping vs bulk mapping as the topic count grows.
+
+Fills an in-memory Qdrant collection with synthetic chunks, then maps
+syllabi of increasing size with:
+  - sequential: get_chunks_for_topic awaited once per topic
+  - bulk:       get_chunks_for_topics (batched embeddings + search_batch)
+
+The offline hash embedder adds a simulated latency per embedding request
+and each Qdrant request waits --search-latency, standing in for the
+network round trips of a remote deployment.
+
+Usage (from backend/):
+    python benchmarks/topic_mapping.py --topics 10 40 120 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("QDRANT_URL", ":memory:")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hash")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+os.environ.setdefault("HYBRID_SEARCH_ENABLED", "false")
+
+from vectorstore import qdrant_client as store  # noqa: E402
+from vectorstore.embeddings import HashEmbeddingProvider, set_embedding_provider  # noqa: E402
+
+SUBJECTS = [
+    "routing tables", "congestion control", "packet switching", "TCP handshake",
+    "DNS resolution", "subnet masks", "BGP path vectors", "link state routing",
+    "error detection", "sliding windows", "ARP caches", "HTTP caching",
+]
+
+
+class SlowStore:
+    """Delays search requests to mimic a remote Qdrant"""
+
+    def __init__(self, store, latency: float):
+        self._store = store
+        self._latency = latency
+
+    async def search(self, *args, **kwargs):
+        await asyncio.sleep(self._latency)
+        return await self._store.search(*args, **kwargs)
+
+    async def search_batch(self, *args, **kwargs):
+        await asyncio.sleep(self._latency)
+        return await self._store.search_batch(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+
+def make_topics(count: int):
+    return [f"{SUBJECTS[i % len(SUBJECTS)]} part {i // len(SUBJECTS) + 1}" for i in range(count)]
+
+
+async def sequential(topics):
+    return [await store.get_chunks_for_topic(topic) for topic in topics]
+
+
+async def bulk(topics):
+    return await store.get_chunks_for_topics(topics)
+
+
+async def run(args):
+    set_embedding_provider(HashEmbeddingProvider())
+    await store.init_vector_db()
+    chunks = [
+        {
+            "chunk_id": f"bench_chunk_{i}",
+            "text": f"Lecture {i} covers {SUBJECTS[i % len(SUBJECTS)]} with worked examples.",
+            "source": "bench.pdf",
+        }
+        for i in range(args.chunks)
+    ]
+    await store.add_chunks_to_vectorstore(chunks)
+
+    store.vector_store = SlowStore(store.vector_store, args.search_latency)
+    set_embedding_provider(HashEmbeddingProvider(latency=args.latency))
+
+    print(f"chunks:   {args.chunks} (latency {args.latency * 1000:.0f} ms/embed, "
+          f"{args.search_latency * 1000:.0f} ms/search)")
+    for count in args.topics:
+        topics = make_topics(count)
+
+        start = time.perf_counter()
+        expected = await sequential(topics)
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await bulk(topics)
+        bulk_time = time.perf_counter() - start
+
+        same = [r['relevant_chunks'] for r in results] == [r['relevant_chunks'] for r in expected]
+        print(f"{count:>5} topics: sequential {sequential_time:6.2f}s, bulk {bulk_time:5.2f}s "
+              f"({sequential_time / bulk_time:.1f}x, results {'match' if same else 'DIFFER'})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topics", type=int, nargs="+", default=[10, 40, 120])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: peak RSS while many large uploads arrive concurrently.
+
+Sends N concurrent uploads of a SIZE-MB file to /api/documents/upload
+through an in-process ASGI client and samples the process RSS. Ingestion
+jobs are not run. --legacy posts to a route that reads the whole upload
+into memory first, which is how the endpoint used to behave.
+
+Usage (from backend/):
+    python benchmarks/upload_memory.py --uploads 20 --size-mb 10 --bound-mb 100
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_workdir = tempfile.mkdtemp()
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_PROVIDER", "hash")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'bench.db')}")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_workdir, "uploads"))
+os.environ.setdefault("MAX_UPLOAD_SIZE", str(64 * 1024 * 1024))
+
+import httpx  # noqa: E402
+from fastapi import UploadFile, File  # noqa: E402
+
+from api import documents  # noqa: E402
+from config import settings  # noqa: E402
+from database.db import init_db  # noqa: E402
+from main import app  # noqa: E402
+
+
+class NoopWorker:
+    def submit(self, job_id):
+        pass
+
+
+@app.post("/bench/legacy-upload")
+async def legacy_upload(file: UploadFile = File(...)):
+    """Old behaviour: whole upload in memory, then one write"""
+    path = os.path.join(settings.upload_dir, f"legacy_{id(file)}_{file.filename}")
+    with open(path, "wb") as f:
+        content = await file.read()
+        f.write(content)
+    return {"size": len(content)}
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval: float = 0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, current_rss_mb())
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+async def send_uploads(path: str, count: int, url: str):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i: int):
+            with open(path, "rb") as f:
+                response = await client.post(url, files={"file": (f"upload_{i}.txt", f, "text/plain")})
+            response.raise_for_status()
+
+        await asyncio.gather(*(one(i) for i in range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--size-mb", type=int, default=10)
+    parser.add_argument("--bound-mb", type=float, default=100.0,
+                        help="maximum allowed RSS growth over baseline")
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    init_db()
+    documents.ingestion_worker = NoopWorker()
+
+    source = os.path.join(_workdir, "source.txt")
+    with open(source, "wb") as f:
+        line = b"The transport layer provides end-to-end delivery between hosts.\n"
+        for _ in range(args.size_mb * 1024 * 1024 // len(line)):
+            f.write(line)
+
+    url = "/bench/legacy-upload" if args.legacy else "/api/documents/upload"
+    baseline = current_rss_mb()
+    sampler = RssSampler()
+    sampler.start()
+
+    start = time.perf_counter()
+    asyncio.run(send_uploads(source, args.uploads, url))
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    growth = sampler.peak - baseline
+    print(f"mode:      {'legacy (read whole file)' if args.legacy else 'streaming'}")
+    print(f"uploads:   {args.uploads} x {args.size_mb} MB in {elapsed:.2f}s")
+    print(f"rss:       baseline {baseline:.0f} MB, peak {sampler.peak:.0f} MB, growth {growth:.0f} MB")
+    print(f"bound:     {args.bound_mb:.0f} MB -> {'OK' if growth <= args.bound_mb else 'EXCEEDED'}")
+
+    if growth > args.bound_mb:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
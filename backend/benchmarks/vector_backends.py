@@ -0,0 +1,150 @@
+"""
+Benchmark: recall and throughput of the vector store backends.
+
+Indexes --points synthetic clustered vectors (roughly how chunk
+embeddings of a few courses spread out) into:
+  - local-flat: LocalVectorStore, exact memmap + argpartition search
+  - local-hnsw: LocalVectorStore with an HNSW graph (needs hnswlib)
+  - qdrant:     QdrantVectorStore at --qdrant-url (":memory:" runs the
+                client's pure-Python local mode, not a real server)
+and reports build time, recall@k against exact NumPy search, and
+queries per second for single searches and for search_batch. With
+--tenants N, points are spread over N users and every search is
+filtered to one of them, as retrieval is for a student.
+
+Usage (from backend/):
+    python benchmarks/vector_backends.py --points 100000 --dims 768 --queries 200
+    python benchmarks/vector_backends.py --qdrant-url http://localhost:6333
+    python benchmarks/vector_backends.py --points 200000 --tenants 100
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from config import settings  # noqa: E402
+from vectorstore import store as stores  # noqa: E402
+
+BATCH = 1000
+
+
+def clustered(rng, count: int, dims: int, centers: np.ndarray) -> np.ndarray:
+    labels = rng.integers(0, len(centers), size=count)
+    vectors = centers[labels] + rng.normal(scale=0.6, size=(count, dims)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(points: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ points.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+async def bench(label: str, store, points: np.ndarray, queries: np.ndarray, truth: np.ndarray, args):
+    k = args.k
+    chunk_filter = stores.ChunkFilter(user_id=0) if args.tenants > 1 else None
+
+    await store.init()
+    start = time.perf_counter()
+    for i in range(0, len(points), BATCH):
+        await store.upsert([
+            (str(uuid.UUID(int=j)), points[j].tolist(), {"n": j, "user_id": j % args.tenants})
+            for j in range(i, min(i + BATCH, len(points)))
+        ])
+    # An index built on upsert (HNSW) is part of the build cost
+    await store.search(queries[0].tolist(), k)
+    build = time.perf_counter() - start
+
+    vectors = queries.tolist()
+    start = time.perf_counter()
+    results = [await store.search(vector, k, chunk_filter) for vector in vectors]
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await store.search_batch(vectors, k, chunk_filter)
+    batch = time.perf_counter() - start
+    await store.close()
+
+    found = [{hit.payload["n"] for hit in hits} for hits in results]
+    recall = np.mean([len(hits & set(expected.tolist())) / k for hits, expected in zip(found, truth)])
+    print(f"{label:<11} build {build:7.2f}s  recall@{k} {recall:6.1%}  "
+          f"{len(queries) / single:8.0f} q/s single  {len(queries) / batch:8.0f} q/s batch")
+
+
+async def run(args):
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(args.clusters, args.dims)).astype(np.float32)
+    points = clustered(rng, args.points, args.dims, centers)
+    queries = clustered(rng, args.queries, args.dims, centers)
+    # Tenant 0 owns every tenants-th point
+    tenant_rows = np.arange(0, args.points, args.tenants)
+    truth = tenant_rows[exact_top_k(points[tenant_rows], queries, args.k)]
+    print(f"points:     {args.points} x {args.dims} dims, {args.queries} queries, k={args.k}")
+    if args.tenants > 1:
+        print(f"tenants:    {args.tenants}, searches filtered to one ({len(tenant_rows)} points)")
+
+    directory = tempfile.mkdtemp()
+    try:
+        await bench("local-flat", stores.LocalVectorStore(
+            os.path.join(directory, "flat"), args.dims, mode="flat"
+        ), points, queries, truth, args)
+
+        if stores.hnswlib is not None:
+            await bench("local-hnsw", stores.LocalVectorStore(
+                os.path.join(directory, "hnsw"), args.dims, mode="hnsw",
+                hnsw_m=args.hnsw_m, hnsw_ef_construction=args.ef_construction,
+                hnsw_ef_search=args.ef_search
+            ), points, queries, truth, args)
+        else:
+            print("local-hnsw  skipped (pip install hnswlib)")
+
+        if args.points <= args.qdrant_max_points or args.qdrant_url != ":memory:":
+            settings.vector_size = args.dims
+            collection = f"bench_{os.getpid()}"
+            store = stores.QdrantVectorStore(location=args.qdrant_url, collection_name=collection)
+            try:
+                await bench("qdrant", store, points, queries, truth, args)
+            finally:
+                if args.qdrant_url != ":memory:":
+                    cleanup = stores.QdrantVectorStore(location=args.qdrant_url, collection_name=collection)
+                    await cleanup.init()
+                    await cleanup.client.delete_collection(collection)
+                    await cleanup.close()
+        else:
+            print("qdrant      skipped (in-memory mode above --qdrant-max-points; pass --qdrant-url)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--dims", type=int, default=settings.vector_size)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--tenants", type=int, default=1, help="users the points are spread over")
+    parser.add_argument("--hnsw-m", type=int, default=settings.local_index_hnsw_m)
+    parser.add_argument("--ef-construction", type=int, default=settings.local_index_hnsw_ef_construction)
+    parser.add_argument("--ef-search", type=int, default=settings.local_index_hnsw_ef_search)
+    parser.add_argument("--qdrant-url", default=":memory:")
+    parser.add_argument("--qdrant-max-points", type=int, default=20000,
+                        help="largest corpus to try with the in-memory Qdrant client")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Keyword index build script
+Indexes every chunk stored in the vector store into the BM25 keyword
+index used by hybrid retrieval. New uploads are indexed as they are
+ingested; this covers chunks stored before hybrid retrieval existed, or
+a keyword index that was deleted. Stored topic mappings are dropped so
+they are searched again with keyword hits.
+"""
+
+import argparse
+import asyncio
+
+from config import settings
+from database.db import SessionLocal, init_db
+from vectorstore import qdrant_client as store
+from vectorstore.topic_chunks import invalidate_topic_chunks
+
+
+async def build(batch_size: int):
+    if not settings.hybrid_search_enabled:
+        print("❌ HYBRID_SEARCH_ENABLED is off; nothing to build")
+        return
+
+    init_db()
+    await store.init_vector_db()
+    db = SessionLocal()
+    try:
+        indexed = 0
+        offset = None
+        while True:
+            page, offset = await store.vector_store.scroll(batch_size, offset)
+            await store.lexical_index.add(page)
+            indexed += len(page)
+            if offset is None:
+                break
+
+        invalidate_topic_chunks(db)
+        db.commit()
+        print(f"✅ Indexed {indexed} chunks for keyword search")
+    finally:
+        db.close()
+        await store.close_vector_db()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000, help="chunks read per request")
+    args = parser.parse_args()
+
+    asyncio.run(build(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+from config import settings
+
+# Bounded pool for blocking I/O (Gemini, embeddings, SQLAlchemy sessions, files)
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=settings.blocking_pool_size,
+    thread_name_prefix="blocking"
+)
+
+# Process pool for CPU-bound parsing, created on first use
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call in the bounded thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _blocking_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def iterate_blocking(func: Callable[..., Iterable[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+    """Drain a blocking iterator in the thread pool, yielding items as they arrive.
+
+    `func(*args, **kwargs)` is called and iterated in a worker thread (e.g.
+    a streamed Gemini response). If the consumer stops early, the worker
+    stops after the item it is currently waiting for.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+    done = object()
+
+    def put(item):
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    def produce():
+        try:
+            for item in func(*args, **kwargs):
+                if stopped.is_set():
+                    break
+                put((item, None))
+        except BaseException as e:
+            put((done, e))
+        else:
+            put((done, None))
+
+    loop.run_in_executor(_blocking_executor, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+def get_cpu_executor() -> ProcessPoolExecutor:
+    """Return the shared process pool for CPU-bound work"""
+    global _cpu_executor
+
+    if _cpu_executor is None:
+        _cpu_executor = ProcessPoolExecutor(max_workers=settings.cpu_pool_size)
+    return _cpu_executor
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args) -> Any:
+    """Run a picklable CPU-bound call in the process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), func, *args)
+
+
+def shutdown_executors():
+    """Stop worker pools on application shutdown"""
+    global _cpu_executor
+
+    _blocking_executor.shutdown(wait=False, cancel_futures=True)
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+        _cpu_executor = None
@@ -9,30 +9,125 @@ class Settings(BaseSettings):
     gemini_api_key: str
     
     # Vector Database
+    vector_store: str = "qdrant"  # qdrant | local (embedded, no server)
     qdrant_url: str = "http://localhost:6333"
     qdrant_api_key: Optional[str] = None
+    qdrant_profile: str = "default"  # default | int8 | binary (quantized, vectors on disk)
+    # Unset values come from the profile
+    qdrant_on_disk: Optional[bool] = None
+    qdrant_hnsw_m: Optional[int] = None
+    qdrant_hnsw_ef_construct: Optional[int] = None
+    qdrant_hnsw_ef_search: Optional[int] = None
+    qdrant_oversampling: Optional[float] = None  # quantized candidates rescored per result
     
-    # Database
+    # Local vector index (VECTOR_STORE=local)
+    local_index_dir: str = "./vector_index"  # not under upload_dir, which is served publicly
+    local_index_mode: str = "auto"  # auto | flat (exact) | hnsw (needs hnswlib)
+    local_index_hnsw_threshold: int = 50000  # points before auto switches to HNSW
+    local_index_hnsw_m: int = 16
+    local_index_hnsw_ef_construction: int = 200
+    local_index_hnsw_ef_search: int = 128  # higher: better recall, slower queries
+    
+    # Database (sqlite:///... or postgresql+psycopg2://...)
     database_url: str = "sqlite:///./tutor_agent.db"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30  # seconds to wait for a pooled connection
+    db_pool_recycle: int = 1800  # seconds; PostgreSQL only
+    sqlite_busy_timeout: int = 5000  # ms to wait for a write lock
+    sqlite_mmap_size: int = 268435456  # 256MB
+    sqlite_cache_size_kb: int = 65536  # 64MB page cache per connection
     
     # Application
     debug: bool = True
     host: str = "0.0.0.0"
     port: int = 8000
     
+    # Worker pools
+    blocking_pool_size: int = 32  # threads for blocking I/O
+    cpu_pool_size: int = 2  # processes for document parsing
+    ingestion_workers: int = 2  # concurrent background ingestion jobs
+    
     # Upload
     upload_dir: str = "./uploads"
     max_upload_size: int = 10485760  # 10MB
+    max_batch_upload_size: int = 524288000  # 500MB per batch request (and per zip in it)
+    max_batch_files: int = 500
     
     # Vector store
     collection_name: str = "documents"
     embedding_model: str = "models/embedding-001"
     vector_size: int = 768
+    embedding_provider: str = "gemini"  # gemini | local | hash
+    
+    # Local embedding model (EMBEDDING_PROVIDER=local)
+    local_embedding_model: str = "sentence-transformers/all-mpnet-base-v2"  # 768 dimensions
+    local_embedding_device: str = "cpu"
+    local_embedding_batch_size: int = 64
+    local_embedding_threads: int = 0  # torch intra-op threads; 0 keeps the default
+    local_embedding_quantize: bool = False  # dynamic int8 quantization (CPU)
+    local_embedding_query_prefix: str = ""  # e.g. "query: " for E5 models
+    local_embedding_document_prefix: str = ""  # e.g. "passage: " for E5 models
+    
+    # Embedding pipeline
+    embedding_batch_size: int = 32
+    embedding_concurrency: int = 4
+    upsert_batch_size: int = 256
+    
+    # Embedding cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./embedding_cache.db"
+    embedding_cache_memory_items: int = 10000
+    embedding_cache_max_bytes: int = 536870912  # 512MB
+    
+    # LLM response cache
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 86400  # 1 day
+    llm_cache_max_bytes: int = 67108864  # 64MB
+    
+    # Quiz question pool
+    question_pool_enabled: bool = True
+    question_pool_target: int = 30  # questions kept per topic and difficulty
+    question_pool_low: int = 10  # refill below this
+    question_pool_batch: int = 10  # questions per generation call
+    question_pool_workers: int = 1
+    
+    # Spaced repetition (SM-2)
+    srs_initial_ease: float = 2.5
+    srs_min_ease: float = 1.3
+    srs_max_interval_days: float = 180.0
+    
+    # Study plan
+    study_hours_per_week: float = 6.0
+    study_new_topic_hours: float = 2.0
+    study_revision_hours: float = 1.0
+    study_weight_due: float = 3.0  # overdue revisions
+    study_weight_low_score: float = 2.0  # weak or unpracticed topics
+    study_weight_syllabus_order: float = 1.0  # earlier syllabus topics
+    study_weight_content: float = 1.0  # topics with enough study material
     
     # Chunking
     chunk_size: int = 400
     chunk_overlap: int = 50
     
+    # Retrieval
+    topic_chunks_limit: int = 10  # chunks materialized per topic mapping
+    
+    # Hybrid retrieval (BM25 keyword index fused with vector search)
+    hybrid_search_enabled: bool = True
+    lexical_index_dir: str = "./lexical_index"  # not under upload_dir, which is served publicly
+    hybrid_rrf_k: int = 60  # reciprocal rank fusion constant
+    hybrid_lexical_min_coverage: float = 1.0  # share of topic terms a keyword hit needs to count as relevant
+    hybrid_lexical_min_hits: int = 3  # relevant keyword hits that skip the embedding; 0 never skips
+    hybrid_lexical_max_score: float = 0.7  # relevance of the best keyword hit of a topic that isn't embedded
+    
+    # Reranking of retrieved chunks (MMR over their vectors, optional cross-encoder)
+    rerank_enabled: bool = True
+    rerank_candidates: int = 20  # hits per topic reranked before keeping the best
+    rerank_mmr_lambda: float = 0.7  # 1: relevance only, 0: diversity only
+    rerank_duplicate_threshold: float = 0.95  # drop chunks this similar to a higher-ranked one
+    rerank_cross_encoder_model: Optional[str] = None  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -29,7 +29,33 @@ class Document(Base):
     file_path = Column(String, nullable=False)
     upload_date = Column(DateTime, default=datetime.now)
     user_id = Column(Integer, ForeignKey("users.id"))
+    syllabus_id = Column(String, ForeignKey("syllabi.id"), index=True)  # optional; unset = all syllabi
     chunks_count = Column(Integer, default=0)
+    content_hash = Column(String, index=True)  # sha256 of file bytes
+
+
+class IngestionJob(Base):
+    """Background parse -> chunk -> embed -> upsert job for a document"""
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(String, primary_key=True)
+    document_id = Column(String, ForeignKey("documents.id"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    batch_id = Column(String, index=True)  # set for batch uploads
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    status = Column(String, default="queued", index=True)  # queued, running, completed, failed
+    stage = Column(String, default="parse")  # parse, chunk, embed, upsert, done
+    chunks_total = Column(Integer, default=0)
+    chunks_embedded = Column(Integer, default=0)
+    chunks_upserted = Column(Integer, default=0)
+    pages_count = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
 
 
 class Syllabus(Base):
@@ -40,7 +66,7 @@ class Syllabus(Base):
     course_name = Column(String)
     raw_text = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.now)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     
     # Relationships
     topics = relationship("Topic", back_populates="syllabus")
@@ -54,7 +80,7 @@ class Topic(Base):
     topic_id = Column(String, unique=True, index=True)
     name = Column(String, nullable=False)
     unit = Column(String)
-    syllabus_id = Column(String, ForeignKey("syllabi.id"))
+    syllabus_id = Column(String, ForeignKey("syllabi.id"), index=True)
     has_sufficient_content = Column(Boolean, default=False)
     
     # Relationships
@@ -62,9 +88,50 @@ class Topic(Base):
     mastery_records = relationship("UserTopicMastery", back_populates="topic")
 
 
+class TopicChunkMapping(Base):
+    """Materialized vector search result for a topic name"""
+    __tablename__ = "topic_chunk_mappings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    topic_key = Column(String, unique=True, index=True)  # normalized topic name
+    topic = Column(String, nullable=False)
+    confidence_score = Column(Float, default=0.0)
+    has_sufficient_content = Column(Boolean, default=False)
+    mapped_at = Column(DateTime, default=datetime.now)
+    
+    # Relationships
+    chunks = relationship(
+        "TopicChunk",
+        back_populates="mapping",
+        order_by="TopicChunk.rank",
+        cascade="all, delete-orphan"
+    )
+
+
+class TopicChunk(Base):
+    """One ranked chunk of a topic mapping"""
+    __tablename__ = "topic_chunks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    mapping_id = Column(Integer, ForeignKey("topic_chunk_mappings.id", ondelete="CASCADE"), index=True)
+    rank = Column(Integer, nullable=False)
+    chunk_id = Column(String, nullable=False)
+    text = Column(Text, nullable=False)
+    source = Column(String)
+    score = Column(Float, nullable=False)
+    chunk_metadata = Column("metadata", JSON)
+    
+    # Relationships
+    mapping = relationship("TopicChunkMapping", back_populates="chunks")
+
+
 class UserTopicMastery(Base):
     """User's mastery level for each topic"""
     __tablename__ = "user_topic_mastery"
+    __table_args__ = (
+        Index("ix_mastery_user_topic", "user_id", "topic_id"),
+        Index("ix_mastery_user_revision", "user_id", "next_revision"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -74,11 +141,31 @@ class UserTopicMastery(Base):
     last_practiced = Column(DateTime, default=datetime.now)
     next_revision = Column(DateTime)
     
+    # SM-2 scheduling state (see spaced_repetition.py)
+    ease_factor = Column(Float)
+    interval_days = Column(Float)
+    repetitions = Column(Integer)
+    
     # Relationships
     user = relationship("User", back_populates="topic_mastery")
     topic = relationship("Topic", back_populates="mastery_records")
 
 
+class UserProgressSummary(Base):
+    """Per-user dashboard aggregates, updated on every quiz submission"""
+    __tablename__ = "user_progress_summaries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
+    topics_practiced = Column(Integer, default=0)
+    score_sum = Column(Float, default=0.0)
+    score_histogram = Column(JSON)  # topic counts per 10-point score bucket
+    weak_topics = Column(JSON)  # [{topic_id, name, score}], weakest first
+    strong_topics = Column(JSON)  # [{topic_id, name, score}], strongest first
+    last_activity = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
 class SessionHistory(Base):
     """Teaching session history"""
     __tablename__ = "session_history"
@@ -104,6 +191,23 @@ class Quiz(Base):
     topic = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.now)
     questions_count = Column(Integer, default=0)
+    questions = Column(JSON)  # question, options, correct_answer, explanation
+
+
+class QuestionBankItem(Base):
+    """Pre-generated quiz question waiting to be served"""
+    __tablename__ = "question_bank"
+    __table_args__ = (
+        Index("ix_question_bank_pool", "topic_key", "difficulty", "content_version"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    topic_key = Column(String, nullable=False)  # normalized topic name
+    topic = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)
+    content_version = Column(String, nullable=False)  # hash of the chunks it came from
+    question = Column(JSON, nullable=False)  # question, options, correct_answer, explanation
+    created_at = Column(DateTime, default=datetime.now)
 
 
 class QuizAttempt(Base):
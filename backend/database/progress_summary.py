@@ -0,0 +1,179 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import Topic, UserProgressSummary, UserTopicMastery
+
+# Score thresholds used by the progress dashboard
+WEAK_SCORE = 60
+COMPLETED_SCORE = 70
+STRONG_SCORE = 80
+
+# Weak/strong topics listed on the dashboard
+AREAS_LIMIT = 5
+
+HISTOGRAM_BUCKETS = 10
+
+
+def score_bucket(score: float) -> int:
+    """Histogram bucket of a 0-100 score (10 points per bucket)"""
+    return min(max(int(score // 10), 0), HISTOGRAM_BUCKETS - 1)
+
+
+def bucket_count(summary: UserProgressSummary, low: float, high: float = 100) -> int:
+    """Topics whose score falls in [low, high); thresholds are multiples of 10"""
+    histogram = summary.score_histogram or [0] * HISTOGRAM_BUCKETS
+    end = HISTOGRAM_BUCKETS if high >= 100 else score_bucket(high)
+    return sum(histogram[score_bucket(low):end])
+
+
+def _is_weak(score: float) -> bool:
+    return score < WEAK_SCORE
+
+
+def _is_strong(score: float) -> bool:
+    return score >= STRONG_SCORE
+
+
+def _top_topics(db: Session, user_id: int, weak: bool) -> List[Dict[str, Any]]:
+    """Weakest (or strongest) AREAS_LIMIT topics, straight from mastery rows"""
+    score = UserTopicMastery.score
+    rows = db.query(UserTopicMastery.topic_id, Topic.name, score).join(
+        Topic, Topic.id == UserTopicMastery.topic_id
+    ).filter(
+        UserTopicMastery.user_id == user_id,
+        score < WEAK_SCORE if weak else score >= STRONG_SCORE
+    ).order_by(score.asc() if weak else score.desc()).limit(AREAS_LIMIT)
+
+    return [{"topic_id": topic_id, "name": name, "score": value} for topic_id, name, value in rows]
+
+
+def _update_area(
+    db: Session,
+    summary: UserProgressSummary,
+    topic: Topic,
+    score: float,
+    weak: bool
+) -> List[Dict[str, Any]]:
+    entries = summary.weak_topics if weak else summary.strong_topics
+    entries = entries or []
+    qualifies = _is_weak(score) if weak else _is_strong(score)
+
+    was_listed = any(entry['topic_id'] == topic.id for entry in entries)
+    entries = [entry for entry in entries if entry['topic_id'] != topic.id]
+    if qualifies:
+        entries.append({"topic_id": topic.id, "name": topic.name, "score": score})
+        entries.sort(key=lambda entry: entry['score'], reverse=not weak)
+    entries = entries[:AREAS_LIMIT]
+
+    # A listed topic that dropped out or to the last slot may have made
+    # room for an unlisted one, which only the mastery rows know about
+    if was_listed:
+        category = bucket_count(summary, 0, WEAK_SCORE) if weak else bucket_count(summary, STRONG_SCORE)
+        untracked = category - len(entries)
+        moved_last = bool(entries) and entries[-1]['topic_id'] == topic.id
+        if untracked > 0 and (len(entries) < AREAS_LIMIT or moved_last):
+            return _top_topics(db, summary.user_id, weak)
+    return entries
+
+
+def _locked_summary(db: Session, user_id: int) -> Optional[UserProgressSummary]:
+    # populate_existing: a summary already in the session is re-read under the lock
+    return db.query(UserProgressSummary).filter(
+        UserProgressSummary.user_id == user_id
+    ).populate_existing().with_for_update().first()
+
+
+def update_progress_summary(
+    db: Session,
+    user_id: int,
+    topic: Topic,
+    old_score: Optional[float],
+    new_score: float,
+    practiced_at: datetime
+):
+    """Apply one topic's mastery change to the user's summary (caller commits).
+
+    `old_score` is None for a topic practiced for the first time. Users
+    without a summary yet get one rebuilt from their mastery rows, which
+    must already include this change. The summary row stays locked until
+    the caller commits, so concurrent submissions apply their changes
+    one after the other (on SQLite the flush below already holds the
+    database's write lock).
+    """
+    # Sessions don't autoflush; queries below must see the new score
+    db.flush()
+
+    summary = _locked_summary(db, user_id)
+
+    if summary is None:
+        try:
+            with db.begin_nested():
+                rebuild_progress_summary(db, user_id)
+            return
+        except IntegrityError:
+            # A concurrent request built it first (without this change)
+            summary = _locked_summary(db, user_id)
+
+    histogram = list(summary.score_histogram or [0] * HISTOGRAM_BUCKETS)
+    if old_score is None:
+        summary.topics_practiced += 1
+        summary.score_sum += new_score
+    else:
+        summary.score_sum += new_score - old_score
+        histogram[score_bucket(old_score)] -= 1
+    histogram[score_bucket(new_score)] += 1
+    # JSON columns only persist on reassignment
+    summary.score_histogram = histogram
+
+    summary.weak_topics = _update_area(db, summary, topic, new_score, weak=True)
+    summary.strong_topics = _update_area(db, summary, topic, new_score, weak=False)
+
+    if summary.last_activity is None or practiced_at > summary.last_activity:
+        summary.last_activity = practiced_at
+
+
+def rebuild_progress_summary(db: Session, user_id: int) -> Optional[UserProgressSummary]:
+    """Recompute a user's summary from their mastery rows (caller commits).
+
+    Returns None (and removes any summary) when the user has not
+    practiced a topic yet.
+    """
+    rows = db.query(
+        UserTopicMastery.topic_id, Topic.name, UserTopicMastery.score, UserTopicMastery.last_practiced
+    ).join(Topic, Topic.id == UserTopicMastery.topic_id).filter(
+        UserTopicMastery.user_id == user_id
+    ).all()
+
+    summary = db.query(UserProgressSummary).filter(
+        UserProgressSummary.user_id == user_id
+    ).first()
+
+    if not rows:
+        if summary is not None:
+            db.delete(summary)
+        return None
+
+    if summary is None:
+        summary = UserProgressSummary(user_id=user_id)
+        db.add(summary)
+
+    histogram = [0] * HISTOGRAM_BUCKETS
+    for _, _, score, _ in rows:
+        histogram[score_bucket(score)] += 1
+
+    entries = [{"topic_id": topic_id, "name": name, "score": score} for topic_id, name, score, _ in rows]
+    weak = sorted((e for e in entries if _is_weak(e['score'])), key=lambda e: e['score'])
+    strong = sorted((e for e in entries if _is_strong(e['score'])), key=lambda e: e['score'], reverse=True)
+
+    summary.topics_practiced = len(rows)
+    summary.score_sum = sum(score for _, _, score, _ in rows)
+    summary.score_histogram = histogram
+    summary.weak_topics = weak[:AREAS_LIMIT]
+    summary.strong_topics = strong[:AREAS_LIMIT]
+    summary.last_activity = max(
+        (practiced for _, _, _, practiced in rows if practiced), default=None
+    )
+    return summary
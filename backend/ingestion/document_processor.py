@@ -1,93 +1,186 @@
 import fitz  # PyMuPDF
 from docx import Document as DocxDocument
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import re
+import hashlib
 from config import settings
 
+# (page number or None, text) pairs produced by the page readers
+Page = Tuple[Optional[int], str]
+
+WHITESPACE_RE = re.compile(r'\s+')
+SPECIAL_CHARS_RE = re.compile(r'[^\w\s.,!?;:()\-\[\]]')
+PAGE_MARKER_RE = re.compile(r'\[Page \d+\]')
+
+# Lines/paragraphs grouped into one block for formats without pages
+BLOCK_LINES = 200
+
+
+def text_fingerprint(text: str) -> str:
+    """Hash of text normalized for case, punctuation and whitespace"""
+    normalized = ' '.join(re.findall(r'\w+', text.lower()))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def _blocks(lines: Iterable[str]) -> Iterator[Page]:
+    """Group lines into page-less text blocks"""
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= BLOCK_LINES:
+            yield None, "\n".join(block)
+            block = []
+    if block:
+        yield None, "\n".join(block)
+
 
 class DocumentProcessor:
-    """Process documents and extract text"""
+    """Process documents and extract text.
+    
+    Extraction is a generator pipeline: pages are read one at a time,
+    cleaned individually and fed into a sliding word window, so memory
+    stays bounded by one page plus one chunk regardless of document size.
+    """
     
     def __init__(self):
         self.chunk_size = settings.chunk_size
         self.chunk_overlap = settings.chunk_overlap
     
-    def process_pdf(self, file_path: str) -> str:
-        """Extract text from PDF"""
-        text = ""
+    def iter_pdf_pages(self, file_path: str) -> Iterator[Page]:
+        """Yield (page number, text) for each PDF page"""
         doc = fitz.open(file_path)
+        try:
+            for page_num, page in enumerate(doc):
+                yield page_num + 1, page.get_text()
+        finally:
+            doc.close()
+    
+    def iter_docx_pages(self, file_path: str) -> Iterator[Page]:
+        """Yield blocks of DOCX paragraphs"""
+        doc = DocxDocument(file_path)
+        yield from _blocks(para.text for para in doc.paragraphs)
+    
+    def iter_txt_pages(self, file_path: str) -> Iterator[Page]:
+        """Yield blocks of lines from a text file"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from _blocks(f)
+    
+    def iter_pages(self, file_path: str, filename: str) -> Iterator[Page]:
+        """Yield cleaned (page number, text) pairs based on file type"""
+        if filename.lower().endswith('.pdf'):
+            pages = self.iter_pdf_pages(file_path)
+        elif filename.lower().endswith('.docx'):
+            pages = self.iter_docx_pages(file_path)
+        elif filename.lower().endswith('.txt'):
+            pages = self.iter_txt_pages(file_path)
+        else:
+            raise ValueError(f"Unsupported file type: {filename}")
         
-        for page_num, page in enumerate(doc):
-            page_text = page.get_text()
-            text += f"\n[Page {page_num + 1}]\n{page_text}"
-        
-        doc.close()
-        return self.clean_text(text)
+        for page_num, text in pages:
+            cleaned = self.clean_text(text)
+            if cleaned:
+                yield page_num, cleaned
+    
+    def process_pdf(self, file_path: str) -> str:
+        """Extract text from PDF"""
+        return ' '.join(self.clean_text(text) for _, text in self.iter_pdf_pages(file_path))
     
     def process_docx(self, file_path: str) -> str:
         """Extract text from DOCX"""
-        doc = DocxDocument(file_path)
-        text = "\n".join([para.text for para in doc.paragraphs])
-        return self.clean_text(text)
+        return ' '.join(self.clean_text(text) for _, text in self.iter_docx_pages(file_path))
     
     def process_txt(self, file_path: str) -> str:
         """Extract text from TXT"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-        return self.clean_text(text)
+        return ' '.join(self.clean_text(text) for _, text in self.iter_txt_pages(file_path))
     
     def clean_text(self, text: str) -> str:
         """Clean extracted text"""
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = WHITESPACE_RE.sub(' ', text)
         
         # Remove special characters (keep basic punctuation)
-        text = re.sub(r'[^\w\s.,!?;:()\-\[\]]', '', text)
+        text = SPECIAL_CHARS_RE.sub('', text)
         
         # Remove page numbers patterns
-        text = re.sub(r'\[Page \d+\]', '', text)
+        text = PAGE_MARKER_RE.sub('', text)
         
         return text.strip()
     
-    def chunk_text(self, text: str, source: str) -> List[Dict[str, Any]]:
-        """Split text into overlapping chunks"""
-        words = text.split()
-        chunks = []
+    def _make_chunk(self, words: List[str], pages: List[Optional[int]], source: str, index: int) -> Dict[str, Any]:
+        chunk_text = ' '.join(words)
+        known_pages = [page for page in (pages[0], pages[-1]) if page is not None]
+        
+        return {
+            "chunk_id": f"{source}_chunk_{index}",
+            "text": chunk_text,
+            "text_hash": text_fingerprint(chunk_text),
+            "source": source,
+            "metadata": {
+                "chunk_index": index,
+                "word_count": len(words),
+                "page": known_pages[0] if known_pages else None,
+                "page_end": known_pages[-1] if known_pages else None
+            }
+        }
+    
+    def iter_chunks(self, pages: Iterable[Page], source: str) -> Iterator[Dict[str, Any]]:
+        """Split a stream of pages into overlapping word-window chunks"""
+        step = self.chunk_size - self.chunk_overlap
+        words: List[str] = []
+        word_pages: List[Optional[int]] = []
+        index = 0
+        
+        def emit(end: int):
+            nonlocal index
+            chunk = self._make_chunk(words[:end], word_pages[:end], source, index)
+            if len(chunk['text'].strip()) > 50:  # Minimum chunk size
+                index += 1
+                return chunk
+            return None
         
-        for i in range(0, len(words), self.chunk_size - self.chunk_overlap):
-            chunk_words = words[i:i + self.chunk_size]
-            chunk_text = ' '.join(chunk_words)
+        for page_num, text in pages:
+            page_words = text.split()
+            words.extend(page_words)
+            word_pages.extend([page_num] * len(page_words))
             
-            if len(chunk_text.strip()) > 50:  # Minimum chunk size
-                chunk_id = f"{source}_chunk_{len(chunks)}"
-                chunks.append({
-                    "chunk_id": chunk_id,
-                    "text": chunk_text,
-                    "source": source,
-                    "metadata": {
-                        "chunk_index": len(chunks),
-                        "word_count": len(chunk_words)
-                    }
-                })
+            # Emit every full window, keeping the overlap for the next one
+            while len(words) >= self.chunk_size:
+                chunk = emit(self.chunk_size)
+                if chunk:
+                    yield chunk
+                del words[:step]
+                del word_pages[:step]
         
-        return chunks
+        # Trailing partial window
+        if words:
+            chunk = emit(len(words))
+            if chunk:
+                yield chunk
+    
+    def chunk_text(self, text: str, source: str) -> List[Dict[str, Any]]:
+        """Split text into overlapping chunks"""
+        return list(self.iter_chunks([(None, text)], source))
+    
+    def iter_document(self, file_path: str, filename: str) -> Iterator[Dict[str, Any]]:
+        """Stream chunks of a document page by page"""
+        return self.iter_chunks(self.iter_pages(file_path, filename), filename)
     
     def process_document(self, file_path: str, filename: str) -> List[Dict[str, Any]]:
         """Process document and return chunks"""
-        # Determine file type
-        if filename.lower().endswith('.pdf'):
-            text = self.process_pdf(file_path)
-        elif filename.lower().endswith('.docx'):
-            text = self.process_docx(file_path)
-        elif filename.lower().endswith('.txt'):
-            text = self.process_txt(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {filename}")
+        return list(self.iter_document(file_path, filename))
+    
+    def process_document_with_stats(self, file_path: str, filename: str) -> Tuple[List[Dict[str, Any]], int]:
+        """Process document and return (chunks, pages read)"""
+        pages_read = 0
         
-        # Chunk the text
-        chunks = self.chunk_text(text, filename)
+        def counted(pages: Iterable[Page]) -> Iterator[Page]:
+            nonlocal pages_read
+            for page in pages:
+                pages_read += 1
+                yield page
         
-        return chunks
+        chunks = list(self.iter_chunks(counted(self.iter_pages(file_path, filename)), filename))
+        return chunks, pages_read
 
 
 # Singleton instance
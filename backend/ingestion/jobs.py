@@ -0,0 +1,382 @@
+import asyncio
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from concurrency import run_blocking, run_cpu_bound
+from database.db import SessionLocal
+from database.models import Document, IngestionJob
+from ingestion.document_processor import document_processor
+from vectorstore.qdrant_client import (
+    add_chunks_to_vectorstore, chunk_point_id, delete_document_chunks, get_existing_point_ids
+)
+from vectorstore.topic_chunks import invalidate_topic_chunks
+
+STAGES = ["parse", "chunk", "embed", "upsert"]
+
+
+def create_ingestion_job(db, document: Document, batch_id: Optional[str] = None) -> IngestionJob:
+    """Create a queued job for a saved document (caller commits)"""
+    job = IngestionJob(
+        id=str(uuid.uuid4()),
+        document_id=document.id,
+        user_id=document.user_id,
+        batch_id=batch_id,
+        filename=document.filename,
+        file_path=document.file_path,
+        status="queued",
+        stage="parse"
+    )
+    db.add(job)
+    return job
+
+
+def chunk_owner(db, document_id: str) -> Dict[str, Any]:
+    """Payload fields that tie a document's chunks to their owner"""
+    document = db.query(Document).filter(Document.id == document_id).first()
+    return {
+        "document_id": document_id,
+        "user_id": document.user_id if document else None,
+        "syllabus_id": document.syllabus_id if document else None
+    }
+
+
+def describe_job(job: IngestionJob) -> Dict[str, Any]:
+    """Per-stage progress for the status endpoint"""
+    current = STAGES.index(job.stage) if job.stage in STAGES else len(STAGES)
+    stages = {}
+
+    for index, stage in enumerate(STAGES):
+        if index < current or job.status == "completed":
+            state = "done"
+        elif index == current:
+            state = "failed" if job.status == "failed" else job.status
+        else:
+            state = "pending"
+        stages[stage] = {"status": state}
+
+    stages["embed"].update(done=job.chunks_embedded, total=job.chunks_total)
+    stages["upsert"].update(done=job.chunks_upserted, total=job.chunks_total)
+
+    return {
+        "job_id": job.id,
+        "document_id": job.document_id,
+        "filename": job.filename,
+        "status": job.status,
+        "stage": job.stage,
+        "stages": stages,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at
+    }
+
+
+def describe_batch(batch_id: str, jobs: List[IngestionJob]) -> Dict[str, Any]:
+    """Aggregate progress and throughput of a batch"""
+    completed = [job for job in jobs if job.status == "completed"]
+    failed = [job for job in jobs if job.status == "failed"]
+    
+    if any(job.status == "running" for job in jobs):
+        status = "running"
+    elif len(completed) + len(failed) < len(jobs):
+        status = "queued"
+    else:
+        status = "completed_with_errors" if failed else "completed"
+    
+    started = [job.started_at for job in jobs if job.started_at]
+    finished = [job.finished_at or datetime.now() for job in jobs if job.started_at]
+    elapsed = (max(finished) - min(started)).total_seconds() if started else 0.0
+    
+    pages = sum(job.pages_count or 0 for job in completed)
+    chunks = sum(job.chunks_upserted or 0 for job in jobs)
+    
+    return {
+        "batch_id": batch_id,
+        "status": status,
+        "files_total": len(jobs),
+        "files_completed": len(completed),
+        "files_failed": len(failed),
+        "pages": pages,
+        "chunks": chunks,
+        "elapsed_seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 2) if elapsed else 0.0,
+        "chunks_per_second": round(chunks / elapsed, 2) if elapsed else 0.0,
+        "jobs": [describe_job(job) for job in jobs]
+    }
+
+
+class IngestionWorker:
+    """Pool of asyncio workers that run ingestion jobs in the background.
+
+    Job state lives in the ingestion_jobs table, so jobs that were queued
+    or running when the process stopped are picked up again on start.
+    Point IDs are derived from (document_id, chunk_id), which makes a
+    resumed upsert idempotent and lets it skip chunks already stored.
+    
+    Batches parse all their files in the process pool at once and feed
+    one shared embedding pipeline as each parse finishes.
+    """
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = concurrency or settings.ingestion_workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def start(self):
+        """Spawn workers and requeue unfinished jobs"""
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.concurrency)
+        ]
+
+        for job_id in await run_blocking(self._unfinished_job_ids):
+            self.submit(job_id)
+
+    async def stop(self):
+        """Cancel workers; interrupted jobs resume on next start"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job_id: str):
+        """Queue a job for processing"""
+        self._queue.put_nowait(job_id)
+    
+    def submit_batch(self, job_ids: List[str]):
+        """Queue several jobs to be processed as one batch"""
+        self._queue.put_nowait(list(job_ids))
+
+    def _unfinished_job_ids(self) -> List[str]:
+        db = SessionLocal()
+        try:
+            jobs = db.query(IngestionJob.id).filter(
+                IngestionJob.status.in_(["queued", "running"])
+            ).order_by(IngestionJob.created_at).all()
+            return [job_id for (job_id,) in jobs]
+        finally:
+            db.close()
+
+    async def _work(self):
+        # Cleanup errors can mask the cancellation, so stop() also sets a flag
+        while not self._stopping:
+            item = await self._queue.get()
+            try:
+                if isinstance(item, list):
+                    await self.run_batch(item)
+                else:
+                    await self.run_job(item)
+            except Exception as e:
+                print(f"❌ Ingestion job {item} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def run_job(self, job_id: str):
+        """Run one job through parse -> chunk -> embed -> upsert"""
+        db = SessionLocal()
+        try:
+            job = await run_blocking(
+                lambda: db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+            )
+            if not job or job.status in ("completed", "failed"):
+                return
+
+            resumed = job.attempts > 0
+            job.status = "running"
+            job.attempts += 1
+            job.started_at = job.started_at or datetime.now()
+            await run_blocking(db.commit)
+
+            try:
+                await self._process(db, job, resumed)
+            except Exception as e:
+                await self._abort(db, job, str(e))
+        finally:
+            db.close()
+
+    async def _set_stage(self, db, job: IngestionJob, stage: str):
+        job.stage = stage
+        await run_blocking(db.commit)
+
+    async def _process(self, db, job: IngestionJob, resumed: bool):
+        # Parse + chunk, streamed page by page in the process pool
+        await self._set_stage(db, job, "parse")
+        chunks, job.pages_count = await run_cpu_bound(
+            document_processor.process_document_with_stats, job.file_path, job.filename
+        )
+
+        await self._set_stage(db, job, "chunk")
+        owner = await run_blocking(chunk_owner, db, job.document_id)
+        for chunk in chunks:
+            chunk.update(owner)
+
+        job.chunks_total = len(chunks)
+        await self._set_stage(db, job, "embed")
+
+        # Skip chunks a previous attempt already stored
+        already_stored = 0
+        if resumed and chunks:
+            existing = await get_existing_point_ids([chunk_point_id(c) for c in chunks])
+            remaining = [c for c in chunks if chunk_point_id(c) not in existing]
+            already_stored = len(chunks) - len(remaining)
+            chunks = remaining
+
+        async def progress(embedded: int, stored: int):
+            job.chunks_embedded = already_stored + embedded
+            job.chunks_upserted = already_stored + stored
+            if job.chunks_embedded >= job.chunks_total:
+                job.stage = "upsert"
+            await run_blocking(db.commit)
+
+        # Embed + upsert (pipelined)
+        stored = await add_chunks_to_vectorstore(chunks, progress=progress)
+
+        await self._finish(db, job, already_stored + stored)
+
+    async def run_batch(self, job_ids: List[str]):
+        """Parse a batch of documents concurrently into one embedding stream"""
+        db = SessionLocal()
+        try:
+            jobs = await run_blocking(
+                lambda: db.query(IngestionJob).filter(
+                    IngestionJob.id.in_(job_ids),
+                    IngestionJob.status.in_(["queued", "running"])
+                ).all()
+            )
+            if not jobs:
+                return
+
+            now = datetime.now()
+            for job in jobs:
+                job.status = "running"
+                job.attempts += 1
+                job.started_at = job.started_at or now
+            await run_blocking(db.commit)
+
+            by_document = {job.document_id: job for job in jobs}
+            owners = await run_blocking(
+                lambda: {document_id: chunk_owner(db, document_id) for document_id in by_document}
+            )
+            failed = set()
+            stored = defaultdict(int)
+
+            async def parsed_chunks():
+                parses = {
+                    asyncio.ensure_future(run_cpu_bound(
+                        document_processor.process_document_with_stats,
+                        job.file_path, job.filename
+                    )): job
+                    for job in jobs
+                }
+                pending = set(parses)
+
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        job = parses[future]
+                        try:
+                            chunks, job.pages_count = future.result()
+                        except Exception as e:
+                            failed.add(job.id)
+                            await self._abort(db, job, str(e))
+                            continue
+
+                        job.chunks_total = len(chunks)
+                        job.stage = "embed"
+                        await run_blocking(db.commit)
+
+                        for chunk in chunks:
+                            chunk.update(owners[job.document_id])
+                            yield chunk
+
+            async def on_stored(chunks: List[Dict[str, Any]]):
+                for chunk in chunks:
+                    stored[chunk['document_id']] += 1
+                for document_id in {chunk['document_id'] for chunk in chunks}:
+                    job = by_document[document_id]
+                    job.chunks_embedded = job.chunks_upserted = stored[document_id]
+                await run_blocking(db.commit)
+
+            try:
+                await add_chunks_to_vectorstore(parsed_chunks(), on_stored=on_stored)
+            except Exception as e:
+                for job in jobs:
+                    if job.id not in failed:
+                        await self._abort(db, job, str(e))
+                return
+
+            for job in jobs:
+                if job.id not in failed:
+                    await self._finish(db, job, stored[job.document_id])
+        finally:
+            db.close()
+
+    async def _finish(self, db, job: IngestionJob, chunks_stored: int):
+        """Complete the job, or drop its chunks if the document is gone"""
+        document_id = job.document_id
+        if not await run_blocking(self._complete, db, job, chunks_stored):
+            await self._drop_chunks(job, document_id)
+
+    def _complete(self, db, job: IngestionJob, chunks_stored: int) -> bool:
+        """Mark the job completed; False (and the job failed) if its document was deleted meanwhile"""
+        document = db.query(Document).filter(Document.id == job.document_id).first()
+        if document is None:
+            job.status = "failed"
+            job.error = "Document was deleted during ingestion"
+            job.document_id = None
+            job.finished_at = datetime.now()
+            db.commit()
+            return False
+
+        document.chunks_count = chunks_stored
+        if chunks_stored:
+            # New chunks can change the ranking of every topic of their owner
+            invalidate_topic_chunks(db, document.user_id)
+
+        job.status = "completed"
+        job.stage = "done"
+        # Repeated chunks are dropped during upsert, so the final total can shrink
+        job.chunks_total = job.chunks_embedded = job.chunks_upserted = chunks_stored
+        job.finished_at = datetime.now()
+        db.commit()
+        return True
+
+    async def _abort(self, db, job: IngestionJob, error: str):
+        """Fail the job and remove any chunks it already stored"""
+        document_id = job.document_id
+        await run_blocking(self._fail, db, job, error)
+        await self._drop_chunks(job, document_id)
+
+    async def _drop_chunks(self, job: IngestionJob, document_id: str):
+        try:
+            await delete_document_chunks(document_id)
+        except Exception as e:
+            print(f"⚠️ Could not remove stored chunks of {job.filename}: {e}")
+
+    def _fail(self, db, job: IngestionJob, error: str):
+        """Mark the job failed and drop the half-ingested document"""
+        job.status = "failed"
+        job.error = error
+        job.finished_at = datetime.now()
+
+        document = db.query(Document).filter(Document.id == job.document_id).first()
+        if document:
+            # The failed job outlives the document, so it stops referencing it first
+            job.document_id = None
+            db.flush()
+            db.delete(document)
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+
+        db.commit()
+
+
+# Singleton instance
+ingestion_worker = IngestionWorker()
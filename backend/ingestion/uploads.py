@@ -0,0 +1,163 @@
+import hashlib
+import os
+import zipfile
+from typing import Callable, Dict, Optional, Tuple
+
+import aiofiles
+from fastapi import UploadFile
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Bytes read from the upload per iteration
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Multipart boundaries, headers and form fields around the file bytes
+MULTIPART_OVERHEAD = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File exceeds maximum upload size of {max_size} bytes")
+
+
+async def save_upload(file: UploadFile, file_path: str, max_size: int) -> Tuple[int, str]:
+    """Stream an upload to disk in fixed-size chunks.
+
+    Hashes while writing and stops as soon as `max_size` is crossed, so
+    memory use stays at one chunk regardless of file size. Returns
+    (size in bytes, sha256 hex digest); the partial file is removed on
+    any error.
+    """
+    # Reject early when the multipart parser already knows the size
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLarge(max_size)
+
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(file_path, "wb") as out:
+            while True:
+                block = await file.read(UPLOAD_CHUNK_SIZE)
+                if not block:
+                    break
+
+                size += len(block)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+
+                hasher.update(block)
+                await out.write(block)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return size, hasher.hexdigest()
+
+
+def extract_zip_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, file_path: str, max_size: int) -> Tuple[int, str]:
+    """Copy one archive member to disk with the same limits as save_upload.
+
+    Blocking; run it through run_blocking. The declared size is checked
+    first and the actual bytes are counted too, so a lying header cannot
+    inflate past `max_size`.
+    """
+    if info.file_size > max_size:
+        raise UploadTooLarge(max_size)
+
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        with archive.open(info) as source, open(file_path, "wb") as out:
+            while True:
+                block = source.read(UPLOAD_CHUNK_SIZE)
+                if not block:
+                    break
+
+                size += len(block)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+
+                hasher.update(block)
+                out.write(block)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return size, hasher.hexdigest()
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimit:
+    """ASGI middleware bounding upload request bodies before they are parsed.
+
+    FastAPI spools the whole multipart body to memory/temp files before an
+    endpoint (and save_upload's streaming check) runs. Requests to the
+    paths in `limits` (path -> callable giving the byte limit, read per
+    request so settings changes apply) are rejected with 413 up front
+    when Content-Length exceeds the limit, and cut off as soon as the
+    bytes received do, for chunked or understated bodies.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, Callable[[], int]]):
+        self.app = app
+        self.limits = limits
+
+    def _limit(self, scope: Scope) -> Optional[int]:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return None
+        limit = self.limits.get(scope["path"].rstrip("/"))
+        return limit() if limit else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self._limit(scope)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_size = limit + MULTIPART_OVERHEAD
+        too_large = JSONResponse(
+            {"detail": f"Request exceeds maximum upload size of {limit} bytes"}, status_code=413
+        )
+        headers = dict(scope["headers"])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > max_size:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    exceeded = True
+                    raise RequestTooLarge()
+            return message
+
+        async def guarded_send(message: Message):
+            # The body is read before any response starts; once it is cut
+            # off, the app's error response (e.g. FastAPI's 400 for an
+            # unparsable form) is replaced by the 413 below
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await too_large(scope, receive, send)
@@ -12,6 +12,7 @@ if __name__ == "__main__":
     print("Tables created:")
     print("  - users")
     print("  - documents")
+    print("  - ingestion_jobs")
     print("  - syllabi")
     print("  - topics")
     print("  - user_topic_mastery")
@@ -7,7 +7,14 @@ import os
 from config import settings
 from api import documents, syllabus, lessons, quiz, progress
 from database.db import init_db
-from vectorstore.qdrant_client import init_vector_db
+from concurrency import shutdown_executors
+from ingestion.jobs import ingestion_worker
+from ingestion.uploads import UploadSizeLimit
+from agents.question_bank import question_bank_worker
+from vectorstore import qdrant_client
+from vectorstore.qdrant_client import init_vector_db, close_vector_db
+from vectorstore.embedding_cache import get_embedding_cache
+from agents.llm_cache import get_llm_cache
 
 
 @asynccontextmanager
@@ -27,10 +34,21 @@ async def lifespan(app: FastAPI):
     await init_vector_db()
     print("✅ Vector database initialized")
     
+    # Start background ingestion workers (resumes unfinished jobs)
+    await ingestion_worker.start()
+    print("✅ Ingestion workers started")
+    
+    # Start quiz question pool refills
+    await question_bank_worker.start()
+    
     yield
     
     # Shutdown
     print("👋 Shutting down...")
+    await ingestion_worker.stop()
+    await question_bank_worker.stop()
+    await close_vector_db()
+    shutdown_executors()
 
 
 app = FastAPI(
@@ -49,6 +67,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads before their bodies are spooled
+app.add_middleware(UploadSizeLimit, limits={
+    "/api/documents/upload": lambda: settings.max_upload_size,
+    "/api/documents/upload/batch": lambda: settings.max_batch_upload_size,
+})
+
 # Mount static files
 if os.path.exists(settings.upload_dir):
     app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
@@ -77,6 +101,17 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Cache hit/miss and keyword search counters"""
+    lexical_index = qdrant_client.lexical_index
+    return {
+        "embedding_cache": get_embedding_cache().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "lexical_index": lexical_index.stats() if lexical_index else None
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -25,6 +25,46 @@ class DocumentUploadResponse(BaseModel):
     filename: str
     chunks_created: int
     message: str
+    job_id: Optional[str] = None
+    status: str = "completed"
+
+
+class IngestionJobStatus(BaseModel):
+    """Status of a background ingestion job"""
+    job_id: str
+    document_id: str
+    filename: str
+    status: str
+    stage: str
+    stages: Dict[str, Dict[str, Any]]
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class BatchUploadResponse(BaseModel):
+    """Response after a batch upload"""
+    batch_id: str
+    jobs: List[DocumentUploadResponse]
+    files_queued: int
+    duplicates: int
+    rejected: List[Dict[str, str]]
+
+
+class BatchIngestionStatus(BaseModel):
+    """Aggregate progress and throughput of a batch upload"""
+    batch_id: str
+    status: str
+    files_total: int
+    files_completed: int
+    files_failed: int
+    pages: int
+    chunks: int
+    elapsed_seconds: float
+    pages_per_second: float
+    chunks_per_second: float
+    jobs: List[IngestionJobStatus]
 
 
 class SyllabusUnit(BaseModel):
@@ -88,6 +128,7 @@ class TeachingRequest(BaseModel):
     topic: str
     user_message: Optional[str] = None
     session_id: Optional[str] = None
+    syllabus_id: Optional[str] = None  # search the syllabus's documents, as /syllabus/map does
 
 
 class TeachingResponse(BaseModel):
@@ -111,6 +152,7 @@ class QuizGenerateRequest(BaseModel):
     topic: str
     num_questions: int = 5
     difficulty: str = "medium"
+    syllabus_id: Optional[str] = None  # search the syllabus's documents, as /syllabus/map does
 
 
 class QuizGenerateResponse(BaseModel):
@@ -161,3 +203,11 @@ class StudyPlan(BaseModel):
     topics_to_study: List[str]
     topics_to_revise: List[str]
     estimated_hours: float
+
+
+class StudyPlanSchedule(BaseModel):
+    """Multi-week study plan within a weekly time budget"""
+    weeks: List[StudyPlan]
+    hours_per_week: float
+    total_hours: float
+    unscheduled_topics: int  # candidates that didn't fit the budget
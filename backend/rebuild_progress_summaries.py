@@ -0,0 +1,71 @@
+"""
+Progress summary rebuild script
+Recomputes user_progress_summaries from user_topic_mastery.
+Run with --check to only report summaries that drifted.
+"""
+
+import argparse
+
+from sqlalchemy import distinct
+
+from database.db import SessionLocal, init_db
+from database.models import UserProgressSummary, UserTopicMastery
+from database.progress_summary import rebuild_progress_summary
+
+SUMMARY_FIELDS = [
+    "topics_practiced", "score_histogram", "weak_topics", "strong_topics", "last_activity"
+]
+
+
+def _snapshot(summary):
+    if summary is None:
+        return None
+    values = {field: getattr(summary, field) for field in SUMMARY_FIELDS}
+    values["score_sum"] = round(summary.score_sum or 0.0, 4)
+    # Compare scores rather than ids; tied topics may be listed in either order
+    for field in ("weak_topics", "strong_topics"):
+        values[field] = [round(entry["score"], 4) for entry in values[field] or []]
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    parser.add_argument("--user-id", type=int, help="only this user")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.user_id is not None:
+            user_ids = [args.user_id]
+        else:
+            user_ids = {user_id for (user_id,) in db.query(distinct(UserTopicMastery.user_id))}
+            user_ids |= {user_id for (user_id,) in db.query(UserProgressSummary.user_id)}
+            user_ids = sorted(user_ids)
+
+        drifted = 0
+        for user_id in user_ids:
+            stored = _snapshot(db.query(UserProgressSummary).filter(
+                UserProgressSummary.user_id == user_id
+            ).first())
+            expected = _snapshot(rebuild_progress_summary(db, user_id))
+
+            if stored != expected:
+                drifted += 1
+                print(f"⚠️ User {user_id}: summary drifted")
+                print(f"   stored:   {stored}")
+                print(f"   expected: {expected}")
+
+        if args.check:
+            db.rollback()
+            print(f"✅ Checked {len(user_ids)} users, {drifted} drifted")
+        else:
+            db.commit()
+            print(f"✅ Rebuilt {len(user_ids)} progress summaries ({drifted} had drifted)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
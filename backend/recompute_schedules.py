@@ -0,0 +1,122 @@
+"""
+Spaced-repetition schedule recompute script
+Replays every quiz attempt through SM-2 and rewrites the ease, interval,
+repetitions and next_revision of each user_topic_mastery row. Run it
+after changing the SRS_* settings or to backfill rows scheduled by the
+old fixed 7-day rule.
+"""
+
+import argparse
+import time
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import bindparam, func, select, update
+
+from database.db import SessionLocal, init_db
+from database.models import Quiz, QuizAttempt, Topic, UserTopicMastery
+from spaced_repetition import replay_reviews
+
+FETCH_SIZE = 50000
+UPDATE_BATCH_SIZE = 10000
+
+
+def _key(user_ids: np.ndarray, topic_ids: np.ndarray) -> np.ndarray:
+    return (user_ids.astype(np.int64) << 32) | topic_ids.astype(np.int64)
+
+
+def load_attempts(db):
+    """User, topic and score arrays plus the list of attempt times, ordered for replay"""
+    # Quizzes reference topics by name; attempts count for the first match,
+    # as in /quiz/submit
+    topic_ids = select(
+        Topic.name, func.min(Topic.id).label("topic_id")
+    ).group_by(Topic.name).subquery()
+
+    statement = select(
+        QuizAttempt.user_id, topic_ids.c.topic_id, QuizAttempt.score, QuizAttempt.attempted_at
+    ).join(Quiz, Quiz.id == QuizAttempt.quiz_id).join(
+        topic_ids, topic_ids.c.name == Quiz.topic
+    ).order_by(QuizAttempt.user_id, topic_ids.c.topic_id, QuizAttempt.attempted_at)
+
+    columns = [[], [], [], []]
+    # Core execution: rows don't need ORM processing
+    result = db.connection().execute(statement.execution_options(yield_per=FETCH_SIZE))
+    for rows in result.partitions():
+        for column, values in zip(columns, zip(*rows)):
+            column.extend(values)
+
+    user_ids, topic_ids, scores, attempted_at = columns
+    return (
+        np.array(user_ids, dtype=np.int64),
+        np.array(topic_ids, dtype=np.int64),
+        np.array(scores, dtype=np.float64),
+        attempted_at
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="compute without writing")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        user_ids, topic_ids, scores, attempted_at = load_attempts(db)
+        loaded = time.perf_counter()
+
+        # Attempts are sorted by (user, topic), so unique keys stay in order
+        keys, groups = np.unique(_key(user_ids, topic_ids), return_inverse=True)
+        ease, interval, repetitions = replay_reviews(groups, scores, len(keys))
+
+        # Each history's last attempt, which its next revision counts from
+        ends = np.flatnonzero(np.r_[groups[1:] != groups[:-1], True]) if len(groups) else []
+        last_review = [attempted_at[end] for end in ends]
+        replayed = time.perf_counter()
+
+        # Match mastery rows to replayed histories
+        mastery = np.array(
+            db.query(UserTopicMastery.id, UserTopicMastery.user_id, UserTopicMastery.topic_id).all(),
+            dtype=np.int64
+        ).reshape(-1, 3)
+        mastery_keys = _key(mastery[:, 1], mastery[:, 2])
+        if len(keys):
+            slots = np.minimum(np.searchsorted(keys, mastery_keys), len(keys) - 1)
+            matched = np.flatnonzero(keys[slots] == mastery_keys)
+        else:
+            slots = matched = np.array([], dtype=np.int64)
+
+        updates = [
+            {
+                "row_id": int(mastery[row, 0]),
+                "ease_factor": float(ease[slot]),
+                "interval_days": float(interval[slot]),
+                "repetitions": int(repetitions[slot]),
+                "next_revision": last_review[slot] + timedelta(days=float(interval[slot]))
+                if last_review[slot] else None
+            }
+            for row, slot in zip(matched, slots[matched])
+        ]
+
+        if not args.dry_run:
+            statement = update(UserTopicMastery.__table__).where(
+                UserTopicMastery.id == bindparam("row_id")
+            )
+            for i in range(0, len(updates), UPDATE_BATCH_SIZE):
+                db.connection().execute(statement, updates[i:i + UPDATE_BATCH_SIZE])
+            db.commit()
+        written = time.perf_counter()
+
+        print(f"✅ Replayed {len(scores)} attempts for {len(keys)} user/topic pairs "
+              f"(load {loaded - start:.2f}s, replay {replayed - loaded:.2f}s)")
+        action = "Would update" if args.dry_run else "Updated"
+        print(f"   {action} {len(updates)} of {len(mastery)} mastery rows "
+              f"({written - replayed:.2f}s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
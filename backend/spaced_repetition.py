@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from typing import Tuple
+
+import numpy as np
+
+from config import settings
+from database.models import UserTopicMastery
+
+
+def review_quality(score) -> np.ndarray:
+    """SM-2 recall quality (0-5) from a 0-100 quiz score"""
+    return np.clip(np.rint(np.asarray(score, dtype=np.float64) / 20), 0, 5).astype(np.int8)
+
+
+def sm2_step_batch(
+    ease: np.ndarray,
+    interval: np.ndarray,
+    repetitions: np.ndarray,
+    quality: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Apply one review to many SM-2 states at once.
+
+    Quality >= 3 is a successful recall: the interval goes 1 day, 6 days,
+    then grows by the ease factor. A failed recall restarts at 1 day.
+    Ease moves with quality and never drops below `srs_min_ease`.
+    """
+    passed = quality >= 3
+
+    grown = np.where(repetitions == 0, 1.0, np.where(repetitions == 1, 6.0, interval * ease))
+    new_interval = np.minimum(np.where(passed, grown, 1.0), settings.srs_max_interval_days)
+    new_repetitions = np.where(passed, repetitions + 1, 0)
+
+    miss = 5 - quality.astype(np.float64)
+    new_ease = np.maximum(ease + 0.1 - miss * (0.08 + miss * 0.02), settings.srs_min_ease)
+
+    return new_ease, new_interval, new_repetitions
+
+
+def sm2_step(ease: float, interval: float, repetitions: int, score: float) -> Tuple[float, float, int]:
+    """Apply one quiz score to a single SM-2 state"""
+    new_ease, new_interval, new_repetitions = sm2_step_batch(
+        np.array([ease]), np.array([interval]), np.array([repetitions]), review_quality([score])
+    )
+    return float(new_ease[0]), float(new_interval[0]), int(new_repetitions[0])
+
+
+def schedule_review(mastery: UserTopicMastery, score: float, reviewed_at: datetime):
+    """Advance a mastery row's schedule after a quiz on its topic"""
+    ease, interval, repetitions = sm2_step(
+        mastery.ease_factor or settings.srs_initial_ease,
+        mastery.interval_days or 0.0,
+        mastery.repetitions or 0,
+        score
+    )
+    mastery.ease_factor = ease
+    mastery.interval_days = interval
+    mastery.repetitions = repetitions
+    mastery.next_revision = reviewed_at + timedelta(days=interval)
+
+
+def replay_reviews(
+    groups: np.ndarray,
+    scores: np.ndarray,
+    group_count: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """SM-2 states after replaying every review history from scratch.
+
+    `groups` is the dense (user, topic) id of each review, sorted by
+    group and then by time. Reviews are processed one round at a time:
+    round k applies every history's k-th review in a single vectorized
+    step, so the Python loop runs as often as the longest history.
+    """
+    ease = np.full(group_count, settings.srs_initial_ease)
+    interval = np.zeros(group_count)
+    repetitions = np.zeros(group_count, dtype=np.int64)
+    if len(groups) == 0:
+        return ease, interval, repetitions
+
+    quality = review_quality(scores)
+
+    # Position of each review within its history
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    lengths = np.diff(np.r_[starts, len(groups)])
+    rounds = np.arange(len(groups)) - np.repeat(starts, lengths)
+
+    order = np.argsort(rounds, kind='stable')
+    bounds = np.searchsorted(rounds[order], np.arange(lengths.max() + 1))
+
+    for k in range(lengths.max()):
+        reviews = order[bounds[k]:bounds[k + 1]]
+        g = groups[reviews]
+        ease[g], interval[g], repetitions[g] = sm2_step_batch(
+            ease[g], interval[g], repetitions[g], quality[reviews]
+        )
+
+    return ease, interval, repetitions
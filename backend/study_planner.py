@@ -0,0 +1,170 @@
+import heapq
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Iterator, NamedTuple
+
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from database.models import Syllabus, Topic, UserTopicMastery
+from database.progress_summary import COMPLETED_SCORE
+
+FETCH_SIZE = 1000
+
+
+class PlanItem(NamedTuple):
+    """A topic competing for time in the plan"""
+    name: str
+    revision: bool
+    hours: float
+    earliest_week: int  # 1-based; revisions wait until they are due
+    priority: float
+
+
+def _ranked_topics(user_id: int):
+    """Topics of the user's syllabi and practiced topics, with syllabus position"""
+    practiced_ids = select(UserTopicMastery.topic_id).where(UserTopicMastery.user_id == user_id)
+    syllabus_ids = select(Syllabus.id).where(Syllabus.user_id == user_id)
+
+    return select(
+        Topic.id,
+        Topic.name,
+        Topic.has_sufficient_content,
+        func.row_number().over(partition_by=Topic.syllabus_id, order_by=Topic.id).label("position"),
+        func.count().over(partition_by=Topic.syllabus_id).label("syllabus_size")
+    ).where(or_(Topic.syllabus_id.in_(syllabus_ids), Topic.id.in_(practiced_ids))).subquery()
+
+
+def _base_priority(position: int, syllabus_size: int, has_content: bool) -> float:
+    # Earlier syllabus topics first; topics with study material first
+    order = 1 - (position - 1) / syllabus_size
+    return settings.study_weight_syllabus_order * order + \
+        settings.study_weight_content * bool(has_content)
+
+
+def _new_topics(db: Session, user_id: int, ranked) -> Iterator[PlanItem]:
+    """Topics the user hasn't practiced (anti-join against mastery)"""
+    studied = exists().where(
+        UserTopicMastery.user_id == user_id,
+        UserTopicMastery.topic_id == ranked.c.id
+    )
+    rows = db.execute(
+        select(ranked.c.name, ranked.c.has_sufficient_content, ranked.c.position, ranked.c.syllabus_size)
+        .where(~studied)
+        .execution_options(yield_per=FETCH_SIZE)
+    )
+    for name, has_content, position, syllabus_size in rows:
+        # Unpracticed topics count as fully weak
+        yield PlanItem(
+            name=name,
+            revision=False,
+            hours=settings.study_new_topic_hours,
+            earliest_week=1,
+            priority=settings.study_weight_low_score + _base_priority(position, syllabus_size, has_content)
+        )
+
+
+def _revision_topics(db: Session, user_id: int, ranked, now: datetime, weeks: int) -> Iterator[PlanItem]:
+    """Practiced topics that are weak or due within the plan's horizon"""
+    rows = db.execute(
+        select(
+            ranked.c.name, ranked.c.has_sufficient_content, ranked.c.position, ranked.c.syllabus_size,
+            UserTopicMastery.score, UserTopicMastery.next_revision, UserTopicMastery.interval_days
+        )
+        .join(ranked, ranked.c.id == UserTopicMastery.topic_id)
+        .where(
+            UserTopicMastery.user_id == user_id,
+            or_(
+                UserTopicMastery.score < COMPLETED_SCORE,
+                and_(
+                    UserTopicMastery.next_revision.is_not(None),
+                    UserTopicMastery.next_revision < now + timedelta(days=weeks * 7)
+                )
+            )
+        )
+        .execution_options(yield_per=FETCH_SIZE)
+    )
+    for name, has_content, position, syllabus_size, score, next_revision, interval_days in rows:
+        weakness = (100 - (score or 0)) / 100
+        due_in = (next_revision - now).total_seconds() / 86400 if next_revision else 0.0
+
+        if due_in <= 0 or score < COMPLETED_SCORE:
+            earliest_week = 1
+            # How overdue, relative to the interval it was scheduled with
+            dueness = min(max(-due_in, 0) / max(interval_days or 1.0, 1.0), 1.0)
+        else:
+            earliest_week = 1 + int(due_in // 7)
+            dueness = 0.0
+
+        yield PlanItem(
+            name=name,
+            revision=True,
+            hours=settings.study_revision_hours,
+            earliest_week=earliest_week,
+            priority=settings.study_weight_due * dueness +
+            settings.study_weight_low_score * weakness +
+            _base_priority(position, syllabus_size, has_content)
+        )
+
+
+def build_study_plan(db: Session, user_id: int, weeks: int = 4, hours_per_week: float = None) -> dict:
+    """Rank new and revision topics and fit them into weekly time budgets.
+
+    Candidates are streamed from SQL and only the `capacity` highest
+    priorities are kept in a heap, so memory and sorting don't grow with
+    the size of the user's syllabi. Each kept topic goes into the first
+    week (from the one it is due in) with enough hours left.
+    """
+    hours_per_week = hours_per_week or settings.study_hours_per_week
+    now = datetime.now()
+    ranked = _ranked_topics(user_id)
+
+    shortest = min(settings.study_new_topic_hours, settings.study_revision_hours)
+    capacity = int(weeks * hours_per_week // shortest)
+
+    total = 0
+
+    def counted(items: Iterator[PlanItem]) -> Iterator[PlanItem]:
+        nonlocal total
+        for item in items:
+            total += 1
+            yield item
+
+    candidates = heapq.nlargest(
+        capacity,
+        counted(chain(_revision_topics(db, user_id, ranked, now, weeks), _new_topics(db, user_id, ranked))),
+        key=lambda item: item.priority
+    )
+
+    remaining = [hours_per_week] * weeks
+    plan = [{"topics_to_study": [], "topics_to_revise": [], "hours": 0.0} for _ in range(weeks)]
+    scheduled = 0
+
+    for item in candidates:
+        week = next(
+            (w for w in range(item.earliest_week - 1, weeks) if remaining[w] >= item.hours),
+            None
+        )
+        if week is None:
+            continue
+
+        remaining[week] -= item.hours
+        scheduled += 1
+        plan[week]["topics_to_revise" if item.revision else "topics_to_study"].append(item.name)
+        plan[week]["hours"] += item.hours
+
+    return {
+        "weeks": [
+            {
+                "week_number": number,
+                "topics_to_study": week["topics_to_study"],
+                "topics_to_revise": week["topics_to_revise"],
+                "estimated_hours": week["hours"]
+            }
+            for number, week in enumerate(plan, 1)
+        ],
+        "hours_per_week": hours_per_week,
+        "total_hours": sum(week["hours"] for week in plan),
+        "unscheduled_topics": total - scheduled
+    }
@@ -0,0 +1,73 @@
+import asyncio
+
+from backfill_chunk_owners import backfill_legacy_chunks
+from vectorstore.lexical import LexicalIndex
+from vectorstore.store import ChunkFilter, LocalVectorStore
+
+
+def legacy_payload(source: str, index: int) -> dict:
+    # Payload format of chunks stored before they carried a document_id
+    return {"chunk_id": f"{source}_chunk_{index}", "text": f"routing table lookup {index}", "source": source,
+            "metadata": {}}
+
+
+def test_legacy_chunks_are_attached_by_filename(tmp_path):
+    async def run():
+        vector_store = LocalVectorStore(str(tmp_path / "vectors"), dimensions=3, mode="flat")
+        lexical_index = LexicalIndex(str(tmp_path / "lexical.db"))
+        await vector_store.init()
+        await lexical_index.init()
+        try:
+            await vector_store.upsert([
+                ("00000000-0000-0000-0000-000000000001", [1.0, 0.0, 0.0], legacy_payload("notes.pdf", 0)),
+                ("00000000-0000-0000-0000-000000000002", [0.0, 1.0, 0.0], legacy_payload("notes.pdf", 1)),
+                ("00000000-0000-0000-0000-000000000003", [0.0, 0.0, 1.0], legacy_payload("shared.pdf", 0)),
+            ])
+            documents = [
+                ("doc-notes", "notes.pdf", 7, "syllabus-a"),
+                ("doc-shared-1", "shared.pdf", 7, None),
+                ("doc-shared-2", "shared.pdf", 8, None),
+            ]
+
+            attached, unmatched = await backfill_legacy_chunks(documents, vector_store, lexical_index, batch_size=2)
+            assert (attached, unmatched) == (2, 1)
+
+            owned = ChunkFilter(user_id=7, syllabus_id="syllabus-a")
+            hits = await vector_store.search([1.0, 1.0, 0.0], 10, owned)
+            assert sorted(hit.payload["chunk_id"] for hit in hits) == ["notes.pdf_chunk_0", "notes.pdf_chunk_1"]
+            assert all(hit.payload["document_id"] == "doc-notes" for hit in hits)
+
+            # Ambiguous filenames stay unowned, so no user's search sees them
+            assert await vector_store.search([0.0, 0.0, 1.0], 10, ChunkFilter(user_id=8)) == []
+
+            keyword_hits = (await lexical_index.search_batch(["routing table"], 10, owned))[0]
+            assert len(keyword_hits) == 2
+
+            # Deleting the document now removes its formerly legacy chunks
+            await vector_store.delete(ChunkFilter(document_ids=("doc-notes",)))
+            assert await vector_store.search([1.0, 1.0, 0.0], 10, owned) == []
+        finally:
+            await lexical_index.close()
+            await vector_store.close()
+
+    asyncio.run(run())
+
+
+def test_dry_run_writes_nothing(tmp_path):
+    async def run():
+        vector_store = LocalVectorStore(str(tmp_path / "vectors"), dimensions=3, mode="flat")
+        await vector_store.init()
+        try:
+            await vector_store.upsert([
+                ("00000000-0000-0000-0000-000000000001", [1.0, 0.0, 0.0], legacy_payload("notes.pdf", 0)),
+            ])
+            counts = await backfill_legacy_chunks(
+                [("doc-notes", "notes.pdf", 7, None)], vector_store, dry_run=True
+            )
+            assert counts == (1, 0)
+            page, _ = await vector_store.scroll(10)
+            assert "document_id" not in page[0][1]
+        finally:
+            await vector_store.close()
+
+    asyncio.run(run())
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import settings
+
+
+def cache_key(model: str, task_type: str, text: str) -> str:
+    """Content address for an embedding"""
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return f"{model}:{task_type}:{digest}"
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: in-memory LRU in front of SQLite.
+
+    Vectors are stored as float32 blobs keyed by (model, task_type,
+    sha256(text)). The memory tier is bounded by entry count, the disk
+    tier by total vector bytes; both evict least recently used first.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_items: int = 10000,
+        max_disk_bytes: int = 512 * 1024 * 1024
+    ):
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            self._open(path)
+
+    def _open(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        self._disk_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def _select_in(self, query: str, keys) -> List[tuple]:
+        """Run `query WHERE key IN (...)` in bounded batches"""
+        keys = list(keys)
+        rows = []
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows.extend(self._conn.execute(f"{query} WHERE key IN ({placeholders})", batch))
+        return rows
+
+    def _remember(self, key: str, vector: List[float]):
+        """Insert into the memory tier, evicting the oldest entries"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_disk(self):
+        """Drop least recently used rows until under 90% of the byte budget"""
+        target = int(self.max_disk_bytes * 0.9)
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_access LIMIT 500"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                self._disk_bytes -= size
+                self.evictions += 1
+                if self._disk_bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Look up vectors for keys, None where missing"""
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        disk_lookup = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    disk_lookup.append(i)
+
+            if disk_lookup and self._conn is not None:
+                found = {
+                    key: array('f', blob).tolist()
+                    for key, blob in self._select_in(
+                        "SELECT key, vector FROM embeddings", {keys[i] for i in disk_lookup}
+                    )
+                }
+
+                if found:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+                    self._conn.commit()
+
+                still_missing = []
+                for i in disk_lookup:
+                    vector = found.get(keys[i])
+                    if vector is not None:
+                        results[i] = vector
+                        self._remember(keys[i], vector)
+                        self.disk_hits += 1
+                    else:
+                        still_missing.append(i)
+                disk_lookup = still_missing
+
+            self.misses += len(disk_lookup)
+
+        return results
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]):
+        """Store vectors in both tiers"""
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+
+            if self._conn is None:
+                return
+
+            now = time.time()
+            rows = {}
+            for key, vector in zip(keys, vectors):
+                blob = array('f', vector).tobytes()
+                rows[key] = (key, blob, len(blob), now)
+
+            existing = {key for (key,) in self._select_in("SELECT key FROM embeddings", rows)}
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                list(rows.values())
+            )
+            self._disk_bytes += sum(row[2] for key, row in rows.items() if key not in existing)
+            self._evict_disk()
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_items": len(self._memory),
+            "disk_bytes": self._disk_bytes
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the shared embedding cache configured in settings"""
+    global _cache
+
+    if _cache is None:
+        _cache = EmbeddingCache(
+            path=settings.embedding_cache_path or None,
+            memory_items=settings.embedding_cache_memory_items,
+            max_disk_bytes=settings.embedding_cache_max_bytes
+        )
+    return _cache
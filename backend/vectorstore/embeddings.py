@@ -0,0 +1,261 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from typing import List, Optional
+
+import google.generativeai as genai
+from config import settings
+from .embedding_cache import EmbeddingCache, cache_key, get_embedding_cache
+
+# Configure Gemini
+genai.configure(api_key=settings.gemini_api_key)
+
+
+class EmbeddingProvider:
+    """Base class for embedding backends"""
+
+    model_name: str = ""
+    dimensions: Optional[int] = None  # None when only the API knows
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of document texts"""
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single search query"""
+        raise NotImplementedError
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of search queries"""
+        return [self.embed_query(text) for text in texts]
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the Gemini embedding API"""
+
+    def __init__(self, model_name: str = None):
+        self.model_name = model_name or settings.embedding_model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one request"""
+        if not texts:
+            return []
+
+        result = genai.embed_content(
+            model=self.model_name,
+            content=texts,
+            task_type="retrieval_document"
+        )
+        return result['embedding']
+
+    def embed_query(self, text: str) -> List[float]:
+        result = genai.embed_content(
+            model=self.model_name,
+            content=text,
+            task_type="retrieval_query"
+        )
+        return result['embedding']
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of queries in one request"""
+        if not texts:
+            return []
+
+        result = genai.embed_content(
+            model=self.model_name,
+            content=texts,
+            task_type="retrieval_query"
+        )
+        return result['embedding']
+
+
+class SentenceTransformerEmbeddingProvider(EmbeddingProvider):
+    """Local CPU/GPU embeddings from a sentence-transformers model.
+
+    No network calls or rate limits, so ingestion is bounded by local
+    compute. Encoding is serialized with a lock: the model already uses
+    `local_embedding_threads` threads per batch, and concurrent batches
+    would only oversubscribe the CPU. `quantize` applies dynamic int8
+    quantization to the model's linear layers (CPU only).
+    """
+
+    def __init__(
+        self,
+        model_name: str = None,
+        device: str = None,
+        batch_size: int = None,
+        threads: int = None,
+        quantize: bool = None
+    ):
+        try:
+            import torch
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_PROVIDER=local requires sentence-transformers "
+                "(pip install sentence-transformers)"
+            ) from e
+
+        name = model_name or settings.local_embedding_model
+        threads = threads if threads is not None else settings.local_embedding_threads
+        quantize = quantize if quantize is not None else settings.local_embedding_quantize
+
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.model = SentenceTransformer(name, device=device or settings.local_embedding_device)
+        if quantize:
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        self.batch_size = batch_size or settings.local_embedding_batch_size
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+        # Quantized vectors differ slightly, so they get their own cache keys
+        self.model_name = f"local/{name}" + ("-int8" if quantize else "")
+        self._lock = threading.Lock()
+
+    def _encode(self, texts: List[str], prefix: str) -> List[List[float]]:
+        if not texts:
+            return []
+
+        with self._lock:
+            vectors = self.model.encode(
+                [prefix + text for text in texts],
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts, settings.local_embedding_document_prefix)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text], settings.local_embedding_query_prefix)[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts, settings.local_embedding_query_prefix)
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """Deterministic offline embedder for tests and benchmarks.
+
+    Hashes word tokens into a fixed number of buckets, so texts sharing
+    words get similar vectors. `latency` simulates a network round trip
+    per call.
+    """
+
+    def __init__(self, dimensions: int = None, latency: float = 0.0):
+        self.dimensions = dimensions or settings.vector_size
+        self.latency = latency
+        self.model_name = f"hash-{self.dimensions}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r'\w+', text.lower()):
+            digest = hashlib.md5(token.encode('utf-8')).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """Wraps a provider with the content-addressed embedding cache"""
+
+    def __init__(self, provider: EmbeddingProvider, cache: EmbeddingCache):
+        self.provider = provider
+        self.cache = cache
+        self.model_name = provider.model_name
+        self.dimensions = provider.dimensions
+
+    def _embed_cached(self, texts: List[str], task_type: str, embed) -> List[List[float]]:
+        keys = [cache_key(self.model_name, task_type, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = embed([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            self.cache.put_many([keys[i] for i in missing], computed)
+
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_cached(texts, "retrieval_document", self.provider.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = cache_key(self.model_name, "retrieval_query", text)
+        vector = self.cache.get_many([key])[0]
+
+        if vector is None:
+            vector = self.provider.embed_query(text)
+            self.cache.put_many([key], [vector])
+
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_cached(texts, "retrieval_query", self.provider.embed_queries)
+
+
+_provider: Optional[EmbeddingProvider] = None
+
+
+def create_embedding_provider(name: str = None) -> EmbeddingProvider:
+    """Build the embedding provider configured in settings"""
+    name = (name or settings.embedding_provider).lower()
+
+    if name == "gemini":
+        return GeminiEmbeddingProvider()
+    if name == "local":
+        return SentenceTransformerEmbeddingProvider()
+    if name == "hash":
+        return HashEmbeddingProvider()
+
+    raise ValueError(f"Unknown embedding provider: {name}")
+
+
+def validate_vector_size(provider: EmbeddingProvider):
+    """Fail fast when the model's output size doesn't match the collection"""
+    if provider.dimensions is not None and provider.dimensions != settings.vector_size:
+        raise ValueError(
+            f"Embedding model {provider.model_name} produces {provider.dimensions}-dimensional "
+            f"vectors but VECTOR_SIZE is {settings.vector_size}"
+        )
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Return the active embedding provider, creating it on first use"""
+    global _provider
+
+    if _provider is None:
+        _provider = create_embedding_provider()
+        validate_vector_size(_provider)
+        if settings.embedding_cache_enabled:
+            _provider = CachedEmbeddingProvider(_provider, get_embedding_cache())
+    return _provider
+
+
+def set_embedding_provider(provider: EmbeddingProvider):
+    """Swap the active embedding provider (e.g. a fake in tests)"""
+    global _provider
+    _provider = provider
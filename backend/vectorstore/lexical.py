@@ -0,0 +1,244 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from config import settings
+from concurrency import run_blocking
+from .store import ChunkFilter, require_filter, sql_where
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this "
+    "to vs was were which with what how why when where who".split()
+)
+
+
+def _fold(token: str) -> str:
+    # Plural folding, enough for "routers" to match "router"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("sses"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, plural-folded terms of a text, without stopwords"""
+    return [_fold(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalHit(NamedTuple):
+    """A BM25-scored keyword match"""
+    id: str
+    score: float
+    payload: Dict[str, Any]
+    coverage: float  # share of the query's distinct terms the chunk contains
+
+
+class LexicalIndex:
+    """BM25 inverted index of chunk texts in SQLite.
+
+    Chunks are added as they are stored in the vector store, under the
+    same point IDs and with the same filter fields. Every chunk has one
+    posting (term, chunk row, term frequency) per distinct term; a query
+    scores only the postings of its own terms, in one SQL statement.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._count = 0  # chunks
+        self._total_length = 0  # terms over all chunks
+
+        self.searches = 0
+        self.keyword_only = 0  # searches answered without an embedding
+
+    async def init(self):
+        await run_blocking(self._open)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, length INTEGER NOT NULL, "
+            "user_id INTEGER, document_id TEXT, syllabus_id TEXT, payload TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, row INTEGER NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term, row)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_postings_row ON postings (row)")
+        for field in ("user_id", "document_id", "syllabus_id"):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_chunks_{field} ON chunks ({field})")
+        self._conn.commit()
+
+        self._count, self._total_length = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks"
+        ).fetchone()
+
+    async def close(self):
+        await run_blocking(self._close)
+
+    def _close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _remove_rows(self, rows: List[int]):
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(f"DELETE FROM postings WHERE row IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM chunks WHERE row IN ({placeholders})", batch)
+
+    async def add(self, chunks: List[Tuple[str, Dict[str, Any]]]):
+        """Index (point ID, payload) pairs, replacing chunks already indexed"""
+        if chunks:
+            await run_blocking(self._add, chunks)
+
+    def _add(self, chunks: List[Tuple[str, Dict[str, Any]]]):
+        terms = [Counter(tokenize(payload.get('text', ''))) for _, payload in chunks]
+
+        with self._lock:
+            ids = [point_id for point_id, _ in chunks]
+            replaced = []
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                replaced.extend(self._conn.execute(
+                    f"SELECT row, length FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch
+                ))
+            self._remove_rows([row for row, _ in replaced])
+            self._count -= len(replaced)
+            self._total_length -= sum(length for _, length in replaced)
+
+            for (point_id, payload), counts in zip(chunks, terms):
+                length = sum(counts.values())
+                row = self._conn.execute(
+                    "INSERT INTO chunks (id, length, user_id, document_id, syllabus_id, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        point_id, length, payload.get('user_id'), payload.get('document_id'),
+                        payload.get('syllabus_id'), json.dumps(payload)
+                    )
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO postings (term, row, tf) VALUES (?, ?, ?)",
+                    [(term, row, tf) for term, tf in counts.items()]
+                )
+                self._count += 1
+                self._total_length += length
+            self._conn.commit()
+
+    async def delete(self, chunk_filter: ChunkFilter):
+        """Remove every chunk matching the filter"""
+        require_filter(chunk_filter)
+        await run_blocking(self._delete, chunk_filter)
+
+    def _delete(self, chunk_filter: ChunkFilter):
+        with self._lock:
+            where, params = sql_where(chunk_filter)
+            removed = self._conn.execute(f"SELECT row, length FROM chunks WHERE {where}", params).fetchall()
+            self._remove_rows([row for row, _ in removed])
+            self._count -= len(removed)
+            self._total_length -= sum(length for _, length in removed)
+            self._conn.commit()
+
+    async def set_payload(self, chunk_filter: ChunkFilter, payload: Dict[str, Any]):
+        """Merge `payload` into every chunk matching the filter"""
+        require_filter(chunk_filter)
+        await run_blocking(self._set_payload, chunk_filter, payload)
+
+    def _set_payload(self, chunk_filter: ChunkFilter, payload: Dict[str, Any]):
+        with self._lock:
+            where, params = sql_where(chunk_filter)
+            stored_rows = self._conn.execute(f"SELECT row, payload FROM chunks WHERE {where}", params).fetchall()
+            updates = []
+            for row, stored in stored_rows:
+                merged = {**json.loads(stored), **payload}
+                updates.append((
+                    merged.get('user_id'), merged.get('document_id'), merged.get('syllabus_id'),
+                    json.dumps(merged), row
+                ))
+            self._conn.executemany(
+                "UPDATE chunks SET user_id = ?, document_id = ?, syllabus_id = ?, payload = ? WHERE row = ?",
+                updates
+            )
+            self._conn.commit()
+
+    async def search_batch(
+        self, queries: List[str], limit: int, chunk_filter: Optional[ChunkFilter] = None
+    ) -> List[List[LexicalHit]]:
+        if not queries:
+            return []
+        return await run_blocking(self._search_batch, queries, limit, chunk_filter)
+
+    def _search_batch(
+        self, queries: List[str], limit: int, chunk_filter: Optional[ChunkFilter]
+    ) -> List[List[LexicalHit]]:
+        with self._lock:
+            return [self._search(query, limit, chunk_filter) for query in queries]
+
+    def _search(self, query: str, limit: int, chunk_filter: Optional[ChunkFilter]) -> List[LexicalHit]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self._count:
+            return []
+
+        # Robertson-Sparck Jones IDF, floored at zero by the +1
+        weights = []
+        for term in terms:
+            df = self._conn.execute("SELECT COUNT(*) FROM postings WHERE term = ?", (term,)).fetchone()[0]
+            if df:
+                weights.append((term, math.log(1 + (self._count - df + 0.5) / (df + 0.5))))
+        if not weights:
+            return []
+
+        where, params = sql_where(chunk_filter) if chunk_filter else ("", [])
+        average_length = self._total_length / self._count or 1
+        rows = self._conn.execute(
+            f"WITH q (term, idf) AS (VALUES {','.join(['(?, ?)'] * len(weights))}) "
+            "SELECT c.id, c.payload, "
+            "SUM(q.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * c.length / ?))) AS score, "
+            "COUNT(*) AS matched "
+            "FROM q JOIN postings p ON p.term = q.term JOIN chunks c ON c.row = p.row "
+            + (f"WHERE {where} " if where else "")
+            + "GROUP BY c.row ORDER BY score DESC LIMIT ?",
+            [value for weight in weights for value in weight]
+            + [self.k1, self.k1, self.b, self.b, average_length]
+            + params + [limit]
+        ).fetchall()
+
+        return [
+            LexicalHit(point_id, score, json.loads(payload), matched / len(terms))
+            for point_id, payload, score, matched in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and how often keyword hits alone answered a search"""
+        return {
+            "chunks": self._count,
+            "searches": self.searches,
+            "keyword_only": self.keyword_only,
+            "keyword_only_rate": round(self.keyword_only / self.searches, 4) if self.searches else 0.0
+        }
+
+
+def lexical_index_path(collection_name: str = None) -> str:
+    """SQLite file of the keyword index for a collection"""
+    return os.path.join(settings.lexical_index_dir, f"{collection_name or settings.collection_name}.db")
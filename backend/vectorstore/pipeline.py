@@ -0,0 +1,158 @@
+import asyncio
+from itertools import islice
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable,
+    Iterator, List, Optional, Tuple, Union
+)
+
+from config import settings
+from concurrency import run_blocking
+from .embeddings import EmbeddingProvider, get_embedding_provider
+
+EmbeddedChunk = Tuple[Dict[str, Any], List[float]]
+UpsertFn = Callable[[List[EmbeddedChunk]], Awaitable[None]]
+ProgressFn = Callable[[int, int], Awaitable[None]]  # (embedded, stored)
+ReuseFn = Callable[[List[Dict[str, Any]]], Awaitable[List[Optional[List[float]]]]]
+
+
+Chunks = Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of at most `size` items"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+async def aiterate(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    """Iterate a sync or async iterable asynchronously"""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def abatched(items: Union[Iterable[Any], AsyncIterable[Any]], size: int) -> AsyncIterator[List[Any]]:
+    """Async version of batched() accepting sync or async iterables"""
+    if not hasattr(items, '__aiter__'):
+        for batch in batched(items, size):
+            yield batch
+        return
+
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class EmbeddingPipeline:
+    """Embed chunks in concurrent batches and upsert them in slices.
+
+    Chunks are pulled lazily from the input, grouped into batches of
+    `batch_size`, and at most `max_concurrency` batches are embedded at
+    once. Embedded chunks are handed to the upsert callback in slices of
+    `upsert_batch_size` as soon as enough of them are ready.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = None,
+        max_concurrency: int = None,
+        upsert_batch_size: int = None
+    ):
+        self.batch_size = batch_size or settings.embedding_batch_size
+        self.max_concurrency = max_concurrency or settings.embedding_concurrency
+        self.upsert_batch_size = upsert_batch_size or settings.upsert_batch_size
+
+    async def _embed_batch(
+        self,
+        provider: EmbeddingProvider,
+        batch: List[Dict[str, Any]],
+        reuse: Optional[ReuseFn] = None
+    ) -> List[EmbeddedChunk]:
+        """Embed one batch off the event loop, skipping reusable vectors"""
+        vectors = await reuse(batch) if reuse else [None] * len(batch)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            texts = [batch[i]['text'] for i in missing]
+            computed = await run_blocking(provider.embed_documents, texts)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+
+        return list(zip(batch, vectors))
+
+    async def run(
+        self,
+        chunks: Chunks,
+        upsert: UpsertFn,
+        provider: EmbeddingProvider = None,
+        progress: Optional[ProgressFn] = None,
+        reuse: Optional[ReuseFn] = None
+    ) -> int:
+        """Embed and upsert all chunks, returning the number stored.
+
+        `chunks` may be an async iterable, e.g. fed by parsers finishing
+        at different times; batches then fill across documents.
+        `reuse` may return already known vectors for a batch (None where
+        unknown); only the rest are sent to the embedding provider.
+        """
+        provider = provider or get_embedding_provider()
+        pending = set()
+        ready: List[EmbeddedChunk] = []
+        embedded = 0
+        stored = 0
+
+        async def drain(done) -> None:
+            nonlocal embedded, stored
+            for task in done:
+                batch = task.result()
+                ready.extend(batch)
+                embedded += len(batch)
+
+            while len(ready) >= self.upsert_batch_size:
+                await upsert(ready[:self.upsert_batch_size])
+                stored += self.upsert_batch_size
+                del ready[:self.upsert_batch_size]
+
+            if progress:
+                await progress(embedded, stored)
+
+        try:
+            async for batch in abatched(chunks, self.batch_size):
+                if len(pending) >= self.max_concurrency:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    await drain(done)
+
+                pending.add(asyncio.ensure_future(self._embed_batch(provider, batch, reuse)))
+
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                await drain(done)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if ready:
+            await upsert(ready)
+            stored += len(ready)
+            if progress:
+                await progress(embedded, stored)
+
+        return stored
+
+
+# Singleton instance
+embedding_pipeline = EmbeddingPipeline()
@@ -1,96 +1,173 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from typing import List, Dict, Any
-import google.generativeai as genai
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Set
 from config import settings
+from concurrency import run_blocking
+from .embeddings import get_embedding_provider
+from .lexical import LexicalHit, LexicalIndex, lexical_index_path
+from .pipeline import embedding_pipeline, aiterate, batched, Chunks, EmbeddedChunk, ProgressFn
+from .rerank import rerank_hits
+from .store import ChunkFilter, SearchHit, VectorStore, create_vector_store
+import asyncio
 import uuid
 
-# Configure Gemini
-genai.configure(api_key=settings.gemini_api_key)
+import numpy as np
 
-# Global client
-qdrant_client = None
+# Global store (Qdrant or the embedded local index, see VECTOR_STORE)
+vector_store: Optional[VectorStore] = None
+
+# Keyword index fused with vector search (None when HYBRID_SEARCH_ENABLED is off)
+lexical_index: Optional[LexicalIndex] = None
+
+# Minimum similarity for a chunk to count as relevant to a topic
+RELEVANCE_THRESHOLD = 0.5
 
 
 async def init_vector_db():
-    """Initialize Qdrant vector database"""
-    global qdrant_client
-    
-    qdrant_client = QdrantClient(url=settings.qdrant_url)
-    
-    # Create collection if it doesn't exist
-    collections = qdrant_client.get_collections().collections
-    collection_names = [c.name for c in collections]
-    
-    if settings.collection_name not in collection_names:
-        qdrant_client.create_collection(
-            collection_name=settings.collection_name,
-            vectors_config=VectorParams(
-                size=settings.vector_size,
-                distance=Distance.COSINE
-            )
-        )
+    """Initialize the vector store selected by VECTOR_STORE"""
+    global vector_store, lexical_index
+    
+    vector_store = create_vector_store()
+    await vector_store.init()
+    
+    if settings.hybrid_search_enabled:
+        lexical_index = LexicalIndex(lexical_index_path())
+        await lexical_index.init()
+    
+    # Load (and size-check) the embedding model at startup, not on first use
+    get_embedding_provider()
+
+
+async def close_vector_db():
+    """Flush and close the vector store"""
+    global vector_store, lexical_index
+    
+    if vector_store is not None:
+        await vector_store.close()
+        vector_store = None
+    if lexical_index is not None:
+        await lexical_index.close()
+        lexical_index = None
 
 
 def get_embedding(text: str) -> List[float]:
-    """Generate embedding using Gemini"""
-    result = genai.embed_content(
-        model=settings.embedding_model,
-        content=text,
-        task_type="retrieval_document"
-    )
-    return result['embedding']
+    """Generate document embedding with the active provider"""
+    return get_embedding_provider().embed_documents([text])[0]
 
 
 def get_query_embedding(text: str) -> List[float]:
-    """Generate query embedding using Gemini"""
-    result = genai.embed_content(
-        model=settings.embedding_model,
-        content=text,
-        task_type="retrieval_query"
-    )
-    return result['embedding']
+    """Generate query embedding with the active provider"""
+    return get_embedding_provider().embed_query(text)
 
 
-async def add_chunks_to_vectorstore(chunks: List[Dict[str, Any]]) -> int:
-    """Add document chunks to vector store"""
-    points = []
-    
-    for chunk in chunks:
-        embedding = get_embedding(chunk['text'])
-        
-        point = PointStruct(
-            id=str(uuid.uuid4()),
-            vector=embedding,
-            payload={
+def chunk_point_id(chunk: Dict[str, Any]) -> str:
+    """Stable point ID for chunks of a known document, random otherwise"""
+    if chunk.get('document_id'):
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{chunk['document_id']}/{chunk['chunk_id']}"))
+    return str(uuid.uuid4())
+
+
+async def get_existing_point_ids(point_ids: List[str]) -> Set[str]:
+    """Return which of the given point IDs are already stored"""
+    return await vector_store.existing_ids(point_ids)
+
+
+async def delete_document_chunks(document_id: str):
+    """Remove every stored chunk of a document"""
+    chunk_filter = ChunkFilter(document_ids=(document_id,))
+    await vector_store.delete(chunk_filter)
+    if lexical_index is not None:
+        await lexical_index.delete(chunk_filter)
+
+
+async def _upsert_embedded_chunks(embedded: List[EmbeddedChunk]):
+    """Write one slice of embedded chunks to the vector store"""
+    points = [
+        (
+            chunk_point_id(chunk),
+            vector,
+            {
                 "chunk_id": chunk['chunk_id'],
+                "document_id": chunk.get('document_id'),
+                "user_id": chunk.get('user_id'),
+                "syllabus_id": chunk.get('syllabus_id'),
                 "text": chunk['text'],
+                "text_hash": chunk.get('text_hash'),
                 "source": chunk['source'],
                 "metadata": chunk.get('metadata', {})
             }
         )
-        points.append(point)
+        for chunk, vector in embedded
+    ]
     
-    qdrant_client.upsert(
-        collection_name=settings.collection_name,
-        points=points
-    )
+    await vector_store.upsert(points)
+    if lexical_index is not None:
+        await lexical_index.add([(point_id, payload) for point_id, _, payload in points])
+
+
+async def _stored_vectors(chunks: List[Dict[str, Any]]) -> List[Optional[List[float]]]:
+    """Vectors of already stored chunks with the same normalized text"""
+    hashes = list({c['text_hash'] for c in chunks if c.get('text_hash')})
+    found = await vector_store.vectors_by_text_hash(hashes) if hashes else {}
     
-    return len(points)
+    return [found.get(c.get('text_hash')) for c in chunks]
+
+
+async def _unique_chunks(chunks: Chunks) -> AsyncIterator[Dict[str, Any]]:
+    """Drop repeated chunks (same normalized text) within each document.
+
+    A batch streams several documents; each keeps its own copy of shared
+    text, so deleting one document never removes another's chunks.
+    """
+    seen = set()
+    async for chunk in aiterate(chunks):
+        text_hash = chunk.get('text_hash')
+        if text_hash:
+            key = (chunk.get('document_id'), text_hash)
+            if key in seen:
+                continue
+            seen.add(key)
+        yield chunk
 
 
-async def search_similar_chunks(query: str, limit: int = 5) -> List[Dict[str, Any]]:
-    """Search for similar chunks in vector store"""
-    query_vector = get_query_embedding(query)
+async def add_chunks_to_vectorstore(
+    chunks: Chunks,
+    progress: Optional[ProgressFn] = None,
+    on_stored: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+) -> int:
+    """Add document chunks to vector store in batches.
     
-    search_result = qdrant_client.search(
-        collection_name=settings.collection_name,
-        query_vector=query_vector,
-        limit=limit
-    )
+    Chunks whose normalized text is already stored reuse that vector
+    instead of being embedded again. `on_stored` is called with the
+    chunks of every slice written to the store.
+    """
+    async def upsert(embedded: List[EmbeddedChunk]):
+        await _upsert_embedded_chunks(embedded)
+        if on_stored:
+            await on_stored([chunk for chunk, _ in embedded])
     
+    return await embedding_pipeline.run(
+        _unique_chunks(chunks),
+        upsert,
+        progress=progress,
+        reuse=_stored_vectors
+    )
+
+
+def get_query_embeddings(texts: List[str]) -> List[List[float]]:
+    """Generate query embeddings for a batch with the active provider"""
+    return get_embedding_provider().embed_queries(texts)
+
+
+def _hits_to_chunks(search_result) -> List[Dict[str, Any]]:
     results = []
+    seen_hashes = set()
     for hit in search_result:
+        # Identical chunks from re-uploaded material add nothing new
+        text_hash = hit.payload.get('text_hash')
+        if text_hash:
+            if text_hash in seen_hashes:
+                continue
+            seen_hashes.add(text_hash)
+        
         results.append({
             "chunk_id": hit.payload['chunk_id'],
             "text": hit.payload['text'],
@@ -102,10 +179,171 @@ async def search_similar_chunks(query: str, limit: int = 5) -> List[Dict[str, An
     return results
 
 
-async def get_chunks_for_topic(topic: str, threshold: float = 0.5, limit: int = 10) -> Dict[str, Any]:
-    """Get relevant chunks for a syllabus topic"""
-    chunks = await search_similar_chunks(topic, limit=limit)
+async def search_similar_chunks(
+    query: str,
+    limit: int = 5,
+    chunk_filter: Optional[ChunkFilter] = None
+) -> List[Dict[str, Any]]:
+    """Search for similar chunks in vector store, among `chunk_filter`'s chunks"""
+    query_vector = await run_blocking(get_query_embedding, query)
+    
+    search_result = await vector_store.search(query_vector, limit, chunk_filter)
+    
+    return _hits_to_chunks(search_result)
+
+
+async def _embed_queries(queries: List[str]) -> List[List[float]]:
+    # Embedding requests run concurrently, bounded by the thread pool
+    batches = list(batched(queries, settings.embedding_batch_size))
+    embedded = await asyncio.gather(*(
+        run_blocking(get_query_embeddings, batch) for batch in batches
+    ))
+    return [vector for batch in embedded for vector in batch]
+
+
+async def _dense_search_batch(
+    queries: List[str],
+    limit: int,
+    chunk_filter: Optional[ChunkFilter],
+    with_vectors: bool = False
+) -> List[List[SearchHit]]:
+    if not queries:
+        return []
+    
+    query_vectors = await _embed_queries(queries)
+    return await vector_store.search_batch(query_vectors, limit, chunk_filter, with_vectors)
+
+
+async def search_similar_chunks_batch(
+    queries: List[str],
+    limit: int = 5,
+    chunk_filter: Optional[ChunkFilter] = None
+) -> List[List[Dict[str, Any]]]:
+    """Search for many queries with batched embeddings and one batched search"""
+    search_results = await _dense_search_batch(queries, limit, chunk_filter)
+    
+    return [_hits_to_chunks(hits) for hits in search_results]
+
+
+def _keyword_scores(hits: List[LexicalHit]) -> List[float]:
+    """Relevance of keyword hits for a topic that isn't embedded.
+    
+    BM25 scores aren't on the cosine scale, so hits with the topic's terms
+    (HYBRID_LEXICAL_MIN_COVERAGE) score their BM25 relative to the best
+    hit, up to HYBRID_LEXICAL_MAX_SCORE; the others score 0.
+    """
+    best = max((hit.score for hit in hits), default=0.0)
+    return [
+        settings.hybrid_lexical_max_score * hit.score / best
+        if best > 0 and hit.coverage >= settings.hybrid_lexical_min_coverage else 0.0
+        for hit in hits
+    ]
+
+
+def _keyword_confident(hits: List[LexicalHit]) -> bool:
+    relevant = sum(1 for score in _keyword_scores(hits) if score >= RELEVANCE_THRESHOLD)
+    return 0 < settings.hybrid_lexical_min_hits <= relevant
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(a @ b / norm) if norm else 0.0
+
+
+def fuse_hits(dense: List[SearchHit], keyword: List[SearchHit], limit: int) -> List[SearchHit]:
+    """Reciprocal rank fusion of a vector and a keyword ranking.
+    
+    Chunks are ordered by the sum of 1 / (k + rank) over both rankings;
+    the fused value only orders them. Hits keep their own scores (the
+    vector search's for chunks in both), so relevance thresholds and
+    confidence stay on the cosine similarity scale.
+    """
+    k = settings.hybrid_rrf_k
+    fused: Dict[str, float] = {}
+    hits: Dict[str, SearchHit] = {}
+    
+    for ranking in (dense, keyword):
+        for rank, hit in enumerate(ranking):
+            fused[hit.id] = fused.get(hit.id, 0.0) + 1 / (k + rank + 1)
+            hits.setdefault(hit.id, hit)
+    
+    ranked = sorted(fused, key=fused.get, reverse=True)[:limit]
+    return [hits[point_id] for point_id in ranked]
+
+
+async def _hybrid_search_batch(
+    queries: List[str],
+    limit: int,
+    chunk_filter: Optional[ChunkFilter],
+    with_vectors: bool = False
+) -> List[List[SearchHit]]:
+    """Keyword + vector search for many queries.
+    
+    The keyword index is searched first; queries with enough relevant
+    keyword hits (HYBRID_LEXICAL_MIN_HITS) are answered from them alone,
+    skipping the embedding call, and scored by _keyword_scores. The rest
+    are fused with vector search results, and their keyword hits are
+    scored by cosine similarity like the vector hits. Without the
+    keyword index this is plain vector search.
+    """
+    if lexical_index is None:
+        return await _dense_search_batch(queries, limit, chunk_filter, with_vectors)
+    
+    lexical = await lexical_index.search_batch(queries, limit, chunk_filter)
+    pending = [i for i, hits in enumerate(lexical) if not _keyword_confident(hits)]
+    
+    results = [
+        [SearchHit(hit.id, score, hit.payload) for hit, score in zip(hits, _keyword_scores(hits))]
+        for hits in lexical
+    ]
     
+    if pending:
+        query_vectors = await _embed_queries([queries[i] for i in pending])
+        searched = await vector_store.search_batch(query_vectors, limit, chunk_filter, with_vectors)
+        
+        # Keyword hits the vector search missed, scored against the query
+        # vector from their stored vectors (one request for all queries)
+        missing = set()
+        for i, dense in zip(pending, searched):
+            found = {hit.id for hit in dense}
+            missing.update(hit.id for hit in lexical[i] if hit.id not in found)
+        vectors = await vector_store.vectors_by_id(list(missing)) if missing else {}
+        
+        for i, query_vector, dense in zip(pending, query_vectors, searched):
+            keyword = [
+                SearchHit(
+                    hit.id,
+                    _cosine(query_vector, vectors[hit.id]) if hit.id in vectors else 0.0,
+                    hit.payload,
+                    vectors.get(hit.id) if with_vectors else None
+                )
+                for hit in lexical[i]
+            ]
+            results[i] = fuse_hits(dense, keyword, limit)
+    
+    lexical_index.searches += len(queries)
+    lexical_index.keyword_only += len(queries) - len(pending)
+    
+    return [hits[:limit] for hits in results]
+
+
+async def _rerank_batch(queries: List[str], results: List[List[SearchHit]]) -> List[List[SearchHit]]:
+    """rerank_hits for every query; vectors keyword hits lack are fetched in one request"""
+    missing = list({hit.id for hits in results for hit in hits if hit.vector is None})
+    found = await vector_store.vectors_by_id(missing) if missing else {}
+    
+    results = [
+        [hit if hit.vector is not None else hit._replace(vector=found.get(hit.id)) for hit in hits]
+        for hits in results
+    ]
+    return await run_blocking(
+        lambda: [rerank_hits(query, hits) for query, hits in zip(queries, results)]
+    )
+
+
+def build_topic_result(topic: str, chunks: List[Dict[str, Any]], threshold: float = RELEVANCE_THRESHOLD) -> Dict[str, Any]:
+    """Topic mapping result from ranked search hits"""
     # Filter by threshold
     relevant_chunks = [c for c in chunks if c['score'] >= threshold]
     
@@ -120,3 +358,43 @@ async def get_chunks_for_topic(topic: str, threshold: float = 0.5, limit: int =
         "confidence_score": avg_score,
         "has_sufficient_content": has_sufficient_content
     }
+
+
+async def get_chunks_for_topic(
+    topic: str,
+    threshold: float = RELEVANCE_THRESHOLD,
+    limit: int = 10,
+    chunk_filter: Optional[ChunkFilter] = None
+) -> Dict[str, Any]:
+    """Get relevant chunks for a syllabus topic"""
+    return (await get_chunks_for_topics([topic], threshold, limit, chunk_filter))[0]
+
+
+async def get_chunks_for_topics(
+    topics: List[str],
+    threshold: float = RELEVANCE_THRESHOLD,
+    limit: int = 10,
+    chunk_filter: Optional[ChunkFilter] = None
+) -> List[Dict[str, Any]]:
+    """Bulk version of get_chunks_for_topic; results are in input order.
+    
+    With RERANK_ENABLED, up to RERANK_CANDIDATES hits per topic are
+    searched and the relevant ones reordered for diversity (MMR) before
+    keeping `limit`, so near-duplicate chunks don't crowd out the rest.
+    """
+    unique_topics = list(dict.fromkeys(topics))
+    
+    if settings.rerank_enabled:
+        pool = max(limit, settings.rerank_candidates)
+        searches = await _hybrid_search_batch(unique_topics, pool, chunk_filter, with_vectors=True)
+        searches = await _rerank_batch(
+            unique_topics, [[hit for hit in hits if hit.score >= threshold] for hits in searches]
+        )
+    else:
+        searches = await _hybrid_search_batch(unique_topics, limit, chunk_filter)
+    
+    by_topic = {
+        topic: build_topic_result(topic, _hits_to_chunks(hits[:limit]), threshold)
+        for topic, hits in zip(unique_topics, searches)
+    }
+    return [by_topic[topic] for topic in topics]
@@ -0,0 +1,119 @@
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from config import settings
+from .store import SearchHit
+
+
+def mmr_order(
+    relevance: Sequence[float],
+    vectors: np.ndarray,
+    diversity_lambda: float = 0.7,
+    duplicate_threshold: float = 1.0
+) -> List[int]:
+    """Maximal Marginal Relevance: indices of candidates in selection order.
+
+    Each step picks the candidate maximizing
+    lambda * relevance - (1 - lambda) * (max similarity to those picked),
+    so near-duplicates of earlier picks sink. Candidates at least
+    `duplicate_threshold` similar to a pick are dropped. The order is
+    greedy, so any prefix is the MMR selection of that size.
+    """
+    count = len(relevance)
+    if count == 0:
+        return []
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms > 0, norms, 1.0)
+    similarity = unit @ unit.T
+
+    relevance = np.asarray(relevance, dtype=np.float64)
+    redundancy = np.full(count, -np.inf)  # max similarity to a pick so far
+    remaining = np.ones(count, dtype=bool)
+    order = []
+
+    while remaining.any():
+        gain = diversity_lambda * relevance - (1 - diversity_lambda) * np.maximum(redundancy, 0.0)
+        gain[~remaining] = -np.inf
+        pick = int(np.argmax(gain))
+        order.append(pick)
+        remaining[pick] = False
+
+        redundancy = np.maximum(redundancy, similarity[pick])
+        remaining &= redundancy < duplicate_threshold
+
+    return order
+
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs jointly with a local cross-encoder model.
+
+    More accurate than the cosine similarity of separate embeddings, but
+    runs the model once per pair, so only the retrieved candidates are
+    scored. Inference is serialized like the local embedding provider.
+    """
+
+    def __init__(self, model_name: str = None, device: str = None):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise RuntimeError(
+                "RERANK_CROSS_ENCODER_MODEL requires sentence-transformers "
+                "(pip install sentence-transformers)"
+            ) from e
+
+        self.model_name = model_name or settings.rerank_cross_encoder_model
+        self.model = CrossEncoder(self.model_name, device=device or settings.local_embedding_device)
+        self._lock = threading.Lock()
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """Relevance of each text to the query, in [0, 1]"""
+        if not texts:
+            return []
+
+        with self._lock:
+            logits = self.model.predict([(query, text) for text in texts], convert_to_numpy=True)
+        return (1 / (1 + np.exp(-np.asarray(logits, dtype=np.float64)))).tolist()
+
+
+_cross_encoder: Optional[CrossEncoderReranker] = None
+
+
+def get_cross_encoder() -> Optional[CrossEncoderReranker]:
+    """The configured cross-encoder, loaded on first use; None if not configured"""
+    global _cross_encoder
+
+    if _cross_encoder is None and settings.rerank_cross_encoder_model:
+        _cross_encoder = CrossEncoderReranker()
+    return _cross_encoder
+
+
+def rerank_hits(query: str, hits: List[SearchHit]) -> List[SearchHit]:
+    """Order search hits for relevance and diversity (blocking).
+
+    Relevance is the search score, or the cross-encoder's score when
+    RERANK_CROSS_ENCODER_MODEL is set; diversity uses the hits' vectors.
+    Hits keep their search scores, so relevance thresholds still apply.
+    """
+    if len(hits) < 2:
+        return hits
+
+    relevance = [hit.score for hit in hits]
+    cross_encoder = get_cross_encoder()
+    if cross_encoder is not None:
+        relevance = cross_encoder.score(query, [hit.payload.get('text', '') for hit in hits])
+
+    # A hit without a vector (deleted meanwhile) only competes on relevance
+    dimensions = max((len(hit.vector) for hit in hits if hit.vector is not None), default=1)
+    vectors = np.array([
+        hit.vector if hit.vector is not None else [0.0] * dimensions for hit in hits
+    ], dtype=np.float32)
+
+    order = mmr_order(
+        relevance, vectors,
+        diversity_lambda=settings.rerank_mmr_lambda,
+        duplicate_threshold=settings.rerank_duplicate_threshold
+    )
+    return [hits[i] for i in order]
@@ -0,0 +1,867 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, VectorParamsDiff, PointStruct, PayloadSchemaType, Filter, FilterSelector,
+    FieldCondition, IsEmptyCondition, MatchAny, MatchValue, PayloadField, SearchRequest, SearchParams,
+    HnswConfigDiff, ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization,
+    BinaryQuantizationConfig, QuantizationSearchParams, Disabled
+)
+
+from config import settings
+from concurrency import run_blocking
+
+try:
+    import hnswlib
+except ImportError:  # optional; the local store then only searches exactly
+    hnswlib = None
+
+# (point id, vector, payload)
+Point = Tuple[str, List[float], Dict[str, Any]]
+
+
+class ChunkFilter(NamedTuple):
+    """Which stored chunks an operation applies to; None fields don't filter"""
+    user_id: Optional[int] = None
+    # The syllabus's documents plus the user's documents not tied to a syllabus
+    syllabus_id: Optional[str] = None
+    document_ids: Optional[Tuple[str, ...]] = None
+
+    def key(self) -> str:
+        """Stable text form for cache keys"""
+        parts = []
+        if self.user_id is not None:
+            parts.append(f"user={self.user_id}")
+        if self.syllabus_id:
+            parts.append(f"syllabus={self.syllabus_id}")
+        if self.document_ids is not None:
+            digest = hashlib.sha1(",".join(sorted(self.document_ids)).encode('utf-8')).hexdigest()
+            parts.append(f"documents={digest[:16]}")
+        return ";".join(parts)
+
+
+# Payload fields with an index, for filtering
+FILTER_FIELDS = {
+    "user_id": PayloadSchemaType.INTEGER,
+    "document_id": PayloadSchemaType.KEYWORD,
+    "syllabus_id": PayloadSchemaType.KEYWORD,
+}
+
+
+def sql_where(chunk_filter: ChunkFilter) -> Tuple[str, list]:
+    """SQL condition (or "") and parameters for a filter"""
+    clauses, params = [], []
+    if chunk_filter.user_id is not None:
+        clauses.append("user_id = ?")
+        params.append(chunk_filter.user_id)
+    if chunk_filter.syllabus_id:
+        clauses.append("(syllabus_id = ? OR syllabus_id IS NULL)")
+        params.append(chunk_filter.syllabus_id)
+    if chunk_filter.document_ids is not None:
+        clauses.append(f"document_id IN ({','.join('?' * len(chunk_filter.document_ids))})")
+        params.extend(chunk_filter.document_ids)
+    return " AND ".join(clauses), params
+
+
+class CollectionProfile(NamedTuple):
+    """How a Qdrant collection stores and indexes its vectors"""
+    quantization: Optional[str] = None  # None | int8 | binary
+    on_disk: bool = False  # full-precision vectors memory-mapped instead of in RAM
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_ef_search: Optional[int] = None  # None: the server's default
+    # Quantized searches fetch limit * oversampling candidates and rescore
+    # them with the full vectors
+    oversampling: float = 2.0
+
+
+# Quantized vectors stay in RAM while the originals move to disk: int8
+# needs a quarter of the memory, binary a thirty-second (best with 1024+
+# dimensions; smaller models lose more recall)
+COLLECTION_PROFILES = {
+    "default": CollectionProfile(),
+    "int8": CollectionProfile(quantization="int8", on_disk=True, oversampling=2.0),
+    "binary": CollectionProfile(quantization="binary", on_disk=True, oversampling=3.0),
+}
+
+
+def collection_profile(name: str = None) -> CollectionProfile:
+    """The profile `name` (default QDRANT_PROFILE) with the QDRANT_* overrides applied"""
+    name = (name or settings.qdrant_profile).lower()
+    if name not in COLLECTION_PROFILES:
+        raise ValueError(f"Unknown Qdrant profile: {name}")
+
+    overrides = {
+        "on_disk": settings.qdrant_on_disk,
+        "hnsw_m": settings.qdrant_hnsw_m,
+        "hnsw_ef_construct": settings.qdrant_hnsw_ef_construct,
+        "hnsw_ef_search": settings.qdrant_hnsw_ef_search,
+        "oversampling": settings.qdrant_oversampling,
+    }
+    return COLLECTION_PROFILES[name]._replace(
+        **{field: value for field, value in overrides.items() if value is not None}
+    )
+
+
+def _quantization_config(profile: CollectionProfile):
+    if profile.quantization == "int8":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8, quantile=0.99, always_ram=True
+        ))
+    if profile.quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def _stored_quantization(config) -> Optional[str]:
+    if isinstance(config, ScalarQuantization):
+        return "int8"
+    if isinstance(config, BinaryQuantization):
+        return "binary"
+    return None
+
+
+class SearchHit(NamedTuple):
+    """A scored search result (same fields as Qdrant's ScoredPoint)"""
+    id: str
+    score: float
+    payload: Dict[str, Any]
+    vector: Optional[List[float]] = None  # only when searched with_vectors
+
+
+class VectorStore:
+    """Cosine-similarity index of chunk vectors and payloads"""
+
+    async def init(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def upsert(self, points: List[Point]):
+        raise NotImplementedError
+
+    async def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Which of the given point IDs are stored"""
+        raise NotImplementedError
+
+    async def vectors_by_text_hash(self, hashes: List[str]) -> Dict[str, List[float]]:
+        """A stored vector for each of the given payload text hashes found"""
+        raise NotImplementedError
+
+    async def vectors_by_id(self, ids: List[str]) -> Dict[str, List[float]]:
+        """Stored vectors of the given point IDs found"""
+        raise NotImplementedError
+
+    async def scroll(self, limit: int, offset: Any = None) -> Tuple[List[Tuple[str, Dict[str, Any]]], Any]:
+        """A page of (point ID, payload) and the offset of the next page (None after the last)"""
+        raise NotImplementedError
+
+    async def search(
+        self, vector: List[float], limit: int, chunk_filter: Optional[ChunkFilter] = None,
+        with_vectors: bool = False
+    ) -> List[SearchHit]:
+        raise NotImplementedError
+
+    async def search_batch(
+        self, vectors: List[List[float]], limit: int, chunk_filter: Optional[ChunkFilter] = None,
+        with_vectors: bool = False
+    ) -> List[List[SearchHit]]:
+        raise NotImplementedError
+
+    async def delete(self, chunk_filter: ChunkFilter):
+        """Remove every point matching the filter"""
+        raise NotImplementedError
+
+    async def set_payload(self, chunk_filter: ChunkFilter, payload: Dict[str, Any]):
+        """Merge `payload` into every point matching the filter"""
+        raise NotImplementedError
+
+
+def require_filter(chunk_filter: ChunkFilter):
+    # An empty filter would match (and delete or rewrite) every point
+    if not chunk_filter.key():
+        raise ValueError("Refusing to modify every point; the filter is empty")
+
+
+def _qdrant_filter(chunk_filter: Optional[ChunkFilter]) -> Optional[Filter]:
+    if chunk_filter is None:
+        return None
+
+    must = []
+    if chunk_filter.user_id is not None:
+        must.append(FieldCondition(key="user_id", match=MatchValue(value=chunk_filter.user_id)))
+    if chunk_filter.syllabus_id:
+        must.append(Filter(should=[
+            FieldCondition(key="syllabus_id", match=MatchValue(value=chunk_filter.syllabus_id)),
+            IsEmptyCondition(is_empty=PayloadField(key="syllabus_id"))
+        ]))
+    if chunk_filter.document_ids is not None:
+        must.append(FieldCondition(key="document_id", match=MatchAny(any=list(chunk_filter.document_ids))))
+
+    return Filter(must=must) if must else None
+
+
+class QdrantVectorStore(VectorStore):
+    """Qdrant collection (server, cloud or in-memory via QDRANT_URL)"""
+
+    def __init__(
+        self, location: str = None, api_key: str = None, collection_name: str = None,
+        profile: CollectionProfile = None
+    ):
+        self.location = location or settings.qdrant_url
+        self.api_key = api_key if api_key is not None else settings.qdrant_api_key
+        self.collection_name = collection_name or settings.collection_name
+        self.profile = profile or collection_profile()
+        self.client = None
+        self.search_params = None
+
+    async def init(self):
+        self.client = AsyncQdrantClient(location=self.location, api_key=self.api_key)
+
+        # Create collection if it doesn't exist
+        collections = (await self.client.get_collections()).collections
+        collection_names = [c.name for c in collections]
+
+        if self.collection_name not in collection_names:
+            await self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(
+                    size=settings.vector_size,
+                    distance=Distance.COSINE,
+                    on_disk=self.profile.on_disk
+                ),
+                hnsw_config=HnswConfigDiff(
+                    m=self.profile.hnsw_m,
+                    ef_construct=self.profile.hnsw_ef_construct
+                ),
+                quantization_config=_quantization_config(self.profile)
+            )
+        else:
+            # Vectors from a different model can't share the collection
+            info = await self.client.get_collection(self.collection_name)
+            stored_size = info.config.params.vectors.size
+            if stored_size != settings.vector_size:
+                raise ValueError(
+                    f"Collection {self.collection_name} stores {stored_size}-dimensional vectors "
+                    f"but VECTOR_SIZE is {settings.vector_size}; use a new COLLECTION_NAME"
+                )
+            await self._migrate(info)
+
+        # Index normalized text hashes for chunk de-duplication and the
+        # ownership fields searches and deletes filter on
+        for field_name, field_schema in {"text_hash": PayloadSchemaType.KEYWORD, **FILTER_FIELDS}.items():
+            await self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema
+            )
+
+        quantization = None
+        if self.profile.quantization:
+            quantization = QuantizationSearchParams(rescore=True, oversampling=self.profile.oversampling)
+        if quantization or self.profile.hnsw_ef_search:
+            self.search_params = SearchParams(hnsw_ef=self.profile.hnsw_ef_search, quantization=quantization)
+
+    async def _migrate(self, info):
+        """Bring an existing collection's storage and index in line with the profile"""
+        params = info.config.params.vectors
+        hnsw = info.config.hnsw_config
+        changes = {}
+
+        if bool(params.on_disk) != self.profile.on_disk:
+            changes["vectors_config"] = {"": VectorParamsDiff(on_disk=self.profile.on_disk)}
+        if (hnsw.m, hnsw.ef_construct) != (self.profile.hnsw_m, self.profile.hnsw_ef_construct):
+            changes["hnsw_config"] = HnswConfigDiff(
+                m=self.profile.hnsw_m,
+                ef_construct=self.profile.hnsw_ef_construct
+            )
+        if _stored_quantization(info.config.quantization_config) != self.profile.quantization:
+            changes["quantization_config"] = _quantization_config(self.profile) or Disabled.DISABLED
+
+        if not changes:
+            return
+
+        # The server rebuilds segments in the background; searches keep
+        # working on the old layout until it is done
+        print(f"🔨 Migrating collection {self.collection_name}: {', '.join(sorted(changes))}")
+        if not await self.client.update_collection(collection_name=self.collection_name, **changes):
+            print(f"⚠️ Collection {self.collection_name} was not updated (local mode ignores collection settings)")
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+
+    async def upsert(self, points: List[Point]):
+        await self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                PointStruct(id=point_id, vector=vector, payload=payload)
+                for point_id, vector, payload in points
+            ]
+        )
+
+    async def existing_ids(self, ids: List[str]) -> Set[str]:
+        existing = set()
+        for start in range(0, len(ids), settings.upsert_batch_size):
+            records = await self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=ids[start:start + settings.upsert_batch_size],
+                with_payload=False,
+                with_vectors=False
+            )
+            existing.update(str(record.id) for record in records)
+        return existing
+
+    async def vectors_by_text_hash(self, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        offset = None
+
+        while hashes:
+            records, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(must=[
+                    FieldCondition(key="text_hash", match=MatchAny(any=hashes))
+                ]),
+                limit=len(hashes),
+                offset=offset,
+                with_payload=["text_hash"],
+                with_vectors=True
+            )
+            for record in records:
+                found.setdefault(record.payload['text_hash'], record.vector)
+
+            if offset is None or len(found) == len(hashes):
+                break
+
+        return found
+
+    async def scroll(self, limit: int, offset: Any = None) -> Tuple[List[Tuple[str, Dict[str, Any]]], Any]:
+        records, offset = await self.client.scroll(
+            collection_name=self.collection_name,
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        return [(str(record.id), record.payload) for record in records], offset
+
+    async def vectors_by_id(self, ids: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        for start in range(0, len(ids), settings.upsert_batch_size):
+            records = await self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=ids[start:start + settings.upsert_batch_size],
+                with_payload=False,
+                with_vectors=True
+            )
+            found.update((str(record.id), record.vector) for record in records)
+        return found
+
+    async def search(
+        self, vector: List[float], limit: int, chunk_filter: Optional[ChunkFilter] = None,
+        with_vectors: bool = False
+    ) -> List[SearchHit]:
+        hits = await self.client.search(
+            collection_name=self.collection_name,
+            query_vector=vector,
+            query_filter=_qdrant_filter(chunk_filter),
+            search_params=self.search_params,
+            limit=limit,
+            with_vectors=with_vectors
+        )
+        return [SearchHit(str(hit.id), hit.score, hit.payload, hit.vector) for hit in hits]
+
+    async def search_batch(
+        self, vectors: List[List[float]], limit: int, chunk_filter: Optional[ChunkFilter] = None,
+        with_vectors: bool = False
+    ) -> List[List[SearchHit]]:
+        query_filter = _qdrant_filter(chunk_filter)
+        results = await self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                SearchRequest(
+                    vector=vector, filter=query_filter, params=self.search_params,
+                    limit=limit, with_payload=True, with_vector=with_vectors
+                )
+                for vector in vectors
+            ]
+        )
+        return [[SearchHit(str(hit.id), hit.score, hit.payload, hit.vector) for hit in hits] for hits in results]
+
+    async def delete(self, chunk_filter: ChunkFilter):
+        require_filter(chunk_filter)
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=_qdrant_filter(chunk_filter))
+        )
+
+    async def set_payload(self, chunk_filter: ChunkFilter, payload: Dict[str, Any]):
+        require_filter(chunk_filter)
+        await self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=payload,
+            points=FilterSelector(filter=_qdrant_filter(chunk_filter))
+        )
+
+
+class LocalVectorStore(VectorStore):
+    """Embedded index persisted in a directory, for single-node deployments.
+
+    Vectors are L2-normalized float32 rows of a memory-mapped matrix, so
+    cosine similarity is a dot product; payloads, the id -> row map and
+    the filter fields live in SQLite next to it. Collections below
+    `hnsw_threshold` points are searched exactly (block-wise matrix
+    products, argpartition top-k). Larger ones use an HNSW graph
+    (hnswlib) that is saved on close and rebuilt from the matrix if it
+    is missing or stale. Filtered searches score only the matching rows
+    unless there are more than `hnsw_threshold` of them.
+    """
+
+    INITIAL_CAPACITY = 1024
+    SEARCH_BLOCK_ROWS = 65536  # rows scored per matrix product
+
+    def __init__(
+        self,
+        path: str,
+        dimensions: int,
+        mode: str = "auto",
+        hnsw_threshold: int = 50000,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 128
+    ):
+        if mode not in ("auto", "flat", "hnsw"):
+            raise ValueError(f"Unknown local index mode: {mode}")
+
+        self.path = path
+        self.dimensions = dimensions
+        self.mode = mode
+        self.hnsw_threshold = hnsw_threshold
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._matrix = None
+        self._live = None  # rows that hold a stored point
+        self._count = 0  # rows in use, including deleted ones
+        self._live_count = 0
+        self._version = 0  # bumped by every vector write, to detect a stale HNSW file
+        self._hnsw = None
+        self._hnsw_dirty = False
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _hnsw_path(self) -> str:
+        return os.path.join(self.path, "hnsw.bin")
+
+    async def init(self):
+        await run_blocking(self._open)
+
+    def _open(self):
+        if self.mode == "hnsw" and hnswlib is None:
+            raise RuntimeError("LOCAL_INDEX_MODE=hnsw needs hnswlib (pip install hnswlib)")
+
+        os.makedirs(self.path, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.path, "points.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+            "text_hash TEXT, payload TEXT NOT NULL)"
+        )
+        # Filter fields were added after the first release of the index
+        columns = {column[1] for column in self._conn.execute("PRAGMA table_info(points)")}
+        for field, column_type in (("user_id", "INTEGER"), ("document_id", "TEXT"), ("syllabus_id", "TEXT")):
+            if field not in columns:
+                self._conn.execute(f"ALTER TABLE points ADD COLUMN {field} {column_type}")
+        for field in ("text_hash", "user_id", "document_id", "syllabus_id"):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_points_{field} ON points ({field})")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('dimensions', ?)", (str(self.dimensions),)
+        )
+        self._conn.commit()
+
+        # Vectors from a different model can't share the index
+        stored = int(self._meta("dimensions"))
+        if stored != self.dimensions:
+            raise ValueError(
+                f"Local index {self.path} stores {stored}-dimensional vectors "
+                f"but VECTOR_SIZE is {self.dimensions}; use a new COLLECTION_NAME"
+            )
+
+        self._version = int(self._meta("version") or 0)
+        self._count = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM points").fetchone()[0]
+        self._map_vectors(self._count)
+
+        rows = np.fromiter((row for (row,) in self._conn.execute("SELECT row FROM points")), dtype=np.int64)
+        self._live[rows] = True
+        self._live_count = len(rows)
+
+        if self._use_hnsw():
+            self._load_hnsw()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Any):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _bump_version(self):
+        self._version += 1
+        self._set_meta("version", self._version)
+
+    def _map_vectors(self, rows: int):
+        """(Re)map the vector file with room for at least `rows` rows"""
+        row_bytes = self.dimensions * 4
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        capacity = size // row_bytes
+
+        if capacity < max(rows, 1):
+            # Grow geometrically so appends stay amortized O(1)
+            capacity = max(self.INITIAL_CAPACITY, rows, capacity * 2)
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+
+        if self._matrix is None or len(self._matrix) != capacity:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions)
+            )
+            live = np.zeros(capacity, dtype=bool)
+            if self._live is not None:
+                live[:len(self._live)] = self._live
+            self._live = live
+
+    def _use_hnsw(self) -> bool:
+        if self.mode == "flat" or hnswlib is None:
+            return False
+        return self.mode == "hnsw" or self._live_count >= self.hnsw_threshold
+
+    def _load_hnsw(self):
+        index = hnswlib.Index(space="ip", dim=self.dimensions)
+        capacity = len(self._matrix)
+
+        if os.path.exists(self._hnsw_path) and self._meta("hnsw_version") == str(self._version):
+            index.load_index(self._hnsw_path, max_elements=capacity)
+        else:
+            if self._live_count:
+                print(f"🔨 Building HNSW index over {self._live_count} vectors...")
+            index.init_index(
+                max_elements=capacity, M=self.hnsw_m, ef_construction=self.hnsw_ef_construction
+            )
+            live_rows = np.flatnonzero(self._live[:self._count])
+            for start in range(0, len(live_rows), self.SEARCH_BLOCK_ROWS):
+                rows = live_rows[start:start + self.SEARCH_BLOCK_ROWS]
+                index.add_items(self._matrix[rows], rows)
+            self._hnsw_dirty = True
+
+        index.set_ef(self.hnsw_ef_search)
+        self._hnsw = index
+
+    async def close(self):
+        await run_blocking(self._close)
+
+    def _close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            if self._hnsw is not None and self._hnsw_dirty:
+                self._hnsw.save_index(self._hnsw_path)
+                self._set_meta("hnsw_version", self._version)
+                self._conn.commit()
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._conn.close()
+            self._conn = self._matrix = self._live = self._hnsw = None
+
+    def _rows_for(self, column: str, values: Sequence[str]) -> List[tuple]:
+        """Run `SELECT column, row ... WHERE column IN (...)` in bounded batches"""
+        rows = []
+        for start in range(0, len(values), 500):
+            batch = values[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows.extend(self._conn.execute(
+                f"SELECT {column}, row FROM points WHERE {column} IN ({placeholders})", batch
+            ))
+        return rows
+
+    def _filtered_rows(self, chunk_filter: ChunkFilter) -> np.ndarray:
+        where, params = sql_where(chunk_filter)
+        statement = "SELECT row FROM points" + (f" WHERE {where}" if where else "") + " ORDER BY row"
+        return np.fromiter((row for (row,) in self._conn.execute(statement, params)), dtype=np.int64)
+
+    async def upsert(self, points: List[Point]):
+        if points:
+            await run_blocking(self._upsert, points)
+
+    def _upsert(self, points: List[Point]):
+        vectors = np.asarray([vector for _, vector, _ in points], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+
+        with self._lock:
+            # Existing IDs keep their row; new ones are appended
+            rows_by_id = dict(self._rows_for("id", [point_id for point_id, _, _ in points]))
+            rows = []
+            for point_id, _, _ in points:
+                if point_id not in rows_by_id:
+                    rows_by_id[point_id] = self._count
+                    self._count += 1
+                rows.append(rows_by_id[point_id])
+
+            self._map_vectors(self._count)
+            self._matrix[rows] = vectors
+            # Vectors reach the file before the rows that point at them
+            self._matrix.flush()
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO points "
+                "(row, id, text_hash, user_id, document_id, syllabus_id, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        row, point_id, payload.get('text_hash'), payload.get('user_id'),
+                        payload.get('document_id'), payload.get('syllabus_id'), json.dumps(payload)
+                    )
+                    for row, (point_id, _, payload) in zip(rows, points)
+                ]
+            )
+            self._bump_version()
+            self._conn.commit()
+
+            self._live_count += int(np.count_nonzero(~self._live[rows]))
+            self._live[rows] = True
+
+            if self._hnsw is not None:
+                if self._count > self._hnsw.get_max_elements():
+                    self._hnsw.resize_index(len(self._matrix))
+                self._hnsw.add_items(vectors, rows)
+                self._hnsw_dirty = True
+            elif self._use_hnsw():
+                self._load_hnsw()
+
+    async def delete(self, chunk_filter: ChunkFilter):
+        require_filter(chunk_filter)
+        await run_blocking(self._delete, chunk_filter)
+
+    def _delete(self, chunk_filter: ChunkFilter):
+        with self._lock:
+            rows = self._filtered_rows(chunk_filter)
+            if not len(rows):
+                return
+
+            # Rows aren't reused; they stay in the file, excluded from search
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500].tolist()
+                self._conn.execute(f"DELETE FROM points WHERE row IN ({','.join('?' * len(batch))})", batch)
+            self._bump_version()
+            self._conn.commit()
+
+            self._live[rows] = False
+            self._live_count -= len(rows)
+            if self._hnsw is not None:
+                for row in rows.tolist():
+                    self._hnsw.mark_deleted(row)
+                self._hnsw_dirty = True
+
+    async def set_payload(self, chunk_filter: ChunkFilter, payload: Dict[str, Any]):
+        require_filter(chunk_filter)
+        await run_blocking(self._set_payload, chunk_filter, payload)
+
+    def _set_payload(self, chunk_filter: ChunkFilter, payload: Dict[str, Any]):
+        with self._lock:
+            where, params = sql_where(chunk_filter)
+            stored_rows = self._conn.execute(f"SELECT row, payload FROM points WHERE {where}", params).fetchall()
+            updates = []
+            for row, stored in stored_rows:
+                merged = {**json.loads(stored), **payload}
+                updates.append((
+                    merged.get('text_hash'), merged.get('user_id'), merged.get('document_id'),
+                    merged.get('syllabus_id'), json.dumps(merged), row
+                ))
+            self._conn.executemany(
+                "UPDATE points SET text_hash = ?, user_id = ?, document_id = ?, syllabus_id = ?, payload = ? "
+                "WHERE row = ?",
+                updates
+            )
+            self._conn.commit()
+
+    async def existing_ids(self, ids: List[str]) -> Set[str]:
+        return await run_blocking(self._existing_ids, ids)
+
+    def _existing_ids(self, ids: List[str]) -> Set[str]:
+        with self._lock:
+            return {point_id for point_id, _ in self._rows_for("id", ids)}
+
+    async def vectors_by_text_hash(self, hashes: List[str]) -> Dict[str, List[float]]:
+        return await run_blocking(self._vectors_by_text_hash, hashes)
+
+    def _vectors_by_text_hash(self, hashes: List[str]) -> Dict[str, List[float]]:
+        with self._lock:
+            found = {}
+            for text_hash, row in self._rows_for("text_hash", hashes):
+                if text_hash not in found:
+                    found[text_hash] = self._matrix[row].tolist()
+            return found
+
+    async def vectors_by_id(self, ids: List[str]) -> Dict[str, List[float]]:
+        return await run_blocking(self._vectors_by_id, ids)
+
+    def _vectors_by_id(self, ids: List[str]) -> Dict[str, List[float]]:
+        with self._lock:
+            return {point_id: self._matrix[row].tolist() for point_id, row in self._rows_for("id", ids)}
+
+    async def scroll(self, limit: int, offset: Any = None) -> Tuple[List[Tuple[str, Dict[str, Any]]], Any]:
+        return await run_blocking(self._scroll, limit, offset)
+
+    def _scroll(self, limit: int, offset: Optional[int]) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row, id, payload FROM points WHERE row >= ? ORDER BY row LIMIT ?",
+                (offset or 0, limit + 1)
+            ).fetchall()
+        page = [(point_id, json.loads(payload)) for _, point_id, payload in rows[:limit]]
+        return page, (rows[limit][0] if len(rows) > limit else None)
+
+    async def search(
+        self, vector: List[float], limit: int, chunk_filter: Optional[ChunkFilter] = None,
+        with_vectors: bool = False
+    ) -> List[SearchHit]:
+        return (await self.search_batch([vector], limit, chunk_filter, with_vectors))[0]
+
+    async def search_batch(
+        self, vectors: List[List[float]], limit: int, chunk_filter: Optional[ChunkFilter] = None,
+        with_vectors: bool = False
+    ) -> List[List[SearchHit]]:
+        if not vectors:
+            return []
+        return await run_blocking(self._search_batch, vectors, limit, chunk_filter, with_vectors)
+
+    def _search_batch(
+        self, vectors: List[List[float]], limit: int, chunk_filter: Optional[ChunkFilter], with_vectors: bool
+    ) -> List[List[SearchHit]]:
+        queries = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries /= np.where(norms > 0, norms, 1.0)
+
+        with self._lock:
+            candidates = self._filtered_rows(chunk_filter) if chunk_filter and chunk_filter.key() else None
+            k = min(limit, self._live_count if candidates is None else len(candidates))
+            if k == 0:
+                return [[] for _ in vectors]
+
+            if self._hnsw is not None and (candidates is None or len(candidates) > self.hnsw_threshold):
+                self._hnsw.set_ef(max(self.hnsw_ef_search, k))
+                if candidates is None:
+                    rows, distances = self._hnsw.knn_query(queries, k=k)
+                else:
+                    # Python filters run single-threaded in hnswlib
+                    allowed = set(candidates.tolist())
+                    rows, distances = self._hnsw.knn_query(
+                        queries, k=k, num_threads=1, filter=allowed.__contains__
+                    )
+                scores = 1.0 - distances  # "ip" distance is 1 - dot product
+            else:
+                rows, scores = self._flat_top_k(queries, k, candidates)
+
+            return self._hits(rows, scores, with_vectors)
+
+    def _flat_top_k(
+        self, queries: np.ndarray, k: int, candidates: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k rows by dot product (among `candidates` if given), best first"""
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        total = self._count if candidates is None else len(candidates)
+        has_deleted = self._live_count < self._count
+
+        for start in range(0, total, self.SEARCH_BLOCK_ROWS):
+            end = min(start + self.SEARCH_BLOCK_ROWS, total)
+            if candidates is None:
+                block_rows = np.arange(start, end)
+                scores = queries @ self._matrix[start:end].T
+                if has_deleted:
+                    scores[:, ~self._live[start:end]] = -np.inf
+            else:
+                block_rows = candidates[start:end]
+                scores = queries @ self._matrix[block_rows].T
+
+            # Merge this block's candidates with the best so far, keep k
+            candidate_scores = np.concatenate([best_scores, scores], axis=1)
+            candidate_rows = np.concatenate(
+                [best_rows, np.broadcast_to(block_rows, scores.shape)], axis=1
+            )
+            if candidate_scores.shape[1] > k:
+                top = np.argpartition(-candidate_scores, k - 1, axis=1)[:, :k]
+                candidate_scores = np.take_along_axis(candidate_scores, top, axis=1)
+                candidate_rows = np.take_along_axis(candidate_rows, top, axis=1)
+            best_scores, best_rows = candidate_scores, candidate_rows
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray, with_vectors: bool) -> List[List[SearchHit]]:
+        """Attach IDs and payloads to (query x k) result rows"""
+        wanted = list({int(row) for row in rows.ravel()})
+        points = {}
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row, point_id, payload in self._conn.execute(
+                f"SELECT row, id, payload FROM points WHERE row IN ({placeholders})", batch
+            ):
+                points[row] = (point_id, json.loads(payload))
+
+        return [
+            [
+                SearchHit(
+                    points[row][0], float(score), points[row][1],
+                    self._matrix[row].tolist() if with_vectors else None
+                )
+                for row, score in zip(query_rows.tolist(), query_scores.tolist())
+                if row in points
+            ]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
+
+
+def local_index_path(collection_name: str = None) -> str:
+    """Directory of the local index for a collection"""
+    return os.path.join(settings.local_index_dir, collection_name or settings.collection_name)
+
+
+def create_vector_store(name: str = None) -> VectorStore:
+    """Build the vector store selected by `name` (default VECTOR_STORE)"""
+    name = (name or settings.vector_store).lower()
+
+    if name == "qdrant":
+        return QdrantVectorStore()
+    if name == "local":
+        return LocalVectorStore(
+            path=local_index_path(),
+            dimensions=settings.vector_size,
+            mode=settings.local_index_mode,
+            hnsw_threshold=settings.local_index_hnsw_threshold,
+            hnsw_m=settings.local_index_hnsw_m,
+            hnsw_ef_construction=settings.local_index_hnsw_ef_construction,
+            hnsw_ef_search=settings.local_index_hnsw_ef_search
+        )
+
+    raise ValueError(f"Unknown vector store: {name}")
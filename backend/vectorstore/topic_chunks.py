@@ -0,0 +1,154 @@
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import select, delete, or_, not_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from config import settings
+from concurrency import run_blocking
+from database.models import TopicChunkMapping, TopicChunk
+from .qdrant_client import build_topic_result, get_chunks_for_topics
+from .store import ChunkFilter
+
+
+def topic_key(topic: str, chunk_filter: Optional[ChunkFilter] = None) -> str:
+    """Normalize a topic name for lookups, scoped to the chunks it is searched in"""
+    key = ' '.join(topic.lower().split())
+    scope = chunk_filter.key() if chunk_filter else ""
+    return f"{scope}|{key}" if scope else key
+
+
+def _to_result(mapping: TopicChunkMapping) -> Dict[str, Any]:
+    chunks = [
+        {
+            "chunk_id": chunk.chunk_id,
+            "text": chunk.text,
+            "source": chunk.source,
+            "score": chunk.score,
+            "metadata": chunk.chunk_metadata or {}
+        }
+        for chunk in mapping.chunks
+    ]
+    return build_topic_result(mapping.topic, chunks)
+
+
+def load_topic_chunks(
+    db: Session,
+    topics: List[str],
+    chunk_filter: Optional[ChunkFilter] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Stored mapping results keyed by scoped topic key"""
+    keys = list({topic_key(topic, chunk_filter) for topic in topics})
+    mappings = db.query(TopicChunkMapping).options(
+        selectinload(TopicChunkMapping.chunks)
+    ).filter(TopicChunkMapping.topic_key.in_(keys)).all()
+
+    return {mapping.topic_key: _to_result(mapping) for mapping in mappings}
+
+
+def save_topic_chunks(db: Session, results: List[Dict[str, Any]], chunk_filter: Optional[ChunkFilter] = None):
+    """Replace the stored mappings of these topics (caller commits)"""
+    by_key = {topic_key(result['topic'], chunk_filter): result for result in results}
+    if not by_key:
+        return
+
+    stale_ids = select(TopicChunkMapping.id).where(TopicChunkMapping.topic_key.in_(by_key))
+    db.execute(delete(TopicChunk).where(TopicChunk.mapping_id.in_(stale_ids)))
+    db.execute(delete(TopicChunkMapping).where(TopicChunkMapping.topic_key.in_(by_key)))
+
+    for key, result in by_key.items():
+        db.add(TopicChunkMapping(
+            topic_key=key,
+            topic=result['topic'],
+            confidence_score=result['confidence_score'],
+            has_sufficient_content=result['has_sufficient_content'],
+            chunks=[
+                TopicChunk(
+                    rank=rank,
+                    chunk_id=chunk['chunk_id'],
+                    text=chunk['text'],
+                    source=chunk['source'],
+                    score=chunk['score'],
+                    chunk_metadata=chunk.get('metadata', {})
+                )
+                for rank, chunk in enumerate(result['chunks_data'])
+            ]
+        ))
+
+
+def invalidate_topic_chunks(db: Session, user_id: Optional[int] = None):
+    """Drop stored mappings after a user's documents changed (caller commits).
+
+    Rankings depend on every chunk searched, so all of the owner's topics
+    are affected, as are mappings not scoped to any user; other owners'
+    mappings never see these chunks and are kept. Without `user_id`
+    every mapping is dropped. Topics are searched again lazily on the
+    next read.
+    """
+    if user_id is None:
+        db.execute(delete(TopicChunk))
+        db.execute(delete(TopicChunkMapping))
+        return
+
+    # Scoped keys start with the filter key, whose first part is the owner
+    owner = ChunkFilter(user_id=user_id).key()
+    stale = or_(
+        TopicChunkMapping.topic_key.startswith(f"{owner}|", autoescape=True),
+        TopicChunkMapping.topic_key.startswith(f"{owner};", autoescape=True),
+        not_(TopicChunkMapping.topic_key.startswith("user=", autoescape=True))
+    )
+    stale_ids = select(TopicChunkMapping.id).where(stale)
+    db.execute(delete(TopicChunk).where(TopicChunk.mapping_id.in_(stale_ids)))
+    db.execute(delete(TopicChunkMapping).where(stale))
+
+
+def _store(db: Session, results: List[Dict[str, Any]], chunk_filter: Optional[ChunkFilter]):
+    try:
+        save_topic_chunks(db, results, chunk_filter)
+        db.commit()
+    except IntegrityError:
+        # A concurrent request stored the same topics first
+        db.rollback()
+
+
+async def get_topics_chunks(
+    db: Session,
+    topics: List[str],
+    limit: Optional[int] = None,
+    chunk_filter: Optional[ChunkFilter] = None
+) -> List[Dict[str, Any]]:
+    """Mapping results for topics, searching only those not stored yet.
+
+    /syllabus/map stores the ranked hits of every topic, so lessons and
+    quizzes normally skip the embedding + search round trip entirely.
+    Mappings are stored per `chunk_filter` (e.g. per user), since each
+    searches different chunks. `chunks_data` is cut to `limit` chunks;
+    results are in input order.
+    """
+    stored = await run_blocking(load_topic_chunks, db, topics, chunk_filter)
+
+    missing = list(dict.fromkeys(
+        topic for topic in topics if topic_key(topic, chunk_filter) not in stored
+    ))
+    if missing:
+        fresh = await get_chunks_for_topics(
+            missing, limit=settings.topic_chunks_limit, chunk_filter=chunk_filter
+        )
+        await run_blocking(_store, db, fresh, chunk_filter)
+        stored.update((topic_key(result['topic'], chunk_filter), result) for result in fresh)
+
+    results = []
+    for topic in topics:
+        result = stored[topic_key(topic, chunk_filter)]
+        results.append({**result, "chunks_data": result['chunks_data'][:limit]})
+    return results
+
+
+async def get_topic_chunks(
+    db: Session,
+    topic: str,
+    limit: Optional[int] = None,
+    chunk_filter: Optional[ChunkFilter] = None
+) -> Dict[str, Any]:
+    """Mapping result for one topic, searching only on a miss"""
+    return (await get_topics_chunks(db, [topic], limit=limit, chunk_filter=chunk_filter))[0]
@@ -44,7 +44,7 @@ export default function LessonsPage() {
 
     setLoading(true);
     try {
-      const response = await lessonsAPI.teach(topic);
+      const response = await lessonsAPI.teach(topic, null, null, 1, selectedSyllabus);
       setSessionId(response.session_id);
       setMessages([
         {
@@ -76,7 +76,7 @@ export default function LessonsPage() {
     setLoading(true);
 
     try {
-      const response = await lessonsAPI.teach(topic, userInput, sessionId);
+      const response = await lessonsAPI.teach(topic, userInput, sessionId, 1, selectedSyllabus);
       setMessages(prev => [...prev, {
         role: 'assistant',
         content: response.message,
@@ -82,11 +82,12 @@ export const lessonsAPI = {
     return response.data;
   },
 
-  teach: async (topic, userMessage = null, sessionId = null, userId = 1) => {
+  teach: async (topic, userMessage = null, sessionId = null, userId = 1, syllabusId = null) => {
     const response = await api.post(`/api/lessons/teach?user_id=${userId}`, {
       topic,
       user_message: userMessage,
       session_id: sessionId,
+      syllabus_id: syllabusId,
     });
     return response.data;
   },
@@ -99,11 +100,12 @@ export const lessonsAPI = {
 
 // ============= QUIZ API =============
 export const quizAPI = {
-  generate: async (topic, numQuestions = 5, difficulty = 'medium') => {
+  generate: async (topic, numQuestions = 5, difficulty = 'medium', syllabusId = null) => {
     const response = await api.post('/api/quiz/generate', {
       topic,
       num_questions: numQuestions,
       difficulty,
+      syllabus_id: syllabusId,
     });
     return response.data;
   },